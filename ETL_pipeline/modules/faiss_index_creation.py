@@ -2,13 +2,21 @@ import os
 import sys
 import json
 import faiss
+import argparse
 import numpy as np
-from openai import OpenAI
-from config import settings, vectorDb_index_path, embedding_dimentions
+from config import vectorDb_index_path, vector_index_type
+from RAG.index_factory import build_index, INDEX_TYPES
+from RAG.database import (
+    load_chunk_product_ids,
+    manifest_path,
+    read_manifest,
+    staged_path,
+    write_manifest,
+    ids_digest,
+)
 from utils.logger import get_logger
 
 logger = get_logger("faiss-index-creation")
-client = OpenAI(api_key=settings.openai_api_key)
 
 # CONFIG
 FOLDER_PATH = "embed_job_output"  # <- change this
@@ -17,50 +25,107 @@ def return_index(value: str) -> int:
     return int(value.split("-")[1])
 
 
-all_embeddings = []
-all_indexes = []
-
-# Step 1: Process each .jsonl file
-for filename in sorted(os.listdir(FOLDER_PATH)):
-    if filename.endswith(".jsonl"):
-        file_path = os.path.join(FOLDER_PATH, filename)
-        with open(file_path, "r") as f:
-            for line_num, line in enumerate(f, 1):
-                try:
-                    data = json.loads(line)
-                    entries = data["response"]["body"]["data"]
-                    for entry in entries:
-                        embedding = entry["embedding"]
-                        all_embeddings.append(embedding)
-
-                        index = return_index(data["custom_id"])
-                        all_indexes.append(index)
-
-                except (KeyError, json.JSONDecodeError) as e:
-                    print(f"Skipping line {line_num} in {filename}: {e}")
-
-# Step 2: Convert to NumPy array
-embedding_matrix = np.array(all_embeddings).astype("float32")
-
-# Normalize embeddings for cosine similarity (if using IndexFlatIP)
-faiss.normalize_L2(embedding_matrix)
-
-# Your custom IDs (must be int64s)
-all_indexes = np.array(all_indexes, dtype="int64")
-
-print(all_indexes[:10])
-print(all_indexes[-10:])
-print(max(all_indexes))
-print(len(all_indexes))
-sys.exit()
-# Step 3: Create FAISS index
-base_index = faiss.IndexFlatIP(embedding_dimentions)
-index = faiss.IndexIDMap(base_index)  # Wrap with IDMap
-# index.add(embedding_matrix) # type: ignore
-index.add_with_ids(embedding_matrix, all_indexes)  # type: ignore
-
-logger.info(f"Created FAISS index with {index.ntotal} embeddings")
- 
-# Optional: Save FAISS index to disk
-path = f"{vectorDb_index_path}.index"
-faiss.write_index(index, path)
+def load_batch_embeddings(folder_path: str = FOLDER_PATH) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Reads the OpenAI batch output files.
+
+    Returns:
+        (N, dim) float32 L2 normalized embeddings and their (N,) int64 chunk numbers.
+    """
+    all_embeddings = []
+    all_indexes = []
+
+    # Step 1: Process each .jsonl file
+    for filename in sorted(os.listdir(folder_path)):
+        if filename.endswith(".jsonl"):
+            file_path = os.path.join(folder_path, filename)
+            with open(file_path, "r") as f:
+                for line_num, line in enumerate(f, 1):
+                    try:
+                        data = json.loads(line)
+                        entries = data["response"]["body"]["data"]
+                        for entry in entries:
+                            embedding = entry["embedding"]
+                            all_embeddings.append(embedding)
+
+                            index = return_index(data["custom_id"])
+                            all_indexes.append(index)
+
+                    except (KeyError, json.JSONDecodeError) as e:
+                        print(f"Skipping line {line_num} in {filename}: {e}")
+
+    # Step 2: Convert to NumPy array
+    embedding_matrix = np.array(all_embeddings).astype("float32")
+
+    # Normalize embeddings for cosine similarity (inner product indexes)
+    faiss.normalize_L2(embedding_matrix)
+
+    # Your custom IDs (must be int64s)
+    return embedding_matrix, np.array(all_indexes, dtype="int64")
+
+
+def publish(index, index_path: str, source: str, manifest: dict):
+    """
+    Moves the staged chunk tables next to the new index, then writes the manifest.
+    Serving only reloads when the manifest changes, and `vectorDB.validate`
+    rejects any file that does not match it, so a crash part way through never
+    swaps in a mixed build.
+    """
+    path = f"{index_path}.index"
+    faiss.write_index(index, path + ".tmp")
+    if source != index_path:
+        for suffix in ("_ids.npy", "_bm25.npz"):
+            if os.path.exists(source + suffix):
+                os.replace(source + suffix, index_path + suffix)
+    # Write aside and rename: running workers may have the old file memory-mapped
+    os.replace(path + ".tmp", path)
+    write_manifest(index_path, {**manifest, "vectors": int(index.ntotal)})
+    if source != index_path:
+        os.remove(manifest_path(source))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the FAISS index from batch embeddings")
+    parser.add_argument(
+        "--index_type",
+        choices=INDEX_TYPES,
+        default=vector_index_type,
+        help="ANN structure to build (see RAG/index_factory.py)",
+    )
+    args = parser.parse_args()
+
+    # The build chunking staged, else the published one (e.g. re-indexing with another --index_type)
+    source = staged_path(vectorDb_index_path)
+    manifest = read_manifest(source)
+    if manifest is None:
+        source = vectorDb_index_path
+        manifest = read_manifest(source)
+    if manifest is None:
+        logger.error(f"No build manifest at {staged_path(vectorDb_index_path)} or {vectorDb_index_path}, re-run chunking")
+        sys.exit(1)
+
+    embedding_matrix, all_indexes = load_batch_embeddings()
+
+    # Every chunk needs exactly one embedding, labelled 1..n like the chunk -> product id table
+    chunk_product_ids = load_chunk_product_ids(source)
+    if ids_digest(chunk_product_ids) != manifest["ids_digest"]:
+        logger.error(f"{source}_ids.npy does not belong to build {manifest['build_id']}, re-run chunking")
+        sys.exit(1)
+    if not np.array_equal(np.sort(all_indexes), np.arange(1, len(chunk_product_ids) + 1)):
+        logger.error(
+            f"{len(all_indexes)} embeddings do not cover the {len(chunk_product_ids)} chunks of "
+            f"build {manifest['build_id']} exactly once, re-run the embedding job"
+        )
+        sys.exit(1)
+
+    # Step 3: Create FAISS index (wrapped with IDMap)
+    index = build_index(embedding_matrix, all_indexes, args.index_type)
+
+    logger.info(f"Created {args.index_type} FAISS index with {index.ntotal} embeddings")
+
+    publish(index, vectorDb_index_path, source, manifest)
+    logger.info(f"Published build {manifest['build_id']}")
+
+
+if __name__ == "__main__":
+    main()
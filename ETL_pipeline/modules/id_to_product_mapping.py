@@ -3,20 +3,27 @@ import asyncio
 import os
 import pickle
 import json
+from contextlib import aclosing
 from config import settings, id_to_product_mapping
+from utils.packed_store import write_packed, packed_path
 
 store = Shopify(settings.store)
 
 
 async def test():
-    products = await store.fetch_all_products()
-    # print(products[:12])
     formatted_product = {}
-    for product in products:
-        formatted_product[product["id"]] = store.format_product(product, True)
+    try:
+        async with aclosing(store.iter_products()) as pages:
+            async for products in pages:  # raw pages are dropped once formatted
+                # print(products[:12])
+                for product in products:
+                    formatted_product[product["id"]] = store.format_product(product, True)
+    finally:
+        await store.aclose()
 
     with open(id_to_product_mapping, "wb") as f:
         pickle.dump(formatted_product, f, protocol=pickle.HIGHEST_PROTOCOL)
+    write_packed(formatted_product, packed_path(id_to_product_mapping))
 
 
 if __name__ == "__main__":
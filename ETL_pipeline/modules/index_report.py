@@ -0,0 +1,121 @@
+"""
+Offline recall vs latency vs memory report for the selectable FAISS index types.
+
+Every index type from RAG/index_factory.py is built over the same embeddings and
+compared with the exact flat index (ground truth). Query time knobs are swept:
+nprobe for ivf_pq, efSearch for hnsw.
+
+    python -m ETL_pipeline.modules.index_report                      # embed_job_output/
+    python -m ETL_pipeline.modules.index_report --synthetic 18226    # no OpenAI files needed
+
+Queries are stored vectors with gaussian noise (then re-normalized), so no query
+is an exact copy of an indexed chunk.
+"""
+
+import time
+import faiss
+import argparse
+import numpy as np
+from config import embedding_dimentions, ivf_nprobe, hnsw_ef_search
+from RAG.index_factory import INDEX_TYPES, build_index, configure_search
+
+SWEEPS = {
+    "flat": [None],
+    "hnsw": [16, 32, 64, hnsw_ef_search, 256],
+    "ivf_pq": [1, 8, ivf_nprobe, 64, 128],
+    "sq8": [None],
+}
+
+
+def synthetic_embeddings(n: int, dim: int = embedding_dimentions, seed: int = 7) -> np.ndarray:
+    """Clustered unit vectors (products -> chunks), closer to real data than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(1, n // 3), dim)).astype("float32")
+    xb = centers[rng.integers(0, len(centers), n)] + 0.35 * rng.standard_normal((n, dim)).astype("float32")
+    faiss.normalize_L2(xb)
+    return xb
+
+
+def noisy_queries(xb: np.ndarray, n_queries: int, noise: float = 0.02, seed: int = 11) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    xq = xb[rng.choice(len(xb), size=min(n_queries, len(xb)), replace=False)]
+    xq = xq + noise * rng.standard_normal(xq.shape).astype("float32")
+    xq = np.ascontiguousarray(xq, dtype="float32")
+    faiss.normalize_L2(xq)
+    return xq
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    """Mean fraction of the true top-k labels present in the returned top-k."""
+    hits = sum(len(np.intersect1d(f[f >= 0], t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def timed_search(index: faiss.Index, xq: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """One query at a time (how vectorDB sees traffic). Returns labels and per-query ms."""
+    labels = np.empty((len(xq), k), dtype="int64")
+    millis = np.empty(len(xq))
+    for i in range(len(xq)):
+        start = time.perf_counter()
+        _, labels[i : i + 1] = index.search(xq[i : i + 1], k)  # type: ignore
+        millis[i] = (time.perf_counter() - start) * 1000
+    return labels, millis
+
+
+def index_size_mb(index: faiss.Index) -> float:
+    return len(faiss.serialize_index(index)) / (1024 * 1024)
+
+
+def report(xb: np.ndarray, xq: np.ndarray, k: int, index_types=INDEX_TYPES):
+    ids = np.arange(1, len(xb) + 1, dtype="int64")  # chunk numbers, 1 based like the ETL
+    faiss.omp_set_num_threads(1)  # per query latency, not intra query parallelism
+
+    flat = build_index(xb, ids, "flat")
+    _, truth = flat.search(xq, k)  # type: ignore
+
+    print(f"{len(xb)} vectors x {xb.shape[1]} dims, {len(xq)} queries, recall@{k} vs flat\n")
+    print(f"{'index':<8} {'param':>10} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'size MB':>8} {'build s':>8}")
+
+    for index_type in index_types:
+        start = time.perf_counter()
+        index = build_index(xb, ids, index_type)
+        build_s = time.perf_counter() - start
+        size_mb = index_size_mb(index)
+
+        for value in SWEEPS[index_type]:
+            param = "-"
+            if index_type == "ivf_pq":
+                configure_search(index, nprobe=value)  # type: ignore
+                param = f"nprobe={value}"
+            elif index_type == "hnsw":
+                configure_search(index, ef_search=value)  # type: ignore
+                param = f"ef={value}"
+
+            labels, millis = timed_search(index, xq, k)
+            print(
+                f"{index_type:<8} {param:>10} {recall_at_k(labels, truth):>7.3f} "
+                f"{np.percentile(millis, 50):>8.3f} {np.percentile(millis, 95):>8.3f} "
+                f"{size_mb:>8.1f} {build_s:>8.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS index type recall / latency / memory report")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use N synthetic vectors instead of embed_job_output/")
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--index_types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    args = parser.parse_args()
+
+    if args.synthetic:
+        xb = synthetic_embeddings(args.synthetic)
+    else:
+        from ETL_pipeline.modules.faiss_index_creation import load_batch_embeddings
+
+        xb, _ = load_batch_embeddings()
+
+    report(xb, noisy_queries(xb, args.queries), args.k, args.index_types)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Embeds the chunk request files in `embed_job_data/` with the local ONNX backend
+instead of the OpenAI Batch API.
+
+Output goes to `embed_job_output/` in the Batch API output format, so
+`faiss_index_creation` builds the index exactly as it does for OpenAI vectors:
+
+    python -m ETL_pipeline.modules.local_embedding
+    python -m ETL_pipeline.modules.faiss_index_creation
+"""
+
+import os
+import json
+import argparse
+from RAG.embedding_backend import OnnxEmbedder
+from utils.logger import get_logger
+
+logger = get_logger("local-embedding")
+
+
+def embed_batch_files(data_folder: str, output_folder: str, embedder: OnnxEmbedder) -> int:
+    os.makedirs(output_folder, exist_ok=True)
+    for filename in os.listdir(output_folder):
+        if filename.endswith(".jsonl"):
+            os.remove(os.path.join(output_folder, filename))
+
+    total = 0
+    for index, filename in enumerate(sorted(f for f in os.listdir(data_folder) if f.endswith(".jsonl"))):
+        with open(os.path.join(data_folder, filename), "r", encoding="utf-8") as f:
+            requests = [json.loads(line) for line in f]
+
+        vectors = embedder.embed([request["body"]["input"] for request in requests])
+
+        with open(os.path.join(output_folder, f"output_{index}.jsonl"), "w", encoding="utf-8") as f:
+            for request, vector in zip(requests, vectors):
+                result = {
+                    "custom_id": request["custom_id"],
+                    "response": {
+                        "status_code": 200,
+                        "body": {"model": embedder.model, "data": [{"index": 0, "embedding": vector.tolist()}]},
+                    },
+                }
+                f.write(json.dumps(result) + "\n")
+
+        total += len(requests)
+        logger.info(f"Embedded {len(requests)} chunks from {filename}")
+    return total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed ETL chunk files with the local ONNX model")
+    parser.add_argument("--data_folder", default="embed_job_data")
+    parser.add_argument("--output_folder", default="embed_job_output")
+    args = parser.parse_args()
+
+    embedder = OnnxEmbedder()
+    count = embed_batch_files(args.data_folder, args.output_folder, embedder)
+    embedder.close()
+    logger.info(f"{count} chunks embedded with {embedder.model}")
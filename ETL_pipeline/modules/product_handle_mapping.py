@@ -1,11 +1,14 @@
 from models import ProductEntry
 from Shopify import Shopify
 from config import settings, product_dict_file_location
-from typing import List
+from typing import List, AsyncIterable
 import asyncio
 import pickle
 import argparse
+from contextlib import aclosing
 from utils.logger import get_logger
+from utils.packed_store import write_packed, packed_path
+from Shopify.handle_index import write_handle_index, handle_index_path
 
 logger = get_logger("Id_to_handle_mapping")
 handles = [
@@ -14,26 +17,30 @@ handles = [
 ]
 
 
-def generate_mapping(products):
+async def generate_mapping(pages: AsyncIterable[list]):
     data: dict[str, ProductEntry] = {}
 
-    for product in products:
-        handle = product.get("handle", "404")
-        variants = product.get("variants", {}).get("nodes", [])
-
-        variant_count = len(variants)
-        is_single_variant = variant_count == 1
-        var = {}
-        for v in variants:
-            var[v["title"]] = {"vid": v["id"]}
-        data[handle] = ProductEntry(
-            have_single_variant=is_single_variant,
-            variants=var,
-        )
+    async for products in pages:  # built while the next page downloads
+        for product in products:
+            handle = product.get("handle", "404")
+            variants = product.get("variants", {}).get("nodes", [])
+
+            variant_count = len(variants)
+            is_single_variant = variant_count == 1
+            var = {}
+            for v in variants:
+                var[v["title"]] = {"vid": v["id"]}
+            data[handle] = ProductEntry(
+                have_single_variant=is_single_variant,
+                variants=var,
+                title=product.get("title", ""),
+            )
 
     # save
     with open(product_dict_file_location, "wb") as f:
         pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    write_packed(data, packed_path(product_dict_file_location))
+    write_handle_index(data, handle_index_path(product_dict_file_location))
 
 
 async def executor():
@@ -62,11 +69,14 @@ async def executor():
     test_map = args.test_mapping
     
     store = Shopify(settings.store, "ProductHandleMapping")
-    products = await store.fetch_mapping_products()
-    # logger.info(f"Products Count {len(products)} -- {products[:10]}")
 
-    if build_map:
-        generate_mapping(products)
+    try:
+        if build_map:
+            pages = store.iter_products(store.mapping_products_query(), convert_ids=False)
+            async with aclosing(pages):
+                await generate_mapping(pages)
+    finally:
+        await store.aclose()
     if load_map:
         success = await store.init_handle_id_table()
         logger.info(f"Products Mapping loaded Successfully {success}")
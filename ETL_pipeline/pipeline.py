@@ -2,6 +2,7 @@ import os
 import sys
 import time
 import json
+import uuid
 import faiss
 import pickle
 import openai
@@ -10,11 +11,17 @@ import asyncio
 import requests
 import argparse
 import numpy as np
-from typing import List
+from array import array
+from contextlib import aclosing
+from typing import List, AsyncIterable, AsyncIterator
 from openai import OpenAI
 from Shopify import Shopify
 from langchain.schema import Document
-from config import settings, persistent_path, embedding_model
+from config import settings, persistent_path, embedding_model, vectorDb_index_path
+from RAG.database import load_chunk_product_ids, staged_path, write_manifest, ids_digest
+from RAG.lexical_index import BM25Builder
+from RAG.embedding_backend import OnnxEmbedder
+from ETL_pipeline.modules.local_embedding import embed_batch_files
 from utils.logger import get_logger
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
@@ -137,9 +144,8 @@ def save_chunks_to_faiss(chunks, index_path="faiss_index"):
     # 4. Save FAISS index
     faiss.write_index(index, index_path + ".index")
 
-    # 5. Save metadata separately (aligned by position)
-    with open(index_path + "_meta.pkl", "wb") as f:
-        pickle.dump(metadata, f)
+    # 5. Save chunk -> product ids separately (aligned by position)
+    np.save(index_path + "_ids.npy", chunk_product_ids(metadata))
 
     logger.info(
         f" Saved {len(chunks)} chunks into FAISS (cosine similarity) at '{index_path}.index'"
@@ -150,9 +156,8 @@ def search_faiss(query, index_path="faiss_index", top_k=5):
     # 1. Load FAISS index
     index = faiss.read_index(index_path + ".index")
 
-    # 2. Load metadata
-    with open(index_path + "_meta.pkl", "rb") as f:
-        metadata = pickle.load(f)
+    # 2. Load chunk -> product ids
+    product_ids = load_chunk_product_ids(index_path)
 
     # 3. Embed and normalize query
     q_emb = (
@@ -169,13 +174,18 @@ def search_faiss(query, index_path="faiss_index", top_k=5):
         results.append(
             {
                 "score": float(score),  # cosine similarity score
-                "metadata": metadata[idx],  # remap via saved metadata
+                "metadata": {"id": int(product_ids[idx])},  # remap via saved ids
             }
         )
 
     return results
 
 
+def chunk_product_ids(metadata) -> np.ndarray:
+    """Columnar int64 product id per chunk, the format `vectorDB` loads from `<index>_ids.npy`."""
+    return np.array([int(m["id"]) for m in metadata], dtype=np.int64)
+
+
 def create_request_object(request_number, text_chunk):
     """
     Creates a request object for the OpenAI embeddings API.
@@ -225,39 +235,33 @@ def create_batch_jsonl(batch_num, data_folder, genres, updated_idx_start):
             f.write(json.dumps(genre_request_object) + "\n")
 
 
-def process_and_save_products_into_batches(
-    products,
+async def process_and_save_products_into_batches(
+    products: AsyncIterable[dict],
     chunk_per_file=4000,
-    index_path="faiss_index",
+    index_path=os.path.basename(vectorDb_index_path),
     data_folder="embed_job_data",
 ):
     """
-    Processes a list of products by chunking their descriptions, saving metadata,
-    and batching chunks into jsonl files.
+    Processes a stream of products by chunking their descriptions, saving metadata,
+    and batching chunks into jsonl files. Each product is chunked as it arrives and
+    every batch file is written as soon as it is full, so only the current batch,
+    the int64 product id per chunk and the BM25 term statistics stay in memory.
 
     Args:
-        products (list): List of product objects.
+        products (AsyncIterable[dict]): Product objects, e.g. `Shopify.iter_bulk_products()`.
         chunk_per_file (int): Number of chunks per batch file.
-        index_path (str): Path prefix for saving metadata pickle.
+        index_path (str): Path prefix for saving the chunk -> product id array and BM25 index.
         data_folder (str): Folder to save batch jsonl files.
+
+    The id array and BM25 index are staged under `staged_path(index_path)` with a
+    manifest naming their build; `faiss_index_creation` publishes them together
+    with the FAISS index built from these chunks, so serving never mixes builds.
     """
 
-    chunks = []
+    product_count = 0
     index_path = persistent_path + index_path  # save in persistent directory
-
-    for product in products:
-        chunks.extend(chunk_product_description(product))
-
-    logger.info(f"Total products processed: {len(products)}")
-    logger.info(f"Total chunks created: {len(chunks)}")
-
-    # Extract metadata and page contents separately
-    meta_chunks = [c.metadata for c in chunks]
-    chunks = [c.page_content for c in chunks]
-
-    # Save metadata as pickle file
-    with open(index_path + "_meta.pkl", "wb") as f:
-        pickle.dump(meta_chunks, f)
+    staged = staged_path(index_path)
+    build_id = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
 
     # Clear existing files in data_folder
     if os.path.exists(data_folder):
@@ -268,14 +272,36 @@ def process_and_save_products_into_batches(
     else:
         os.mkdir(data_folder)
 
-    batch_num = min(len(chunks), chunk_per_file)
+    product_ids = array("q")  # chunk -> product id, aligned with request numbers - 1
+    lexical = BM25Builder()  # doc i == request i + 1 == FAISS label
+    batch, batch_idx = [], 0
 
-    for batch_idx, start_idx in enumerate(range(0, len(chunks), batch_num)):
-        batch_genres = chunks[start_idx : start_idx + batch_num]
-        create_batch_jsonl(
-            batch_idx, data_folder, batch_genres, updated_idx_start=start_idx
-        )
-        logger.extended_logging(f"{start_idx = }\n{batch_num = }")
+    async for product in products:
+        for chunk in chunk_product_description(product):
+            product_ids.append(int(chunk.metadata["id"]))
+            lexical.add(chunk.page_content)
+            batch.append(chunk.page_content)
+            if len(batch) == chunk_per_file:
+                start_idx = len(product_ids) - len(batch)
+                create_batch_jsonl(batch_idx, data_folder, batch, updated_idx_start=start_idx)
+                logger.extended_logging(f"{start_idx = }\n{len(batch) = }")
+                batch, batch_idx = [], batch_idx + 1
+        product_count += 1
+        await asyncio.sleep(0)  # let the prefetched next page make progress meanwhile
+
+    if batch:
+        create_batch_jsonl(batch_idx, data_folder, batch, updated_idx_start=len(product_ids) - len(batch))
+
+    logger.info(f"Total products processed: {product_count}")
+    logger.info(f"Total chunks created: {len(product_ids)}")
+
+    product_ids = np.frombuffer(product_ids, dtype=np.int64)
+    np.save(staged + "_ids.npy", product_ids)
+    lexical.build(build_id=build_id).save(staged)
+
+    # Written last: a staged build without a manifest is incomplete
+    write_manifest(staged, {"build_id": build_id, "chunks": len(product_ids), "ids_digest": ids_digest(product_ids)})
+    logger.info(f"Staged build {build_id} at {staged}")
 
 
 def upload_batch_files_and_get_ids(
@@ -506,7 +532,33 @@ def save_embeddings_file(output_file_ids: List, folder_path):
             f.write(binary_data)
 
 
-def pipeline(products, client):
+async def chunk_catalog(data_folder: str, bulk_export: bool = False):
+    """Pulls the catalog from Shopify and chunks it into batch jsonl files."""
+    store = Shopify(settings.store)
+    try:
+        if bulk_export:
+            products = store.iter_bulk_products()  # streamed JSONL, one product at a time
+        else:
+            products = _flatten(store.iter_products())  # page by page, next page prefetched
+        async with aclosing(products):
+            await process_and_save_products_into_batches(
+                products,
+                chunk_per_file=1500,
+                index_path=os.path.basename(vectorDb_index_path),
+                data_folder=data_folder,
+            )
+    finally:
+        await store.aclose()
+
+
+async def _flatten(pages: AsyncIterator[list]) -> AsyncIterator[dict]:
+    async with aclosing(pages):
+        async for page in pages:
+            for product in page:
+                yield product
+
+
+def pipeline(client):
     parser = argparse.ArgumentParser(description="Vector Database Pipeline")
 
     parser.add_argument(
@@ -514,6 +566,11 @@ def pipeline(products, client):
         action="store_true",
         help="Chunk product list into JSONL files",
     )
+    parser.add_argument(
+        "--bulk_export",
+        action="store_true",
+        help="Pull the catalog with a Shopify bulk operation (streamed JSONL) instead of paging",
+    )
     parser.add_argument(
         "--upload_chunks",
         action="store_true",
@@ -529,6 +586,11 @@ def pipeline(products, client):
         action="store_true",
         help="Download embedding results from server",
     )
+    parser.add_argument(
+        "--embed_locally",
+        action="store_true",
+        help="Embed JSONL chunks with the local ONNX model instead of the Batch API",
+    )
 
     args = parser.parse_args()
 
@@ -540,12 +602,7 @@ def pipeline(products, client):
     data_folder = "embed_job_data"
 
     if prepare_data:
-        process_and_save_products_into_batches(
-            products,
-            chunk_per_file=1500,
-            index_path="faiss_index",
-            data_folder=data_folder,
-        )
+        asyncio.run(chunk_catalog(data_folder, bulk_export=args.bulk_export))
 
     if new_job:
         file_ids = upload_batch_files_and_get_ids(data_folder, client)
@@ -557,12 +614,14 @@ def pipeline(products, client):
         output_file_ids = return_output_file_ids()
         save_embeddings_file(output_file_ids, output_folder)
 
+    if args.embed_locally:
+        embedder = OnnxEmbedder()
+        embed_batch_files(data_folder, output_folder, embedder)
+        embedder.close()
+
 
 # Example usage
 if __name__ == "__main__":
-    store = Shopify(settings.store)
-    products = asyncio.run(store.fetch_all_products())
-
     client = OpenAI(api_key=settings.openai_api_key)
 
-    pipeline(products, client)
+    pipeline(client)
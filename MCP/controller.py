@@ -1,10 +1,13 @@
 from models import ChatRequest
 import json
+import asyncio
 from typing import List, Dict, Any, Union
-from config import settings, embedding_model, order_prefix
+from config import settings, embedding_model, order_prefix, vector_index_drain_timeout
 from utils.logger import get_logger
-from RAG.database import vectorDB
+from RAG.database import vectorDB, artifact_version
+from RAG.product_filters import ProductFilter
 from Shopify import Shopify
+from Shopify.product_cache import ProductCache
 
 
 class Controller:
@@ -15,8 +18,52 @@ class Controller:
     def __init__(self):
         self.vector_store = vectorDB()
         self.store = Shopify(settings.store, "ShopifyClient")
+        self.product_cache = ProductCache(self._load_product)
         self.logger = get_logger("MCP - Controller")
-        
+        self._reload_lock = asyncio.Lock()
+        self._retiring: set[asyncio.Task] = set()
+
+    async def aclose(self):
+        if self._retiring:
+            await asyncio.gather(*self._retiring, return_exceptions=True)
+        await self.vector_store.aclose()
+        await self.product_cache.aclose()
+        await self.store.aclose()
+
+    async def reload_vector_store(self, force: bool = False) -> dict:
+        """
+        Zero downtime index reload: builds a new `vectorDB` off the event loop,
+        validates it, then swaps `self.vector_store`. Queries already running keep
+        their reference to the old instance, which is closed once they finished.
+        """
+        async with self._reload_lock:
+            current = self.vector_store
+            if not force and artifact_version() == current.version:
+                return {"status": "unchanged", "version": current.version}
+
+            candidate = None
+            try:
+                candidate = await asyncio.to_thread(vectorDB)
+                await asyncio.to_thread(candidate.validate)
+            except Exception as e:
+                # Half written ETL output lands here; the next file event retries
+                self.logger.error(f"Vector index reload rejected, keeping {current.version}: {e}")
+                if candidate is not None:
+                    await candidate.aclose()
+                return {"status": "rejected", "version": current.version, "error": str(e)}
+
+            self.vector_store = candidate  # single reference assignment, atomic for the event loop
+            self.logger.info(f"Vector index swapped {current.version} -> {candidate.version}")
+
+            task = asyncio.create_task(self._retire(current))
+            self._retiring.add(task)
+            task.add_done_callback(self._retiring.discard)
+            return {"status": "swapped", "version": candidate.version, "previous": current.version}
+
+    async def _retire(self, vector_store: vectorDB):
+        await vector_store.drain(vector_index_drain_timeout)
+        await vector_store.aclose()
+
 
     async def function_execution(self, chat_request: ChatRequest, tool_calls) -> ChatRequest:
         vector_db_flag = False
@@ -35,9 +82,10 @@ class Controller:
                 
                 query = arguments["query"]
                 top_k = arguments.get("top_k_result", 6)
+                filters = ProductFilter.from_arguments(arguments)
 
                 # Call the actual function
-                tool_output = await self.get_products_data(query, top_k)
+                tool_output = await self.get_products_data(query, top_k, filters)
 
                 # Append tool response to messages
                 chat_request.append_tool_response(tool_output, tool_call.id)
@@ -129,15 +177,19 @@ class Controller:
         return chat_request
 
 # Vector DB
-    async def get_products_data(self, query: str, top_k: int = 5) -> str:
+    async def get_products_data(
+        self, query: str, top_k: int = 5, filters: ProductFilter | None = None
+    ) -> str:
         """
         Function for fetching product data based on a query.
         This interact with a Comapany Vector database.
+        Optional filters (price range, stock, category) are applied inside the search.
         """
         if top_k < 5 and top_k > 2:
             top_k += 3
-        results = await self.vector_store.query(query=query, top_k=top_k)
-        results = json.dumps(results, indent=2)
+        vector_store = self.vector_store  # the same index version for query and payloads
+        results = await vector_store.query(query=query, top_k=top_k, filters=filters)
+        results = vector_store.payloads.serialize(results)  # compact, token budgeted
         results = "#VectorDB-"+results  # Added Identifier for future Actions
         return results 
 
@@ -147,12 +199,23 @@ class Controller:
         Function to fetch complete product data using the product handle.
         This is used to get the most up-to-date product information.
         """
-        product = await self.store.get_product_by_handle(handle)
-        if not product:
+        try:
+            product = await self.product_cache.get(handle)
+        except LookupError:
+            return json.dumps({"error": "Product lookup failed, please try again."})
+        if product is None:
             return json.dumps({"error": "Product not found."})
-        product = self.store.format_product(product)
         return str(product)
 
+    async def _load_product(self, handle: str) -> dict | None:
+        """Product cache loader: formatted product, None if Shopify has no such handle."""
+        product = await self.store.get_product_by_handle(handle)
+        if not product:
+            raise LookupError(f"Shopify request for '{handle}' failed")
+        if "error" in product:
+            return None
+        return self.store.format_product(product)
+
     async def get_order_via_order_number(self, order_number: str) -> str:
         """
         Fetch and format an order by its order number.
@@ -243,9 +306,13 @@ class Controller:
                     "errors": data["userErrors"]
                 }
 
+            # Lines the store matched to another handle / variant, for the model to confirm
+            resolved_from = data.pop("resolved_from", None)
+
             # Success response
             return {
                 "success": True,
+                **({"resolved_from": resolved_from} if resolved_from else {}),
                 "message": 'Your Request is fulfilled please check the cart details in "cart" ',
                 "cart": data.get("cart", data)  # fallback if "cart" not explicitly returned
             }
@@ -386,9 +453,13 @@ class Controller:
                     "errors": data["userErrors"]
                 }
 
+            # Lines the store matched to another handle / variant, for the model to confirm
+            resolved_from = data.pop("resolved_from", None)
+
             # Success response
             return {
                 "success": True,
+                **({"resolved_from": resolved_from} if resolved_from else {}),
                 "cart": data.get("cart", data)  # fallback if "cart" not explicitly returned
             }
 
@@ -462,9 +533,13 @@ class Controller:
                     "errors": data["userErrors"]
                 }
 
+            # Lines the store matched to another handle / variant, for the model to confirm
+            resolved_from = data.pop("resolved_from", None)
+
             # Success response
             return {
                 "success": True,
+                **({"resolved_from": resolved_from} if resolved_from else {}),
                 "cart": data.get("cart", data)  # fallback if "cart" not explicitly returned
             }
 
@@ -538,9 +613,13 @@ class Controller:
                     "errors": data["userErrors"]
                 }
 
+            # Lines the store matched to another handle / variant, for the model to confirm
+            resolved_from = data.pop("resolved_from", None)
+
             # Success response
             return {
                 "success": True,
+                **({"resolved_from": resolved_from} if resolved_from else {}),
 
                 "cart": data.get("cart", data)  # fallback if "cart" not explicitly returned
             }
@@ -65,6 +65,22 @@ vector_db_features = [
                         "type": "integer",
                         "description": "The number of top similar products to return.",
                     },
+                    "min_price": {
+                        "type": "number",
+                        "description": "Only products with a variant priced at or above this amount (PKR).",
+                    },
+                    "max_price": {
+                        "type": "number",
+                        "description": "Only products with a variant priced at or below this amount (PKR), e.g. 2000 for 'under 2000'.",
+                    },
+                    "in_stock": {
+                        "type": "boolean",
+                        "description": "true to return only products currently in stock.",
+                    },
+                    "category": {
+                        "type": "string",
+                        "description": "Product type / category keyword, e.g. 'sensors', 'development board'.",
+                    },
                 },
                 "required": ["query"],
                 "additionalProperties": False,
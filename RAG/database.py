@@ -1,61 +1,341 @@
+import os
+import json
 import faiss
 import pickle
+import hashlib
 import asyncio
 import numpy as np
-from openai import AsyncOpenAI
-from config import settings, vectorDb_index_path, embedding_model, id_to_product_mapping
+from typing import Optional
+from RAG.embedding_cache import EmbeddingCache
+from RAG.embedding_batcher import EmbeddingBatcher
+from RAG.embedding_backend import get_embedder
+from RAG.search_scheduler import SearchScheduler
+from RAG.semantic_cache import SemanticResultCache
+from RAG.payloads import ProductPayloads
+from RAG.index_factory import configure_search, search_parameters
+from RAG.lexical_index import BM25Index
+from RAG.product_filters import ProductFilter, ProductAttributes, ChunkSelector
+from utils.logger import get_logger
+from utils.packed_store import load_mapping, packed_path
+from config import (
+    vectorDb_index_path,
+    embedding_backend,
+    id_to_product_mapping,
+    faiss_index_load_mode,
+    retrieval_mode,
+    retrieval_max_fetch,
+    product_score_aggregation,
+    hybrid_retrieval,
+    lexical_top_k,
+    rrf_k,
+)
+
+
+def read_faiss_index(path: str, load_mode: str = faiss_index_load_mode):
+    """
+    Loads a FAISS index from disk.
+
+    - "memory": the whole index is copied into this process (private RSS per worker)
+    - "mmap": flat codes are mapped read-only straight from the file, so every
+      uvicorn worker shares the same OS page cache and loading is O(1)
+    """
+    if load_mode == "mmap":
+        index = faiss.read_index(path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        # Ask the kernel to read the file ahead in the background so the first
+        # searches do not page-fault on cold pages; this call does not block.
+        if hasattr(os, "posix_fadvise"):
+            fd = os.open(path, os.O_RDONLY)
+            try:
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            finally:
+                os.close(fd)
+        return index
+    return faiss.read_index(path)
+
+
+def manifest_path(index_path: str) -> str:
+    return index_path + "_manifest.json"
+
+
+def staged_path(index_path: str) -> str:
+    """Prefix the ETL writes the next build under ("<index>.next_ids.npy", ...) until it is published."""
+    return index_path + ".next"
+
+
+def read_manifest(index_path: str) -> Optional[dict]:
+    """
+    The build manifest of the artifacts under `index_path`, None for legacy builds.
+
+        {"build_id": ..., "chunks": len(ids), "ids_digest": ..., "vectors": index.ntotal}
+
+    `vectors` is only set once the FAISS index of that build exists.
+    """
+    try:
+        with open(manifest_path(index_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_manifest(index_path: str, manifest: dict):
+    """Writes aside and renames, readers see the old manifest or the new one."""
+    path = manifest_path(index_path)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(path + ".tmp", path)
+
+
+def ids_digest(chunk_product_ids: np.ndarray) -> str:
+    return hashlib.sha1(np.ascontiguousarray(chunk_product_ids, dtype=np.int64).tobytes()).hexdigest()[:16]
+
+
+def artifact_version(
+    index_path: str = vectorDb_index_path, mapping_path: str = id_to_product_mapping
+) -> str:
+    """
+    Short fingerprint of the artifacts a `vectorDB` loads, changes whenever the
+    ETL publishes a new index. The index files are identified by the build id
+    of their manifest, which the ETL writes last, so a half published build
+    does not count as a new version. Legacy builds without a manifest and the
+    product mapping are stamped by (name, mtime, size).
+    """
+    manifest = read_manifest(index_path)
+    if manifest is not None:
+        stamps = [f"build:{manifest['build_id']}"]
+        artifacts = ()
+    else:
+        stamps = []
+        artifacts = (index_path + ".index", index_path + "_ids.npy", index_path + "_bm25.npz")
+    for path in artifacts + (mapping_path, packed_path(mapping_path)):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            stamps.append(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size}")
+    return hashlib.sha1("|".join(stamps).encode()).hexdigest()[:12]
+
+
+def load_chunk_product_ids(index_path: str) -> np.ndarray:
+    """
+    Columnar chunk -> product id table: `ids[chunk_no - 1]` is the product id of
+    FAISS label `chunk_no` (FAISS labels are 1 based, the array is 0 based).
+    Falls back to the legacy `_meta.pkl` list of {"id": ...} dicts.
+    """
+    if os.path.exists(index_path + "_ids.npy"):
+        return np.load(index_path + "_ids.npy")
+
+    with open(index_path + "_meta.pkl", "rb") as f:
+        metadata = pickle.load(f)
+    return np.array([int(m["id"]) for m in metadata], dtype=np.int64)
+
+
+def aggregate_by_product(
+    similarities: np.ndarray,
+    labels: np.ndarray,
+    chunk_product_ids: np.ndarray,
+    k: int,
+    method: str = "max",
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Collapses chunk hits of one query into the `k` best distinct products.
+
+    Args:
+        similarities / labels: one row of `index.search` output (best first).
+        chunk_product_ids: chunk -> product id table (label - 1 indexed).
+        method: "max" (best chunk wins) or "sum" (products matching on many chunks win).
+
+    Returns:
+        (product_ids, scores), best first, at most `k` entries.
+    """
+    found = labels > 0  # FAISS pads missing neighbours with -1
+    product_ids = chunk_product_ids[labels[found] - 1]
+    similarities = similarities[found]
+
+    if method == "sum":
+        unique_ids, inverse = np.unique(product_ids, return_inverse=True)
+        scores = np.bincount(inverse, weights=similarities)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return unique_ids[order], scores[order]
+
+    # Hits are sorted best first, so a product's first hit is its max score
+    _, first_hit = np.unique(product_ids, return_index=True)
+    first_hit = np.sort(first_hit)[:k]
+    return product_ids[first_hit], similarities[first_hit]
+
+
+def reciprocal_rank_fusion(
+    rankings: list[np.ndarray], k: int, constant: int = rrf_k
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Fuses best-first id rankings: score(id) = sum over rankings of 1 / (constant + rank).
+    Only ranks are used, so BM25 scores and cosine similarities never have to be
+    put on the same scale.
+
+    Returns:
+        (ids, fused_scores), best first, at most `k` entries.
+    """
+    ids = np.concatenate(rankings)
+    ranks = np.concatenate([np.arange(1, len(r) + 1) for r in rankings])
+    unique_ids, inverse = np.unique(ids, return_inverse=True)
+    fused = np.bincount(inverse, weights=1.0 / (constant + ranks))
+    order = np.argsort(-fused, kind="stable")[:k]
+    return unique_ids[order], fused[order]
 
 
 class vectorDB:
     def __init__(
         self,
         index_path: str = vectorDb_index_path,
-        model: str = embedding_model,
+        backend: str = embedding_backend,
+        mapping_path: str = id_to_product_mapping,
     ):
-        self.model = model
+        self.embedder = get_embedder(backend)  # must match the backend the index was built with
+        self.model = self.embedder.model
+        self.logger = get_logger("RAG - vectorDB")
+        # Taken before loading, so files replaced mid-load show up as a newer version
+        self.version = artifact_version(index_path, mapping_path)
+        self.manifest = read_manifest(index_path)
         # self.client = AsyncOpenAI(api_key=settings.openai_api_key,)  # async client
-        self.db_client = faiss.read_index(index_path + ".index")
-        with open(index_path + "_meta.pkl", "rb") as f:
-            self.metadata = pickle.load(f)
-        with open(id_to_product_mapping, "rb") as f:
-            self.data_dict = pickle.load(f)
+        self.db_client = read_faiss_index(index_path + ".index")
+        configure_search(self.db_client)  # nprobe / efSearch for ANN indexes
+        self.chunk_product_ids = load_chunk_product_ids(index_path)
+        self.max_chunks_per_product = int(np.unique(self.chunk_product_ids, return_counts=True)[1].max(initial=1))
+        # Packed mode maps data.pack read-only: one page cache copy for all workers
+        self.data_dict = load_mapping(mapping_path)
+        self.attributes = ProductAttributes(self.data_dict, self.chunk_product_ids)
+        self.payloads = ProductPayloads(self.data_dict)  # compact JSON per product, serialized once
+        self.embedding_cache = EmbeddingCache(self.model)
+        self.embedding_batcher = EmbeddingBatcher(self.embedder)
+        self.search_scheduler = SearchScheduler(self.db_client)
+        self.lexical_index = self.load_lexical_index(index_path)
+        self.result_cache = SemanticResultCache(self.db_client.d)
+        self.in_flight = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
 
         # print(len(self.data_dict))
         # print(self.data_dict['8190612144406'])
 
-    # async def aclose(self):
-    #     await self.client.close()
+    def load_lexical_index(self, index_path: str) -> BM25Index | None:
+        if not hybrid_retrieval or not os.path.exists(index_path + "_bm25.npz"):
+            return None
+        lexical_index = BM25Index.load(index_path)
+        if lexical_index.n_docs != len(self.chunk_product_ids):
+            self.logger.warning(
+                f"BM25 index covers {lexical_index.n_docs} chunks but the id table has "
+                f"{len(self.chunk_product_ids)}, rebuild it; hybrid retrieval disabled"
+            )
+            return None
+        return lexical_index
+
+    def validate(self):
+        """Raises ValueError when the loaded artifacts do not belong to the same ETL run."""
+        n_chunks = len(self.chunk_product_ids)
+        if self.db_client.ntotal == 0 or self.db_client.ntotal != n_chunks:
+            raise ValueError(f"FAISS index holds {self.db_client.ntotal} vectors for {n_chunks} chunks")
+
+        if self.manifest is not None:
+            build_id = self.manifest["build_id"]
+            if self.manifest.get("vectors") != self.db_client.ntotal:
+                raise ValueError(f"FAISS index does not belong to build {build_id}")
+            if self.manifest["chunks"] != n_chunks or self.manifest["ids_digest"] != ids_digest(self.chunk_product_ids):
+                raise ValueError(f"Chunk id table does not belong to build {build_id}")
+            if self.lexical_index is not None and self.lexical_index.build_id != build_id:
+                raise ValueError(f"BM25 index is from build {self.lexical_index.build_id or 'unknown'}, not {build_id}")
+
+        if isinstance(self.db_client, faiss.IndexIDMap):
+            labels = faiss.vector_to_array(self.db_client.id_map)
+            if labels.min() < 1 or labels.max() > n_chunks:
+                raise ValueError(
+                    f"FAISS labels [{labels.min()}, {labels.max()}] exceed the {n_chunks} chunk id table"
+                )
+
+        missing = [pid for pid in np.unique(self.chunk_product_ids).tolist() if str(pid) not in self.data_dict]
+        if missing:
+            raise ValueError(f"{len(missing)} indexed products are missing from the product dict, e.g. {missing[:3]}")
+
+    async def drain(self, timeout: float):
+        """Waits until no query is running on this instance (or `timeout` seconds pass)."""
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.logger.warning(f"Index {self.version} still has {self.in_flight} queries after {timeout}s")
+
+    async def aclose(self):
+        self.search_scheduler.close()
+        self.embedder.close()
+        await self.embedding_cache.aclose()
+
+    async def embed_query(self, query: str) -> np.ndarray:
+        """
+        Returns the L2 normalized embedding of `query` as a (1, dim) float32 matrix.
+        Served from the embedding cache when possible, otherwise from the embedding backend.
+        """
+        cached = await self.embedding_cache.get(query)
+        if cached is not None:
+            return cached.reshape(1, -1)
+
+        # Concurrent misses are coalesced into one batched embeddings request
+        query_embedding = (await self.embedding_batcher.embed(query)).reshape(1, -1)
+
+        await self.embedding_cache.set(query, query_embedding[0])
+        return query_embedding
+
+    def chunk_selector(self, filters: Optional[ProductFilter]) -> Optional[ChunkSelector]:
+        """FAISS id selector for `filters`, None when nothing is filtered."""
+        if filters is None or filters.is_empty:
+            return None
+        return ChunkSelector(self.attributes.mask(filters))
 
     async def query(
         self,
         query: str,
         top_k: int = 5,
+        filters: Optional[ProductFilter] = None,
     ):
-        # 1. Async call to OpenAI for embedding
+        # Tracked so a hot swapped index is only closed once its last query finished
+        self.in_flight += 1
+        self.idle.clear()
         try:
-            response = None
-            async with AsyncOpenAI(
-                api_key=settings.openai_api_key,
-            ) as client:
-                # Perform your asynchronous OpenAI API calls here
-                response = await client.embeddings.create(
-                    model=self.model, input=[query]
-                )
-        except Exception as e:
-            raise RuntimeError(f"Embedding API failed: {e}")
+            return await self._query(query, top_k, filters)
+        finally:
+            self.in_flight -= 1
+            if self.in_flight == 0:
+                self.idle.set()
+
+    async def _query(self, query: str, top_k: int, filters: Optional[ProductFilter]):
+        selector = self.chunk_selector(filters)
+        if selector is not None and selector.count == 0:
+            return []
 
-        if not response or not response.data:
-            raise ValueError("Failed to embed query.")
+        # 1. Query embedding (cache -> OpenAI / local ONNX)
+        query_embedding = await self.embed_query(query)
 
-        query_embedding = response.data[0].embedding
-        query_embedding = np.array([query_embedding]).astype("float32")
-        faiss.normalize_L2(query_embedding)
+        # 2. Near duplicate of a recent query -> its products, no search / hydration
+        signature = self.result_cache.signature(query, top_k, filters)
+        cached = self.result_cache.get(query_embedding[0], signature)
+        if cached is not None:
+            return [{**result, "metadata": {**result["metadata"], "Query": query}} for result in cached]
+
+        results = await self.search(query, query_embedding, top_k, selector)
+        self.result_cache.put(query_embedding[0], signature, results)
+        return results
+
+    async def search(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        top_k: int,
+        selector: Optional[ChunkSelector] = None,
+    ):
+        """Retrieval for an already embedded query, bypassing every cache."""
+        if retrieval_mode == "product":
+            return await self.query_products(query, query_embedding, top_k, selector)
 
-        # 2. Run Faiss (sync) in a thread so it doesn’t block event loop
-        distances, indices = await asyncio.to_thread(
-            self.db_client.search,
+        # 3. Run Faiss on the dedicated search executor, batched with concurrent queries
+        #    (filtered searches carry their own selector and run on their own)
+        distances, indices = await self.search_scheduler.search(
             query_embedding,  # xq
             top_k,  # k
+            self.search_params(selector),
         )
 
         # print("Distances:\n", distances)
@@ -72,27 +352,80 @@ class vectorDB:
         seen_ids = set()
         result = []
 
-        for distance, idx in zip(distances[0], indices[0]):
-            print("Index", idx)
-            score = 1 / distance
-            unique_id = self.metadata[idx - 1]["id"] # MetaData is 0 Based Indexed And Faiss is 1 Based Indexed
+        labels = indices[0]
+        found = labels > 0  # FAISS pads missing neighbours with -1
+        product_ids = self.chunk_product_ids[labels[found] - 1]  # ids are 0 Based Indexed And Faiss is 1 Based Indexed
+
+        for distance, product_id in zip(distances[0][found], product_ids):
+            unique_id = str(product_id)  # data.pkl is keyed by the numeric id string
             if unique_id not in seen_ids:
                 seen_ids.add(unique_id)
-                # if self.data_dict[unique_id][]
-                result.append(
-                    {
-                        "score": round(float(score), 3),
-                        "content": self.data_dict[unique_id],
-                        "metadata": {
-                          "Handle": self.data_dict[unique_id]["handle"],
-                          "Score": round(float(score), 3),
-                          "Query": query,
-                        },
-                    }
-                )
+                result.append(self.format_result(unique_id, distance, query))
 
         return result
 
+    def search_params(self, selector: Optional[ChunkSelector]):
+        return None if selector is None else search_parameters(self.db_client, selector.selector)
+
+    async def query_products(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        top_k: int,
+        selector: Optional[ChunkSelector] = None,
+    ):
+        """
+        Product level retrieval: over-fetches chunks and aggregates their scores per
+        product with NumPy, so `top_k` distinct products come back from ONE search.
+        With a selector, non-matching chunks are skipped inside FAISS and BM25.
+        """
+        # Enough chunks to always contain top_k distinct products (bounded for huge products)
+        candidates = self.db_client.ntotal if selector is None else selector.count
+        fetch_k = min(top_k * self.max_chunks_per_product, retrieval_max_fetch, candidates)
+        distances, indices = await self.search_scheduler.search(
+            query_embedding, fetch_k, self.search_params(selector)
+        )
+
+        if self.lexical_index is None:
+            product_ids, scores = aggregate_by_product(
+                distances[0], indices[0], self.chunk_product_ids, top_k, product_score_aggregation
+            )
+            return [
+                self.format_result(str(product_id), score, query)
+                for product_id, score in zip(product_ids, scores)
+            ]
+
+        # Hybrid: exact tokens (part numbers, SKUs) from BM25 + semantics from FAISS
+        vector_ids, similarities = aggregate_by_product(
+            distances[0], indices[0], self.chunk_product_ids, fetch_k, product_score_aggregation
+        )
+        lexical_labels, lexical_scores = self.lexical_index.search(
+            query, lexical_top_k, None if selector is None else selector.mask
+        )
+        lexical_ids, _ = aggregate_by_product(
+            lexical_scores, lexical_labels, self.chunk_product_ids, lexical_top_k
+        )
+        product_ids, _ = reciprocal_rank_fusion([vector_ids, lexical_ids], top_k)
+
+        # Reported scores stay vector based; lexical only hits have none
+        similarity_of = dict(zip(vector_ids.tolist(), similarities.tolist()))
+        return [
+            self.format_result(str(product_id), similarity_of.get(int(product_id)), query)
+            for product_id in product_ids
+        ]
+
+    def format_result(self, unique_id: str, similarity: float | None, query: str) -> dict:
+        score = round(float(1 / similarity), 3) if similarity else None
+        return {
+            "score": score,
+            "content": self.data_dict[unique_id],
+            "metadata": {
+                "Handle": self.data_dict[unique_id]["handle"],
+                "Score": score,
+                "Query": query,
+            },
+        }
+
 
 if __name__ == "__main__":
     store = vectorDB()
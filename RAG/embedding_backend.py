@@ -0,0 +1,157 @@
+"""
+Pluggable embedding backends shared by query time retrieval and the ETL.
+
+- "openai": `text-embedding-3-small` over the pooled AsyncOpenAI client
+- "onnx":   a local sentence-embedding model (e.g. an ONNX export of
+            all-MiniLM-L6-v2 / bge-small) run on CPU with onnxruntime
+- "stub":   deterministic hash based vectors, for offline tests and benchmarks
+
+The FAISS index must be built with the same backend that embeds the queries,
+see `python -m ETL_pipeline.modules.local_embedding`.
+"""
+
+import os
+import faiss
+import hashlib
+import asyncio
+import numpy as np
+import onnxruntime as ort
+from tokenizers import Tokenizer
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from utils.client_registry import clients
+from config import (
+    embedding_backend,
+    embedding_model,
+    embedding_dimentions,
+    onnx_model_path,
+    onnx_tokenizer_path,
+    onnx_max_length,
+    onnx_batch_size,
+    onnx_intra_op_threads,
+    onnx_workers,
+)
+
+
+class OpenAIEmbedder:
+    def __init__(self, model: str = embedding_model):
+        self.model = model
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        """(len(texts), dim) float32, L2 normalized, in input order."""
+        response = await clients.openai.embeddings.create(model=self.model, input=texts)
+        if not response or len(response.data) != len(texts):
+            raise ValueError("Failed to embed query.")
+
+        ordered = sorted(response.data, key=lambda item: item.index)
+        vectors = np.array([item.embedding for item in ordered], dtype="float32")
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def close(self):
+        pass
+
+
+class OnnxEmbedder:
+    """
+    Mean pooled sentence embeddings from a local ONNX transformer.
+
+    Inference is batched (`batch_size` texts per session run) and runs on a
+    small thread pool; onnxruntime releases the GIL, so the event loop keeps
+    serving requests while a batch is being encoded.
+    """
+
+    def __init__(
+        self,
+        model_path: str = onnx_model_path,
+        tokenizer_path: str = onnx_tokenizer_path,
+        max_length: int = onnx_max_length,
+        batch_size: int = onnx_batch_size,
+        intra_op_threads: int = onnx_intra_op_threads,
+        workers: int = onnx_workers,
+    ):
+        # e.g. "onnx:all-MiniLM-L6-v2", keeps the embedding cache apart from OpenAI vectors
+        self.model = "onnx:" + os.path.basename(os.path.dirname(os.path.abspath(model_path)))
+        self.batch_size = batch_size
+
+        self.tokenizer = Tokenizer.from_file(tokenizer_path)
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = intra_op_threads  # 0 = onnxruntime default (all cores)
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {node.name for node in self.session.get_inputs()}
+
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="onnx-embed")
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Synchronous, for the ETL. (len(texts), dim) float32, L2 normalized."""
+        return np.concatenate(
+            [self._embed_batch(texts[i : i + self.batch_size]) for i in range(0, len(texts), self.batch_size)]
+        )
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.embed, texts)
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        output = self.session.run(None, feeds)[0]
+        if output.ndim == 3:  # last_hidden_state -> mean over real (non padding) tokens
+            mask = attention_mask[:, :, None].astype(np.float32)
+            output = (output * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        vectors = np.ascontiguousarray(output, dtype="float32")
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+
+
+class StubEmbedder:
+    """
+    Deterministic embeddings without a model: known texts map to pre-stored
+    vectors, anything else to a unit vector seeded by the text's hash.
+    """
+
+    def __init__(self, dim: int = embedding_dimentions, known: Optional[dict[str, np.ndarray]] = None):
+        self.model = f"stub-{dim}"
+        self.dim = dim
+        self.known = known or {}
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.empty((len(texts), self.dim), dtype="float32")
+        for i, text in enumerate(texts):
+            if text in self.known:
+                vectors[i] = self.known[text]
+            else:
+                seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "little")
+                vectors[i] = np.random.default_rng(seed).standard_normal(self.dim)
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    async def aembed(self, texts: list[str]) -> np.ndarray:
+        return self.embed(texts)
+
+    def close(self):
+        pass
+
+
+def get_embedder(backend: str = embedding_backend):
+    if backend == "openai":
+        return OpenAIEmbedder()
+    if backend == "onnx":
+        return OnnxEmbedder()
+    if backend == "stub":
+        return StubEmbedder()
+    raise ValueError(f"Unknown embedding backend '{backend}', expected 'openai', 'onnx' or 'stub'")
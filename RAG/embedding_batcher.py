@@ -0,0 +1,89 @@
+import asyncio
+import numpy as np
+from typing import Optional
+from collections import Counter
+from utils.logger import get_logger
+from config import embedding_batch_max_size, embedding_batch_max_wait_ms
+
+
+class EmbeddingBatcher:
+    """
+    Micro-batching coalescer for query embeddings.
+
+    Queries arriving within `max_wait_ms` of each other (up to `max_batch`
+    inputs) are sent as ONE request to the embedding backend (an OpenAI
+    `embeddings.create` call or one local ONNX batch), and every waiting
+    coroutine gets back its own L2 normalized float32 vector.
+    """
+
+    def __init__(
+        self,
+        embedder,
+        max_batch: int = embedding_batch_max_size,
+        max_wait_ms: float = embedding_batch_max_wait_ms,
+    ):
+        self.embedder = embedder
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+        self.batch_sizes: Counter[int] = Counter()  # batch size -> number of API calls
+        self.logger = get_logger("RAG - EmbeddingBatcher")
+
+    async def embed(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]):
+        # Identical texts inside one window are embedded once
+        unique_texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batch_sizes[len(unique_texts)] += 1
+
+        try:
+            vectors = await self.embedder.aembed(unique_texts)
+        except Exception as e:
+            self.logger.error(f"Batched embedding of {len(unique_texts)} queries failed: {e}")
+            error = e if isinstance(e, ValueError) else RuntimeError(f"Embedding API failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        position = {text: i for i, text in enumerate(unique_texts)}
+
+        for text, future in batch:
+            if not future.done():
+                future.set_result(vectors[position[text]])
+
+    def metrics(self) -> dict:
+        calls = sum(self.batch_sizes.values())
+        inputs = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "api_calls": calls,
+            "embedded_inputs": inputs,
+            "avg_batch_size": round(inputs / calls, 2) if calls else 0.0,
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items())),
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+        }
@@ -0,0 +1,113 @@
+import time
+import hashlib
+import numpy as np
+import redis.asyncio as redis
+from typing import Optional
+from collections import OrderedDict
+from utils.logger import get_logger
+from config import (
+    redis_url,
+    embedding_cache_key,
+    embedding_cache_ttl,
+    embedding_cache_size,
+)
+
+
+class EmbeddingCache:
+    """
+    Two tier cache of normalized query -> float32 embedding vector.
+
+    - Tier 1: in-process LRU, bounded by `max_size` (one per uvicorn worker)
+    - Tier 2: Redis hash shared by all workers, every field expires after `ttl`
+
+    Redis is optional at runtime: any Redis failure is logged, counted and the
+    lookup simply falls through to the embedding API.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        max_size: int = embedding_cache_size,
+        ttl: int = embedding_cache_ttl,
+        redis_client: Optional[redis.Redis] = None,
+    ):
+        self.model = model
+        self.max_size = max_size
+        self.ttl = ttl
+        # Vectors are stored as raw float32 buffers, so no decode_responses here
+        self.redis_client = redis_client or redis.from_url(redis_url)
+        self.hash_key = f"{embedding_cache_key}:{model}"
+        self._lru: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self.stats = {"lru_hits": 0, "redis_hits": 0, "misses": 0, "redis_errors": 0}
+        self.logger = get_logger("RAG - EmbeddingCache")
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """Case / whitespace / edge punctuation insensitive cache key."""
+        return " ".join(query.lower().split()).strip(" .,;:!?\"'")
+
+    @staticmethod
+    def _field(normalized_query: str) -> str:
+        return hashlib.sha1(normalized_query.encode("utf-8")).hexdigest()
+
+    async def get(self, query: str) -> Optional[np.ndarray]:
+        field = self._field(self.normalize(query))
+
+        # 1. In-process LRU
+        entry = self._lru.get(field)
+        if entry is not None:
+            expires_at, vector = entry
+            if expires_at > time.monotonic():
+                self._lru.move_to_end(field)
+                self.stats["lru_hits"] += 1
+                return vector
+            del self._lru[field]
+
+        # 2. Shared Redis hash
+        try:
+            raw = await self.redis_client.hget(self.hash_key, field)  # type: ignore
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            self.logger.warning(f"Embedding cache Redis lookup failed: {e}")
+            raw = None
+
+        if raw:
+            vector = np.frombuffer(raw, dtype=np.float32)
+            self._remember(field, vector)
+            self.stats["redis_hits"] += 1
+            return vector
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, query: str, vector: np.ndarray):
+        field = self._field(self.normalize(query))
+        vector = np.ascontiguousarray(vector, dtype=np.float32).reshape(-1)
+        self._remember(field, vector)
+
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.hset(self.hash_key, field, vector.tobytes())
+                pipe.hexpire(self.hash_key, self.ttl, field)
+                await pipe.execute()
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            self.logger.warning(f"Embedding cache Redis write failed: {e}")
+
+    def _remember(self, field: str, vector: np.ndarray):
+        self._lru[field] = (time.monotonic() + self.ttl, vector)
+        self._lru.move_to_end(field)
+        while len(self._lru) > self.max_size:
+            self._lru.popitem(last=False)
+
+    def metrics(self) -> dict:
+        lookups = self.stats["lru_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "lru_size": len(self._lru),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+        }
+
+    async def aclose(self):
+        await self.redis_client.aclose()
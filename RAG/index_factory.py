@@ -0,0 +1,99 @@
+import math
+import faiss
+import numpy as np
+from config import (
+    vector_index_type,
+    hnsw_m,
+    hnsw_ef_construction,
+    hnsw_ef_search,
+    ivf_nprobe,
+    ivf_pq_m,
+)
+
+# Every index works on L2 normalized vectors, so inner product == cosine similarity
+INDEX_TYPES = ("flat", "hnsw", "ivf_pq", "sq8")
+
+
+def ivf_nlist(n_vectors: int) -> int:
+    """~4 * sqrt(N) inverted lists, while keeping >= 39 training points per centroid."""
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def factory_string(index_type: str, n_vectors: int) -> str:
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "hnsw":
+        return f"HNSW{hnsw_m},Flat"
+    if index_type == "ivf_pq":
+        return f"IVF{ivf_nlist(n_vectors)},PQ{ivf_pq_m}x8"
+    if index_type == "sq8":
+        return "SQ8"
+    raise ValueError(f"Unknown index type '{index_type}', expected one of {INDEX_TYPES}")
+
+
+def build_index(
+    embeddings: np.ndarray, ids: np.ndarray, index_type: str = vector_index_type
+) -> faiss.Index:
+    """
+    Builds an `IndexIDMap` over the requested ANN structure.
+
+    Args:
+        embeddings: (N, dim) float32, already L2 normalized.
+        ids: (N,) int64 FAISS labels (chunk numbers, 1 based).
+        index_type: one of INDEX_TYPES.
+    """
+    n_vectors, dim = embeddings.shape
+    base = faiss.index_factory(dim, factory_string(index_type, n_vectors), faiss.METRIC_INNER_PRODUCT)
+
+    if index_type == "hnsw":
+        faiss.downcast_index(base).hnsw.efConstruction = hnsw_ef_construction
+    if not base.is_trained:
+        base.train(embeddings)  # type: ignore
+
+    index = faiss.IndexIDMap(base)
+    index.add_with_ids(embeddings, ids)  # type: ignore
+    return index
+
+
+def describe_index(index: faiss.Index) -> str:
+    """Short name of the ANN structure behind an (optionally id-mapped) index."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(base, faiss.IndexHNSW):
+        return "hnsw"
+    if faiss.try_extract_index_ivf(base) is not None:
+        return "ivf_pq"
+    if isinstance(base, faiss.IndexScalarQuantizer):
+        return "sq8"
+    return "flat"
+
+
+def configure_search(index: faiss.Index, nprobe: int = ivf_nprobe, ef_search: int = hnsw_ef_search):
+    """Applies the query time knobs (IVF nprobe / HNSW efSearch); a no-op for flat indexes."""
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+    ivf = faiss.try_extract_index_ivf(base)
+    if ivf is not None:
+        ivf.nprobe = nprobe
+    if isinstance(base, faiss.IndexHNSW):
+        base.hnsw.efSearch = ef_search
+
+
+def search_parameters(
+    index: faiss.Index,
+    selector: faiss.IDSelector,
+    nprobe: int = ivf_nprobe,
+    ef_search: int = hnsw_ef_search,
+) -> faiss.SearchParameters:
+    """
+    Per-call search parameters restricting the search to `selector`'s ids.
+    The parameter class must match the ANN structure, and per-call parameters
+    replace the index level knobs, so nprobe / efSearch are set here again.
+    `IndexIDMap` translates the selector from FAISS labels to internal ids.
+    """
+    base = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+    if faiss.try_extract_index_ivf(base) is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=nprobe)
+    if isinstance(base, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=ef_search)
+    return faiss.SearchParameters(sel=selector)
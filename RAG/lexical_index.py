@@ -0,0 +1,203 @@
+"""
+Compact in-memory BM25 inverted index over the ETL chunk texts.
+
+Document `i` is chunk number `i + 1`, i.e. the same label FAISS uses, so lexical
+and vector hits resolve through the same chunk -> product id table.
+
+    # rebuild next to the FAISS artifacts from the ETL batch files
+    python -m RAG.lexical_index --data_folder embed_job_data
+"""
+
+import os
+import re
+import json
+import argparse
+import numpy as np
+from array import array
+from typing import Iterable, Optional
+from collections import defaultdict
+from config import vectorDb_index_path, bm25_k1, bm25_b
+
+# Part numbers / SKUs survive as one token: "wt32-eth01", "lm2596", "18650", "3.3v"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-./][a-z0-9]+)*")
+TOKEN_SEPARATORS = re.compile(r"[-./]")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lowercased alphanumeric tokens. Compound tokens are also indexed by their
+    parts and their glued form, so "WT32-ETH01", "wt32 eth01" and "wt32eth01"
+    all meet in the index.
+    """
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        if TOKEN_SEPARATORS.search(token):
+            parts = TOKEN_SEPARATORS.split(token)
+            tokens.extend(parts)
+            tokens.append("".join(parts))
+    return tokens
+
+
+class BM25Index:
+    """
+    CSR inverted index: the postings of term `t` are
+    `doc_ids[offsets[t]:offsets[t + 1]]` with precomputed BM25 weights
+    (idf and length normalization folded in), so a query is a handful of
+    vectorized adds into one dense score array.
+    """
+
+    def __init__(
+        self,
+        vocabulary: dict[str, int],
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        weights: np.ndarray,
+        n_docs: int,
+        build_id: str = "",
+    ):
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+        self.build_id = build_id  # ETL build the chunks come from, see RAG.database.read_manifest
+
+    @classmethod
+    def build(
+        cls, texts: Iterable[str], k1: float = bm25_k1, b: float = bm25_b, build_id: str = ""
+    ) -> "BM25Index":
+        builder = BM25Builder()
+        for text in texts:
+            builder.add(text)
+        return builder.build(k1, b, build_id)
+
+    def search(
+        self, query: str, k: int, mask: Optional[np.ndarray] = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns (labels, scores) best first; labels are 1 based like FAISS, -1 padded.
+        `mask` (bool per document) restricts the hits, e.g. to filtered chunks.
+        """
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for token in set(tokenize(query)):
+            term = self.vocabulary.get(token)
+            if term is None:
+                continue
+            start, end = self.offsets[term], self.offsets[term + 1]
+            scores[self.doc_ids[start:end]] += self.weights[start:end]
+
+        if mask is not None:
+            scores[~mask] = 0
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        matched = matched[np.argsort(-scores[matched], kind="stable")]
+
+        labels = np.full(k, -1, dtype=np.int64)
+        top = np.zeros(k, dtype=np.float32)
+        labels[: len(matched)] = matched + 1
+        top[: len(matched)] = scores[matched]
+        return labels, top
+
+    def save(self, index_path: str = vectorDb_index_path):
+        terms = sorted(self.vocabulary, key=self.vocabulary.__getitem__)
+        np.savez(
+            index_path + "_bm25.npz",
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            weights=self.weights,
+            n_docs=np.int64(self.n_docs),
+            build_id=np.frombuffer(self.build_id.encode("utf-8"), dtype=np.uint8),
+            terms=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+        )
+
+    @classmethod
+    def load(cls, index_path: str = vectorDb_index_path) -> "BM25Index":
+        with np.load(index_path + "_bm25.npz") as data:
+            terms = data["terms"].tobytes().decode("utf-8").split("\n") if data["terms"].size else []
+            return cls(
+                {term: i for i, term in enumerate(terms)},
+                data["offsets"],
+                data["doc_ids"],
+                data["weights"],
+                int(data["n_docs"]),
+                data["build_id"].tobytes().decode("utf-8") if "build_id" in data else "",
+            )
+
+
+class BM25Builder:
+    """
+    Collects BM25 term statistics one document at a time, so a corpus can be
+    indexed while it streams past; only (doc, tf) pairs are kept, not the texts.
+    """
+
+    def __init__(self):
+        self.postings: defaultdict[str, array] = defaultdict(lambda: array("i"))  # doc, tf, doc, tf...
+        self.doc_lengths = array("i")
+
+    def add(self, text: str):
+        doc_id = len(self.doc_lengths)
+        tokens = tokenize(text)
+        self.doc_lengths.append(len(tokens))
+        counts: defaultdict[str, int] = defaultdict(int)
+        for token in tokens:
+            counts[token] += 1
+        for token, tf in counts.items():
+            self.postings[token].extend((doc_id, tf))
+
+    def build(self, k1: float = bm25_k1, b: float = bm25_b, build_id: str = "") -> BM25Index:
+        n_docs = len(self.doc_lengths)
+        doc_len = np.frombuffer(self.doc_lengths, dtype=np.int32).astype(np.float32)
+        avg_len = float(doc_len.mean()) if n_docs else 1.0
+        length_norm = k1 * (1 - b + b * doc_len / max(avg_len, 1.0))
+
+        vocabulary = {term: i for i, term in enumerate(sorted(self.postings))}
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        doc_ids, weights = [], []
+
+        for term, i in vocabulary.items():
+            pairs = np.frombuffer(self.postings[term], dtype=np.int32).reshape(-1, 2)
+            docs, tf = pairs[:, 0].copy(), pairs[:, 1].astype(np.float32)
+            idf = np.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            doc_ids.append(docs)
+            weights.append((idf * tf * (k1 + 1) / (tf + length_norm[docs])).astype(np.float32))
+            offsets[i + 1] = offsets[i] + len(docs)
+
+        return BM25Index(
+            vocabulary,
+            offsets,
+            np.concatenate(doc_ids) if doc_ids else np.zeros(0, dtype=np.int32),
+            np.concatenate(weights) if weights else np.zeros(0, dtype=np.float32),
+            n_docs,
+            build_id,
+        )
+
+
+def read_batch_chunk_texts(data_folder: str) -> list[str]:
+    """Chunk texts from the ETL batch request files, ordered by request number (== FAISS label)."""
+    chunks: dict[int, str] = {}
+    for filename in os.listdir(data_folder):
+        if not filename.endswith(".jsonl"):
+            continue
+        with open(os.path.join(data_folder, filename), "r", encoding="utf-8") as f:
+            for line in f:
+                request = json.loads(line)
+                chunks[int(request["custom_id"].split("-")[1])] = request["body"]["input"]
+    return [chunks[number] for number in sorted(chunks)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the BM25 lexical index")
+    parser.add_argument("--data_folder", default="embed_job_data")
+    parser.add_argument("--index_path", default=vectorDb_index_path)
+    args = parser.parse_args()
+
+    from RAG.database import read_manifest  # here, RAG.database imports this module
+
+    # the rebuilt index belongs to the build that is already published
+    manifest = read_manifest(args.index_path) or {}
+    texts = read_batch_chunk_texts(args.data_folder)
+    index = BM25Index.build(texts, build_id=manifest.get("build_id", ""))
+    index.save(args.index_path)
+    print(f"BM25 index: {index.n_docs} chunks, {len(index.vocabulary)} terms -> {args.index_path}_bm25.npz")
@@ -0,0 +1,57 @@
+import json
+from typing import Optional
+from rs_bpe.bpe import openai as token_counter
+from config import payload_description_chars, payload_token_budget
+
+COMPACT = (",", ":")
+
+
+def trim_description(description: str, limit: int = payload_description_chars) -> str:
+    """Cuts at the last word boundary before `limit` characters."""
+    if len(description) <= limit:
+        return description
+    return description[:limit].rsplit(" ", 1)[0].rstrip(" ,.;:") + " ..."
+
+
+class ProductPayloads:
+    """
+    Compact JSON of every product in the `id_to_product_mapping` dict, serialized
+    once at load time (trimmed description, no indentation) together with its
+    cl100k token count, so a tool output is assembled from ready made strings.
+    """
+
+    def __init__(self, data_dict: dict, description_chars: int = payload_description_chars):
+        self.encoder = token_counter.cl100k_base()
+        self.by_handle: dict[str, tuple[str, int]] = {}
+
+        for product in data_dict.values():
+            compact = dict(product)
+            if "description" in compact:
+                compact["description"] = trim_description(compact["description"] or "", description_chars)
+            payload = json.dumps(compact, ensure_ascii=False, separators=COMPACT)
+            self.by_handle[product.get("handle", "")] = (payload, self.encoder.count(payload))
+
+    def serialize(self, results: list[dict], token_budget: Optional[int] = payload_token_budget) -> str:
+        """
+        JSON array of `vectorDB` results in rank order. Once `token_budget` would be
+        exceeded the remaining (lowest ranked) results are dropped; the best one is
+        always kept.
+        """
+        parts, used = [], 0
+        for result in results:
+            metadata = json.dumps(result["metadata"], ensure_ascii=False, separators=COMPACT)
+            handle = result["metadata"]["Handle"]
+            payload, tokens = self.by_handle.get(handle) or self._serialize(result["content"])
+
+            part = f'{{"score":{json.dumps(result["score"])},"content":{payload},"metadata":{metadata}}}'
+            tokens += self.encoder.count(metadata) + 8  # + keys / braces around them
+            if parts and token_budget is not None and used + tokens > token_budget:
+                break
+            parts.append(part)
+            used += tokens
+
+        return "[" + ",".join(parts) + "]"
+
+    def _serialize(self, content: dict) -> tuple[str, int]:
+        payload = json.dumps(content, ensure_ascii=False, separators=COMPACT)
+        return payload, self.encoder.count(payload)
@@ -0,0 +1,143 @@
+"""
+Structured retrieval filters (price, stock, category) evaluated against
+per-chunk attribute arrays and pushed into FAISS as an `IDSelectorBitmap`,
+so only matching chunks are ever scored.
+"""
+
+import re
+import math
+import faiss
+import numpy as np
+from typing import Any, Optional
+from dataclasses import dataclass
+from utils.logger import get_logger
+
+logger = get_logger("RAG - ProductFilter")
+
+# "Rs. 1,000" / "PKR 1000" / "1000 rupees" -> "1000"
+_CURRENCY = re.compile(r"^(?:rs\.?|pkr|rupees?|\$)\s*|\s*(?:rs\.?|pkr|rupees?|/-)$")
+_TRUE = {"true", "yes", "y", "1", "in stock", "available"}
+_FALSE = {"false", "no", "n", "0", "out of stock", "unavailable"}
+
+
+def _number(key: str, value: Any) -> Optional[float]:
+    """A price bound from a tool argument, or None (logged) when it is not a plain amount."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        number = float(value)
+    else:
+        text = _CURRENCY.sub("", str(value).strip().lower()).replace(",", "")
+        try:
+            number = float(text)
+        except ValueError:
+            number = math.nan
+    if not math.isfinite(number) or number < 0:
+        logger.warning(f"Ignoring {key}={value!r}: not a price")
+        return None
+    return number
+
+
+def _flag(key: str, value: Any) -> Optional[bool]:
+    """A yes / no tool argument as bool, or None (logged) when it is neither."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    logger.warning(f"Ignoring {key}={value!r}: not a yes / no value")
+    return None
+
+
+@dataclass(frozen=True)
+class ProductFilter:
+    min_price: Optional[float] = None  # some variant costs at least this
+    max_price: Optional[float] = None  # some variant costs at most this
+    in_stock: Optional[bool] = None
+    category: Optional[str] = None  # case-insensitive substring of productType
+
+    @classmethod
+    def from_arguments(cls, arguments: dict) -> "ProductFilter":
+        """
+        Builds a filter from LLM tool call arguments, ignoring absent / null values.
+        Values the model phrased loosely are coerced ("Rs. 1,000" -> 1000.0,
+        "yes" -> True); anything else is dropped and logged instead of failing the search.
+        """
+        category = str(arguments.get("category") or "").strip()
+        return cls(
+            min_price=_number("min_price", arguments.get("min_price")),
+            max_price=_number("max_price", arguments.get("max_price")),
+            in_stock=_flag("in_stock", arguments.get("in_stock")),
+            category=category.lower() or None,
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return self == ProductFilter()
+
+
+def _price(entry: dict, key: str) -> float:
+    try:
+        return float(entry["priceRange"][key])
+    except (KeyError, TypeError, ValueError):
+        return np.nan
+
+
+class ProductAttributes:
+    """
+    Columnar product attributes expanded to one row per chunk (row == FAISS label - 1),
+    built once from the `id_to_product_mapping` dict.
+    """
+
+    def __init__(self, data_dict: dict, chunk_product_ids: np.ndarray):
+        product_ids, chunk_rows = np.unique(chunk_product_ids, return_inverse=True)
+        entries = [data_dict.get(str(product_id)) for product_id in product_ids.tolist()]
+
+        known = np.array([entry is not None for entry in entries])
+        entries = [entry or {} for entry in entries]
+        # format_product replaces out of stock / inactive products by a {"handle", "Note"} stub
+        in_stock = np.array([known[i] and "Note" not in entry for i, entry in enumerate(entries)])
+        min_price = np.array([_price(entry, "min_price") for entry in entries], dtype=np.float32)
+        max_price = np.array([_price(entry, "max_price") for entry in entries], dtype=np.float32)
+        categories = [str(entry.get("productType") or "").lower() for entry in entries]
+
+        self.categories, category_codes = np.unique(categories, return_inverse=True)
+        self.known = known[chunk_rows]
+        self.in_stock = in_stock[chunk_rows]
+        self.min_price = min_price[chunk_rows]
+        self.max_price = max_price[chunk_rows]
+        self.category = category_codes.astype(np.int32)[chunk_rows]
+        self.n_chunks = len(chunk_product_ids)
+
+    def mask(self, product_filter: ProductFilter) -> np.ndarray:
+        """Boolean mask over chunks (row == FAISS label - 1) matching every set condition."""
+        mask = self.known.copy()
+        # NaN prices never compare true, so products without a price drop out of price filters
+        if product_filter.min_price is not None:
+            mask &= self.max_price >= product_filter.min_price
+        if product_filter.max_price is not None:
+            mask &= self.min_price <= product_filter.max_price
+        if product_filter.in_stock is not None:
+            mask &= self.in_stock == product_filter.in_stock
+        if product_filter.category:
+            codes = [i for i, name in enumerate(self.categories) if product_filter.category in name]
+            mask &= np.isin(self.category, codes)
+        return mask
+
+
+class ChunkSelector:
+    """
+    `IDSelectorBitmap` over FAISS labels (bit `label` set == chunk allowed).
+    Holds on to the bitmap because FAISS only keeps a raw pointer to it.
+    """
+
+    def __init__(self, mask: np.ndarray):
+        self.mask = mask
+        self.count = int(mask.sum())
+        # labels are 1 based, so bit 0 stays clear
+        self.bitmap = np.packbits(np.concatenate(([False], mask)), bitorder="little")
+        self.selector = faiss.IDSelectorBitmap(len(self.bitmap), faiss.swig_ptr(self.bitmap))
@@ -0,0 +1,138 @@
+import os
+import faiss
+import asyncio
+import numpy as np
+from typing import Optional
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+from utils.logger import get_logger
+from config import faiss_omp_threads, faiss_search_max_batch
+
+
+def available_cores() -> int:
+    """Cores this process may actually run on (respects taskset / cgroup cpusets)."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on every platform
+        return os.cpu_count() or 1
+
+
+class SearchScheduler:
+    """
+    Batched FAISS search on a dedicated executor.
+
+    A query that arrives while the index is idle is searched right away.
+    Queries that arrive while a search is running are queued, and when it
+    finishes they are stacked into a single matrix and searched with ONE
+    `index.search` call, then the rows are split back out to each caller.
+    A lone query never waits for company; batching only happens under load.
+
+    The executor owns a single thread so FAISS's OpenMP pool (pinned to
+    `threads`) never competes with itself or with the default
+    `asyncio.to_thread` pool.
+    """
+
+    def __init__(
+        self,
+        index,
+        threads: int = faiss_omp_threads,
+        max_batch: int = faiss_search_max_batch,
+    ):
+        self.index = index
+        self.threads = threads or available_cores()
+        self.max_batch = max_batch
+        faiss.omp_set_num_threads(self.threads)
+        # OpenMP settings are per thread, so pin them in the worker as well
+        self.executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="faiss-search",
+            initializer=faiss.omp_set_num_threads,
+            initargs=(self.threads,),
+        )
+        self._pending: list[tuple[np.ndarray, int, asyncio.Future]] = []
+        self._running = 0  # batches handed to the executor and not finished yet
+        self._tasks: set[asyncio.Task] = set()
+        self.searches = 0
+        self.searched_vectors = 0
+        self.logger = get_logger("RAG - SearchScheduler")
+
+    async def search(
+        self,
+        query_vector: np.ndarray,
+        k: int,
+        params: Optional[faiss.SearchParameters] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Same contract as `index.search` for a single (1, dim) query. Searches with
+        per-call `params` (e.g. an id selector) are not batched, since one
+        `index.search` call takes one set of parameters.
+        """
+        loop = asyncio.get_running_loop()
+        if params is not None:
+            matrix = np.ascontiguousarray(query_vector.reshape(1, -1), dtype="float32")
+            result = await loop.run_in_executor(
+                self.executor, partial(self.index.search, matrix, k, params=params)
+            )
+            self.searches += 1
+            self.searched_vectors += 1
+            return result
+
+        future = loop.create_future()
+        self._pending.append((query_vector.reshape(1, -1), k, future))
+
+        if not self._running or len(self._pending) >= self.max_batch:
+            self._flush()
+
+        return await future
+
+    def _flush(self):
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        self._running += 1
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[np.ndarray, int, asyncio.Future]]):
+        try:
+            await self._search_batch(batch)
+        finally:
+            self._running -= 1
+            # everything that queued up behind this search goes out as the next batch
+            self._flush()
+
+    async def _search_batch(self, batch: list[tuple[np.ndarray, int, asyncio.Future]]):
+        matrix = np.ascontiguousarray(np.vstack([vector for vector, _, _ in batch]), dtype="float32")
+        max_k = max(k for _, k, _ in batch)
+
+        try:
+            loop = asyncio.get_running_loop()
+            distances, indices = await loop.run_in_executor(
+                self.executor, self.index.search, matrix, max_k
+            )
+        except Exception as e:
+            self.logger.error(f"Batched FAISS search of {len(batch)} queries failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.searches += 1
+        self.searched_vectors += len(batch)
+        for row, (_, k, future) in enumerate(batch):
+            if not future.done():
+                future.set_result((distances[row : row + 1, :k], indices[row : row + 1, :k]))
+
+    def metrics(self) -> dict:
+        return {
+            "omp_threads": self.threads,
+            "index_searches": self.searches,
+            "searched_vectors": self.searched_vectors,
+            "avg_batch_size": round(self.searched_vectors / self.searches, 2) if self.searches else 0.0,
+        }
+
+    def close(self):
+        # Let already queued searches finish, but do not block the event loop
+        self.executor.shutdown(wait=False)
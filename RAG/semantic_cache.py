@@ -0,0 +1,92 @@
+import time
+import hashlib
+import numpy as np
+from typing import Any, Optional
+from RAG.lexical_index import tokenize
+from config import semantic_cache_size, semantic_cache_threshold, semantic_cache_ttl
+
+
+class SemanticResultCache:
+    """
+    Result cache keyed by query embedding similarity.
+
+    Recent query vectors live in a fixed (max_size, dim) matrix, a brute force
+    inner-product index that one matrix-vector product searches. A new query
+    whose cosine similarity to a cached one reaches `threshold` (under the same
+    signature: top_k, filters, part numbers) gets the cached product list back,
+    skipping the FAISS search and product hydration. Full slots are recycled
+    least recently used first; entries also expire after `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        max_size: int = semantic_cache_size,
+        threshold: float = semantic_cache_threshold,
+        ttl: float = semantic_cache_ttl,
+    ):
+        self.max_size = max_size
+        self.threshold = threshold
+        self.ttl = ttl
+        self.vectors = np.zeros((max_size, dim), dtype=np.float32)
+        self.signatures = np.zeros(max_size, dtype=np.int64)
+        self.expires = np.zeros(max_size, dtype=np.float64)  # 0 == empty slot
+        self.last_used = np.zeros(max_size, dtype=np.float64)
+        self.payloads: list[Any] = [None] * max_size
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def signature(query: str, top_k: int, filters=None) -> int:
+        """
+        Everything besides the embedding that must match for a hit. Part numbers
+        ("esp32" vs "esp8266") embed very close to each other, so the tokens with
+        digits are part of the key and only the wording around them may vary.
+        """
+        part_numbers = sorted({token for token in tokenize(query) if any(c.isdigit() for c in token)})
+        key = repr((top_k, filters, part_numbers)).encode("utf-8")
+        return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little", signed=True)
+
+    def get(self, vector: np.ndarray, signature: int) -> Optional[Any]:
+        """`vector` must be L2 normalized (inner product == cosine)."""
+        if self.max_size == 0:
+            return None
+
+        now = time.monotonic()
+        candidates = np.flatnonzero((self.expires > now) & (self.signatures == signature))
+        if len(candidates):
+            similarities = self.vectors[candidates] @ vector
+            best = int(similarities.argmax())
+            if similarities[best] >= self.threshold:
+                slot = candidates[best]
+                self.last_used[slot] = now
+                self.stats["hits"] += 1
+                return self.payloads[slot]
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, vector: np.ndarray, signature: int, payload: Any):
+        if self.max_size == 0:
+            return
+
+        now = time.monotonic()
+        # Empty / expired slots first, then the least recently used one
+        slot = int(np.argmin(np.where(self.expires > now, self.last_used, -1.0)))
+        if self.expires[slot] > now:
+            self.stats["evictions"] += 1
+
+        self.vectors[slot] = vector
+        self.signatures[slot] = signature
+        self.expires[slot] = now + self.ttl
+        self.last_used[slot] = now
+        self.payloads[slot] = payload
+
+    def metrics(self) -> dict:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "size": int((self.expires > time.monotonic()).sum()),
+            "max_size": self.max_size,
+            "threshold": self.threshold,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+        }
@@ -0,0 +1,210 @@
+"""
+Compact handle -> variant index for cart tools (`Shopify.handle_to_id`).
+
+`products.pkl` holds one `ProductEntry` per handle with a nested dict per
+variant and the full `gid://shopify/ProductVariant/...` string each time.
+The index keeps the same information in a few flat arrays instead:
+
+    handles:        sorted, NUL padded (binary searched in place)
+    single:         uint8 per product (have_single_variant)
+    product_titles: int32 per product, into the interned title table
+    starts:         int64 per product + 1, its variants are starts[i]:starts[i + 1]
+    variant_ids:    int64 per variant (the number at the end of the gid)
+    variant_titles: int32 per variant, into the interned title table
+    title_offsets:  int64 per unique title + 1, into title_blob (utf-8)
+
+Files of an older format are not read; the table is then built from the pickle.
+
+Written as one `products.idx` file next to the pickle and mapped read-only,
+so every worker shares it and a lookup only decodes one product's variants.
+
+    # build products.idx from an existing products.pkl
+    python -m Shopify.handle_index ./bucket/index_storage/products.pkl
+"""
+
+import os
+import sys
+import pickle
+import numpy as np
+from typing import Iterator, Optional
+from collections.abc import Mapping
+from models import ProductEntry
+from utils.packed_store import load_mapping
+
+MAGIC = b"HDLIDX02"
+HEADER = 48  # magic + 5 int64 counts
+VARIANT_GID = "gid://shopify/ProductVariant/"
+
+
+def handle_index_path(pickle_path: str) -> str:
+    return os.path.splitext(pickle_path)[0] + ".idx"
+
+
+def _layout(n: int, width: int, n_variants: int, n_titles: int, title_bytes: int) -> dict:
+    """name -> (byte offset, dtype, count) of every section, each 8 byte aligned."""
+    sections = [
+        ("handles", f"S{width}", n),
+        ("single", "u1", n),
+        ("product_titles", "<i4", n),
+        ("starts", "<i8", n + 1),
+        ("variant_ids", "<i8", n_variants),
+        ("variant_titles", "<i4", n_variants),
+        ("title_offsets", "<i8", n_titles + 1),
+        ("title_blob", "u1", title_bytes),
+    ]
+    layout, offset = {}, HEADER
+    for name, dtype, count in sections:
+        layout[name] = (offset, dtype, count)
+        offset += np.dtype(dtype).itemsize * count
+        offset += -offset % 8
+    return layout
+
+
+class HandleEntry:
+    """One product's variants, decoded from the index on lookup."""
+
+    __slots__ = ("have_single_variant", "titles", "variant_ids", "title")
+
+    def __init__(self, have_single_variant: bool, titles: list[str], variant_ids: np.ndarray, title: str = ""):
+        self.have_single_variant = have_single_variant
+        self.titles = titles
+        self.variant_ids = variant_ids
+        self.title = title  # product title
+
+    def variant_gid(self, title: str) -> Optional[str]:
+        try:
+            return f"{VARIANT_GID}{int(self.variant_ids[self.titles.index(title)])}"
+        except ValueError:
+            return None
+
+    def default_gid(self) -> Optional[str]:
+        """The gid of a single variant product, whatever its title."""
+        return f"{VARIANT_GID}{int(self.variant_ids[0])}" if len(self.variant_ids) else None
+
+
+class HandleIndex(Mapping):
+    """Read-only `Mapping[str, HandleEntry]` over the index arrays (mapped or in memory)."""
+
+    def __init__(self, buffer: np.ndarray):
+        if buffer[:8].tobytes() != MAGIC:
+            raise ValueError("not a handle index")
+        counts = [int(v) for v in buffer[8:HEADER].view("<i8")]
+        layout = _layout(*counts)
+
+        for name, (offset, dtype, count) in layout.items():
+            size = np.dtype(dtype).itemsize * count
+            setattr(self, "_" + name, buffer[offset : offset + size].view(dtype))
+        self._width = counts[1]
+        self._titles: dict[int, str] = {}  # decoded (and interned) titles, shared by lookups
+
+    @classmethod
+    def open(cls, path: str) -> "HandleIndex":
+        return cls(np.memmap(path, dtype=np.uint8, mode="r"))
+
+    @classmethod
+    def from_entries(cls, entries: Mapping) -> "HandleIndex":
+        """Builds the index in memory from a handle -> ProductEntry mapping."""
+        return cls(np.frombuffer(serialize(entries), dtype=np.uint8))
+
+    def _position(self, handle: str) -> int:
+        encoded = handle.encode("utf-8")
+        if len(encoded) > self._width:
+            return -1
+        i = int(np.searchsorted(self._handles, encoded))
+        return i if i < len(self._handles) and self._handles[i] == encoded else -1
+
+    def _title(self, code: int) -> str:
+        title = self._titles.get(code)
+        if title is None:
+            start, end = self._title_offsets[code], self._title_offsets[code + 1]
+            title = sys.intern(self._title_blob[start:end].tobytes().decode("utf-8"))
+            self._titles[code] = title
+        return title
+
+    def __getitem__(self, handle: str) -> HandleEntry:
+        i = self._position(str(handle))
+        if i < 0:
+            raise KeyError(handle)
+        start, end = self._starts[i], self._starts[i + 1]
+        return HandleEntry(
+            bool(self._single[i]),
+            [self._title(int(code)) for code in self._variant_titles[start:end]],
+            self._variant_ids[start:end],
+            self._title(int(self._product_titles[i])),
+        )
+
+    def __contains__(self, handle: object) -> bool:
+        return self._position(str(handle)) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return (handle.decode("utf-8") for handle in self._handles)
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+
+def serialize(entries: Mapping) -> bytes:
+    """Index bytes for a handle -> ProductEntry mapping."""
+    handles = sorted(entries)
+    encoded = [handle.encode("utf-8") for handle in handles]
+    width = max((len(handle) for handle in encoded), default=1)
+
+    titles: dict[str, int] = {}  # interned: every title string is stored once
+    single, product_titles, starts, variant_ids, variant_titles = [], [], [0], [], []
+    for handle in handles:
+        entry: ProductEntry = entries[handle]
+        product_titles.append(titles.setdefault(entry.title, len(titles)))
+        for title, variant in entry.variants.items():
+            variant_ids.append(int(variant["vid"].rsplit("/", 1)[-1]))
+            variant_titles.append(titles.setdefault(title, len(titles)))
+        single.append(entry.have_single_variant)
+        starts.append(len(variant_ids))
+
+    blobs = [title.encode("utf-8") for title in titles]
+    title_offsets = np.zeros(len(blobs) + 1, dtype="<i8")
+    np.cumsum([len(blob) for blob in blobs], out=title_offsets[1:])
+
+    counts = (len(handles), width, len(variant_ids), len(blobs), int(title_offsets[-1]))
+    arrays = {
+        "handles": np.array(encoded, dtype=f"S{width}"),
+        "single": np.array(single, dtype="u1"),
+        "product_titles": np.array(product_titles, dtype="<i4"),
+        "starts": np.array(starts, dtype="<i8"),
+        "variant_ids": np.array(variant_ids, dtype="<i8"),
+        "variant_titles": np.array(variant_titles, dtype="<i4"),
+        "title_offsets": title_offsets,
+        "title_blob": np.frombuffer(b"".join(blobs), dtype="u1"),
+    }
+
+    layout = _layout(*counts)
+    offset, dtype, count = layout["title_blob"]
+    buffer = bytearray(offset + count + (-(offset + count) % 8))
+    buffer[:HEADER] = MAGIC + np.array(counts, dtype="<i8").tobytes()
+    for name, (offset, dtype, count) in layout.items():
+        data = arrays[name].astype(dtype).tobytes() if count else b""
+        buffer[offset : offset + len(data)] = data
+    return bytes(buffer)
+
+
+def write_handle_index(entries: Mapping, path: str):
+    """Writes aside and renames, so mapped readers never see a partial file."""
+    with open(path + ".tmp", "wb") as f:
+        f.write(serialize(entries))
+    os.replace(path + ".tmp", path)
+
+
+def load_handle_index(pickle_path: str) -> HandleIndex:
+    """The mapped `.idx` next to `pickle_path` when published (and current), else built from the table."""
+    if os.path.exists(handle_index_path(pickle_path)):
+        try:
+            return HandleIndex.open(handle_index_path(pickle_path))
+        except ValueError:
+            pass  # written by an older release, rebuilt by the next mapping run
+    return HandleIndex.from_entries(load_mapping(pickle_path))
+
+
+if __name__ == "__main__":
+    for pickle_path in sys.argv[1:]:
+        with open(pickle_path, "rb") as f:
+            write_handle_index(pickle.load(f), handle_index_path(pickle_path))
+        print(f"{pickle_path} -> {handle_index_path(pickle_path)}")
@@ -0,0 +1,103 @@
+import re
+import numpy as np
+from typing import Iterable, Optional
+from config import base_url, fuzzy_match_threshold, fuzzy_match_margin
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_handle(handle: str) -> str:
+    """'https://digilog.pk/products/Arduino_Uno R3/' -> 'arduino-uno-r3'"""
+    handle = handle.strip().lower()
+    if handle.startswith(base_url):
+        handle = handle[len(base_url) :]
+    return _NON_WORD.sub("-", handle.split("?")[0]).strip("-")
+
+
+def normalize_title(title: str) -> str:
+    """'Large / Red' -> 'large red'"""
+    return " ".join(_NON_WORD.sub(" ", title.lower()).split())
+
+
+def trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def dice(a: set[str], b: set[str]) -> float:
+    return 2 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+def pick(scores: np.ndarray, threshold: float, margin: float) -> int:
+    """Index of the best score if it is confident and clearly ahead of the runner up, else -1."""
+    if not len(scores):
+        return -1
+    best = int(np.argmax(scores))
+    runner_up = np.partition(scores, -2)[-2] if len(scores) > 1 else 0.0
+    if scores[best] >= threshold and scores[best] - runner_up >= margin:
+        return best
+    return -1
+
+
+class HandleResolver:
+    """
+    Corrects near miss handles and variant titles coming from the LLM.
+
+    Handles are matched through a trigram inverted index (Dice similarity),
+    variant titles against the few titles of the resolved product. A guess is
+    only accepted when it is at least `threshold` similar and `margin` ahead of
+    the next candidate; ambiguous input still goes back to the model.
+    """
+
+    def __init__(self, handles: Iterable[str], threshold: float = fuzzy_match_threshold, margin: float = fuzzy_match_margin):
+        self.threshold = threshold
+        self.margin = margin
+        self.handles = list(handles)
+        # handles that normalize alike ("led-5mm" / "LED_5mm") are ambiguous: None
+        self.by_normalized: dict[str, Optional[str]] = {}
+        for handle in self.handles:
+            normalized = normalize_handle(handle)
+            self.by_normalized[normalized] = None if normalized in self.by_normalized else handle
+
+        postings: dict[str, list[int]] = {}
+        sizes = []
+        for i, handle in enumerate(self.handles):
+            grams = trigrams(normalize_handle(handle))
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.sizes = np.array(sizes, dtype=np.float32)
+
+    def resolve_handle(self, handle: str) -> Optional[str]:
+        normalized = normalize_handle(handle)
+        if normalized in self.by_normalized:
+            return self.by_normalized[normalized]  # None when several handles normalize alike
+
+        grams = trigrams(normalized)
+        hits = [self.postings[gram] for gram in grams if gram in self.postings]
+        if not hits:
+            return None
+        shared = np.bincount(np.concatenate(hits), minlength=len(self.handles))
+        scores = 2 * shared / (len(grams) + self.sizes)
+        best = pick(scores, self.threshold, self.margin)
+        return self.handles[best] if best >= 0 else None
+
+    def resolve_variant(self, title: str, titles: list[str]) -> Optional[str]:
+        normalized = normalize_title(title)
+        candidates = [normalize_title(candidate) for candidate in titles]
+        exact = [original for candidate, original in zip(candidates, titles) if candidate == normalized]
+        if exact:
+            # "Red/Large" and "red - large" both normalize to "red large": ambiguous
+            return exact[0] if len(exact) == 1 else None
+
+        # same words in another order: "Red Large" -> "Large / Red"
+        words = sorted(normalized.split())
+        same_words = [original for candidate, original in zip(candidates, titles) if sorted(candidate.split()) == words]
+        if len(same_words) == 1:
+            return same_words[0]
+
+        grams = trigrams(normalized)
+        scores = np.array([dice(grams, trigrams(candidate)) for candidate in candidates])
+        best = pick(scores, self.threshold, self.margin)
+        return titles[best] if best >= 0 else None
@@ -0,0 +1,162 @@
+import json
+import time
+import asyncio
+import redis.asyncio as redis
+from typing import Awaitable, Callable, Optional
+from utils.logger import get_logger
+from config import (
+    redis_url,
+    product_cache_key,
+    product_cache_ttl,
+    product_cache_stale_ttl,
+    product_cache_negative_ttl,
+)
+
+# handle -> formatted product, or None when Shopify has no such product
+ProductLoader = Callable[[str], Awaitable[Optional[dict]]]
+
+
+class ProductCache:
+    """
+    Read-through cache of handle -> formatted product, shared by all workers in Redis.
+
+    - fresh for `ttl` seconds, then served stale for up to `stale_ttl` more while
+      one background task (one per handle across workers) refetches it
+    - unknown handles are cached as `None` for `negative_ttl` seconds
+    - `invalidate()` drops entries when a product changes in Shopify
+
+    Failed loads are never cached, and any Redis failure falls through to the loader.
+    """
+
+    def __init__(
+        self,
+        loader: ProductLoader,
+        ttl: int = product_cache_ttl,
+        stale_ttl: int = product_cache_stale_ttl,
+        negative_ttl: int = product_cache_negative_ttl,
+        redis_client: Optional[redis.Redis] = None,
+    ):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.negative_ttl = negative_ttl
+        self.redis_client = redis_client or redis.from_url(redis_url, decode_responses=True)
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self.stats = {
+            "hits": 0,
+            "stale_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "invalidations": 0,
+            "redis_errors": 0,
+        }
+        self.logger = get_logger("Shopify - ProductCache")
+
+    @staticmethod
+    def normalize(handle: str) -> str:
+        return handle.strip().lower()
+
+    @staticmethod
+    def _key(handle: str) -> str:
+        return f"{product_cache_key}:{handle}"
+
+    async def get(self, handle: str) -> Optional[dict]:
+        """Cached product for `handle`, loading it on a miss; None if it does not exist."""
+        handle = self.normalize(handle)
+        try:
+            raw = await self.redis_client.get(self._key(handle))
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            self.logger.warning(f"Product cache Redis lookup failed: {e}")
+            raw = None
+
+        if raw:
+            entry = json.loads(raw)
+            if entry["product"] is None:
+                self.stats["negative_hits"] += 1
+            elif time.time() - entry["at"] < self.ttl:
+                self.stats["hits"] += 1
+            else:
+                self.stats["stale_hits"] += 1
+                self._refresh_in_background(handle)
+            return entry["product"]
+
+        self.stats["misses"] += 1
+        return await self._load(handle)
+
+    async def _load(self, handle: str) -> Optional[dict]:
+        product = await self.loader(handle)  # raises on failure, nothing is cached
+        await self.put(handle, product)
+        return product
+
+    async def put(self, handle: str, product: Optional[dict]):
+        handle = self.normalize(handle)
+        entry = json.dumps({"at": time.time(), "product": product}, ensure_ascii=False, default=str)
+        expire = self.ttl + self.stale_ttl if product is not None else self.negative_ttl
+        try:
+            await self.redis_client.set(self._key(handle), entry, ex=expire)
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            self.logger.warning(f"Product cache Redis write failed: {e}")
+
+    def _refresh_in_background(self, handle: str):
+        if handle in self._refreshing:
+            return
+        task = asyncio.create_task(self._refresh(handle))
+        self._refreshing[handle] = task
+        task.add_done_callback(lambda _: self._refreshing.pop(handle, None))
+
+    async def _refresh(self, handle: str):
+        # one refresh per handle across workers; the expiry only covers a worker dying mid refresh
+        lock = f"{product_cache_key}-refresh:{handle}"
+        try:
+            if not await self.redis_client.set(lock, 1, nx=True, ex=30):
+                return
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            self.logger.warning(f"Product cache refresh lock for '{handle}' failed: {e}")
+            return
+
+        try:
+            await self._load(handle)
+            self.stats["refreshes"] += 1
+        except Exception as e:
+            self.logger.warning(f"Product cache refresh of '{handle}' failed: {e}")
+        finally:
+            # released right away, so the next stale hit after a failed load can retry
+            try:
+                await self.redis_client.delete(lock)
+            except Exception as e:
+                self.stats["redis_errors"] += 1
+                self.logger.warning(f"Product cache refresh lock for '{handle}' not released: {e}")
+
+    async def invalidate(self, handles: Optional[list[str]] = None) -> Optional[int]:
+        """
+        Drops the given handles, or every cached product when `handles` is None.
+        Returns how many entries were removed, or None when Redis failed.
+        """
+        try:
+            if handles is None:
+                keys = [key async for key in self.redis_client.scan_iter(match=f"{product_cache_key}:*")]
+            else:
+                keys = [self._key(self.normalize(handle)) for handle in handles]
+            removed = await self.redis_client.delete(*keys) if keys else 0
+        except Exception as e:
+            self.stats["redis_errors"] += 1
+            self.logger.error(f"Product cache invalidation failed: {e}")
+            return None
+        self.stats["invalidations"] += removed
+        return removed
+
+    def metrics(self) -> dict:
+        lookups = sum(self.stats[name] for name in ("hits", "stale_hits", "negative_hits", "misses"))
+        return {
+            **self.stats,
+            "hit_rate": round((lookups - self.stats["misses"]) / lookups, 3) if lookups else 0.0,
+        }
+
+    async def aclose(self):
+        if self._refreshing:
+            await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+        await self.redis_client.aclose()
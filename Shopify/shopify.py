@@ -1,13 +1,37 @@
+import os
 import re
+import json
+import time
 import aiohttp
 import asyncio
-from typing import List, Dict
+from contextlib import aclosing
+from typing import List, Dict, Mapping, Optional, AsyncIterator
 from utils.logger import get_logger
-from config import no_image_url, llm_model, product_dict_file_location
-from models import ProductEntry
+from config import (
+    no_image_url,
+    llm_model,
+    product_dict_file_location,
+    shopify_timeout,
+    shopify_pool_limit,
+    shopify_pool_limit_per_host,
+    shopify_keepalive_timeout,
+    shopify_dns_cache_ttl,
+    shopify_throttle_retries,
+    shopify_fetch_retries,
+    shopify_retry_backoff,
+    shopify_single_flight,
+    shopify_bulk_poll_interval,
+    shopify_bulk_timeout,
+    catalog_store_mode,
+    fuzzy_resolution,
+)
+from .throttle import CostThrottle
+from .single_flight import SingleFlight
+from utils.packed_store import packed_path
+from .handle_index import HandleEntry, HandleIndex, handle_index_path, load_handle_index
+from .handle_resolver import HandleResolver
 import asyncio
 import pickle
-from concurrent.futures import ThreadPoolExecutor
 
 
 class Shopify:
@@ -21,25 +45,134 @@ class Shopify:
             "Content-Type": "application/json",
             "X-Shopify-Access-Token": self.__ACCESS_TOKEN,
         }
-        self.__id_table = {"state": "not_build"}
+        # handle -> variants; empty until init_handle_id_table() loads it
+        self.__id_table: Mapping[str, HandleEntry] = {}
+        self._id_table_version: Optional[tuple] = None
+        self._id_table_lock = asyncio.Lock()
+        self._resolver: Optional[HandleResolver] = None
         self.logger = get_logger(logger_name)
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.throttle = CostThrottle()  # Admin API calculated query cost bucket
+        self.in_flight = SingleFlight()  # identical concurrent read queries share one request
 
-    async def init_handle_id_table(self) -> bool:
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Long lived keep-alive session shared by every Admin / Storefront call,
+        built on first use inside the running event loop. Owners call `aclose()`.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=shopify_pool_limit,
+                limit_per_host=shopify_pool_limit_per_host,
+                keepalive_timeout=shopify_keepalive_timeout,
+                ttl_dns_cache=shopify_dns_cache_ttl,
+                use_dns_cache=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=shopify_timeout),
+            )
+        return self._session
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def post_graphql(
+        self, url: str, headers: dict, query: str, variables: dict, throttle: Optional[CostThrottle] = None
+    ) -> dict:
+        """
+        Identical read queries already in flight are joined instead of sent again:
+        N concurrent callers cost one request and one rate limit slot.
+        Mutations always go out on their own.
+        """
+        if not shopify_single_flight or query.lstrip().startswith("mutation"):
+            return await self._post_graphql(url, headers, query, variables, throttle)
+        key = (url, query, json.dumps(variables, sort_keys=True, default=str))
+        return await self.in_flight.do(
+            key, lambda: self._post_graphql(url, headers, query, variables, throttle)
+        )
+
+    async def _post_graphql(
+        self, url: str, headers: dict, query: str, variables: dict, throttle: Optional[CostThrottle] = None
+    ) -> dict:
+        """
+        POSTs a GraphQL document and retries THROTTLED responses at most
+        `shopify_throttle_retries` times. With a `throttle` (Admin API) every
+        attempt first waits for its requested cost; the Storefront API reports
+        no cost, so it backs off exponentially instead.
+        """
+        for attempt in range(shopify_throttle_retries + 1):
+            if throttle is not None:
+                await throttle.acquire(throttle.requested_cost(query))
+            async with self.session.post(
+                url,
+                headers=headers,
+                json={"query": query, "variables": variables},
+            ) as resp:
+                resp.raise_for_status()
+                result = await resp.json()
+
+            if throttle is not None:
+                throttle.update(query, (result.get("extensions") or {}).get("cost"))
+            if not CostThrottle.is_throttled(result) or attempt == shopify_throttle_retries:
+                return result
+
+            self.logger.warning(f"Throttled by Shopify, retry {attempt + 1}/{shopify_throttle_retries}")
+            if throttle is not None:
+                throttle.record_throttled()  # acquire() now waits for the refill the server reported
+            else:
+                await asyncio.sleep(shopify_retry_backoff * 2**attempt)
+        return result
+
+    async def init_handle_id_table(self, force: bool = False) -> bool:
+        """
+        Loads the handle -> variant table once; later calls only stat the artifact
+        and reload it when the ETL published a new one (mtime / size changed).
+        """
         try:
-            self.__id_table = await self.load_handle_id_table()
+            loaded = self._id_table_version
+            if not force and loaded is not None and self.handle_table_version() == loaded:
+                return True
+            async with self._id_table_lock:  # one reload, concurrent cart calls wait for it
+                version = self.handle_table_version()
+                if force or version is None or version != self._id_table_version:
+                    table, resolver = await self.load_handle_id_table()
+                    # swapped without an await in between: readers see old or new, never a mix
+                    self.__id_table, self._resolver, self._id_table_version = table, resolver, version
+                    self.logger.info(f"Handle table loaded ({len(table)} products)")
             return True
-        except Exception:
+        except Exception as e:
+            self.logger.warning(f"Handle table not loaded: {e}")
             return False
 
-    async def load_handle_id_table(self) -> dict[str, str]:
+    @staticmethod
+    def handle_table_version() -> Optional[tuple]:
+        """(path, mtime, size) of the file `load_handle_index` reads, None if there is none."""
+        candidates = (
+            handle_index_path(product_dict_file_location),
+            packed_path(product_dict_file_location),
+            product_dict_file_location,
+        )
+        for path in candidates:
+            if path.endswith(".pack") and catalog_store_mode != "packed":
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return path, stat.st_mtime_ns, stat.st_size
+        return None
+
+    async def load_handle_id_table(self) -> tuple[HandleIndex, Optional[HandleResolver]]:
         def load_data():
-            with open(product_dict_file_location, "rb") as f:
-                products = pickle.load(f)
-                return products
+            # products.idx (mmap'd, shared by workers) when published, else built from products.pkl
+            table = load_handle_index(product_dict_file_location)
+            return table, HandleResolver(table) if fuzzy_resolution else None
 
-        loop = asyncio.get_running_loop()
-        with ThreadPoolExecutor() as pool:
-            return await loop.run_in_executor(pool, load_data)
+        return await asyncio.to_thread(load_data)
 
     async def send_storefront_mutation(
         self, mutation: str, variables: dict, receiver: str = "child"
@@ -50,21 +183,11 @@ class Shopify:
             "X-Shopify-Storefront-Access-Token": self.__STOREFRONT_ACCESS_TOKEN,
         }
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    URL,
-                    headers=HEADER,
-                    json={"query": mutation, "variables": variables},
-                ) as resp:
-                    resp.raise_for_status()
-                    result = await resp.json()
-
-            # 3. Top-level GraphQL errors
+            result = await self.post_graphql(URL, HEADER, mutation, variables)
+
+            # 3. Top-level GraphQL errors (THROTTLED already retried)
             if "errors" in result:
-                await asyncio.sleep(25)
-                return await self.send_storefront_mutation(
-                    mutation, variables, receiver
-                )
+                raise RuntimeError(f"GraphQL errors: {result['errors']}")
 
             data = result.get("data")
             if not data:
@@ -107,14 +230,55 @@ class Shopify:
             return {}
 
     def handle_to_id(self, handle: str, variant_title: str):
-        obj: ProductEntry = self.__id_table.get(handle, {})  # type: ignore
-        if obj.have_single_variant:
-            return obj.variants["Default Title"]["vid"], ""
-        try:
-            vid = obj.variants[variant_title]["vid"]
-            return vid, ""
-        except KeyError:
-            return None, obj.variants.keys()  # variants titles
+        """
+        Variant gid for a cart line, as (gid, "", resolution) or (None, options, None)
+        where options are the product's variant titles ([] for an unknown or
+        ambiguous handle).
+
+        `resolution` is None when handle and variant matched as given; when they
+        were corrected it is {"handle", "variant", "product_title"} of what was
+        actually picked, so the reply can tell the customer.
+        """
+        resolved_handle = handle
+        entry = self.__id_table.get(handle)
+        if entry is None and self._resolver is not None:
+            # near miss from the LLM: corrected here instead of another tool round trip
+            resolved = self._resolver.resolve_handle(handle)
+            if resolved is not None:
+                self.logger.info(f"Handle '{handle}' resolved to '{resolved}'")
+                resolved_handle, entry = resolved, self.__id_table.get(resolved)
+        if entry is None:
+            return None, [], None  # unknown or ambiguous handle, no variants to offer
+
+        if entry.have_single_variant:
+            vid, title = entry.default_gid(), entry.titles[0] if entry.titles else variant_title
+            variant_corrected = False  # whatever the model named, there is only one
+        else:
+            vid, title = entry.variant_gid(variant_title), variant_title
+            if vid is None and self._resolver is not None:
+                resolved = self._resolver.resolve_variant(variant_title, entry.titles)
+                if resolved is not None:
+                    self.logger.info(f"Variant '{variant_title}' of '{resolved_handle}' resolved to '{resolved}'")
+                    vid, title = entry.variant_gid(resolved), resolved
+            variant_corrected = title != variant_title
+        if not vid:
+            return None, entry.titles, None  # variants titles
+
+        if resolved_handle == handle and not variant_corrected:
+            return vid, "", None
+        return vid, "", {"handle": resolved_handle, "variant": title, "product_title": entry.title}
+
+    @staticmethod
+    def resolution_note(handle: str, variant: str, resolution: dict) -> dict:
+        """One "resolved_from" entry of a cart tool reply."""
+        return {"requested": {"handle": handle, "variant": variant}, "resolved": resolution}
+
+    @staticmethod
+    def with_resolutions(reply: dict, resolved_from: list[dict]) -> dict:
+        """Tells the model which lines were corrected, so it can confirm them with the customer."""
+        if resolved_from and isinstance(reply, dict):
+            reply["resolved_from"] = resolved_from
+        return reply
 
     async def create_cart(
         self, items: list[dict[str, str | int]], session_id: str = "default"
@@ -191,13 +355,16 @@ class Shopify:
         lines = []
         variant_error = False
         errors = []
+        resolved_from = []  # lines whose handle / variant was corrected
 
         for obj in items:
             handle = str(obj["handle"])
             variant = str(obj["variant"])
 
-            merchandise_id, message = self.handle_to_id(handle, variant)
+            merchandise_id, message, resolution = self.handle_to_id(handle, variant)
             qty = int(obj["quantity"])
+            if resolution:
+                resolved_from.append(self.resolution_note(handle, variant, resolution))
             if merchandise_id:
                 lines.append({"quantity": qty, "merchandiseId": merchandise_id})
             else:
@@ -241,7 +408,7 @@ class Shopify:
         result = await self.send_storefront_mutation(mutation, variables)
         cart = result.get("data", {}).get("cartCreate", {}).get("cart", {})
         # print(variables,"\n\n")
-        return self.format_cart(cart, pretify_line_items=True)
+        return self.with_resolutions(self.format_cart(cart, pretify_line_items=True), resolved_from)
 
     async def query_cart(self, id: str, dict_format=False) -> dict:
         query = """
@@ -396,13 +563,16 @@ class Shopify:
         lines = []
         variant_error = False
         errors = []
+        resolved_from = []  # lines whose handle / variant was corrected
 
         for obj in lineItems:
             handle = str(obj["handle"])
             variant = str(obj["variant"])
             qty = int(obj["quantity"])
 
-            merchandise_id, message = self.handle_to_id(handle, variant)
+            merchandise_id, message, resolution = self.handle_to_id(handle, variant)
+            if resolution:
+                resolved_from.append(self.resolution_note(handle, variant, resolution))
 
             if merchandise_id:
                 lines.append({"quantity": qty, "merchandiseId": merchandise_id})
@@ -425,7 +595,7 @@ class Shopify:
         cart = result.get("data", {}).get("cartLinesAdd", {}).get("cart", {})
         print("CART \n", result, "\n\n")
         if cart:
-            return self.format_cart(cart, pretify_line_items=True)
+            return self.with_resolutions(self.format_cart(cart, pretify_line_items=True), resolved_from)
         return result
 
     async def removeCartLineItems(self, cartId: str, lineItems: List[dict[str, str]]):
@@ -508,12 +678,15 @@ class Shopify:
         lines = []
         variant_error = False
         errors = []
+        resolved_from = []  # lines whose handle / variant was corrected
 
         for obj in lineItems:
             handle = obj["handle"]
             variant = obj["variant"]
 
-            merchandise_id, message = self.handle_to_id(handle, variant)
+            merchandise_id, message, resolution = self.handle_to_id(handle, variant)
+            if resolution:
+                resolved_from.append(self.resolution_note(handle, variant, resolution))
             # print("$$$$$ mid",merchandise_id,"\n\n\n\n")
             cart_line_id = cart_lines.get(merchandise_id, None)
             # print("$$$$$ cli",cart_line_id,"\n\n\n\n")
@@ -538,7 +711,7 @@ class Shopify:
 
         cart = result.get("data", {}).get("cartLinesRemove", {}).get("cart", {})
         # print(cart,"\n\n")
-        return self.format_cart(cart, pretify_line_items=True)
+        return self.with_resolutions(self.format_cart(cart, pretify_line_items=True), resolved_from)
 
     async def updateCartLineItems(
         self, cartId: str, lineItems: List[dict[str, str | int]]
@@ -620,12 +793,15 @@ class Shopify:
         lines = []
         variant_error = False
         errors = []
+        resolved_from = []  # lines whose handle / variant was corrected
 
         for obj in lineItems:
             handle = str(obj["handle"])
             variant = str(obj["variant"])
 
-            merchandise_id, message = self.handle_to_id(handle, variant)
+            merchandise_id, message, resolution = self.handle_to_id(handle, variant)
+            if resolution:
+                resolved_from.append(self.resolution_note(handle, variant, resolution))
             cart_line_id = cart_lines.get(merchandise_id, None)
             if cart_line_id:
                 lines.append(
@@ -653,64 +829,148 @@ class Shopify:
 
         cart = result.get("data", {}).get("cartLinesUpdate", {}).get("cart", {})
         # print(cart,"\n\n")
-        return self.format_cart(cart, pretify_line_items=True)
+        return self.with_resolutions(self.format_cart(cart, pretify_line_items=True), resolved_from)
 
     async def fetch_mapping_products(self):
-        all_products: list = []
-        query = self.mapping_products_query()
-        query_params = {"after": None}
-
-        hasNextPage = True
-        while hasNextPage:
-            try:
-                result = await self.send_graphql_mutation(
-                    query, query_params, "GetProductsAndVariants"
-                )
-                result = result["data"]["products"]
-            except Exception as e:  # noqa: F841
-                await asyncio.sleep(25)
-                continue
-            # Pagination Control
-            pageInfo = result["pageInfo"]
-            hasNextPage = pageInfo["hasNextPage"]
-            # hasNextPage = False
-            query_params["after"] = pageInfo["endCursor"]
-            # Product Handling Logic
-            products: list = result["nodes"]
-            # for product in products:
-            #   product["admin_graphql_api_id"] = product["id"]
-            #   product["id"] = self.extract_id_from_gid(product["id"])
-            all_products.extend(products)
-        return all_products
+        pages = self.iter_products(self.mapping_products_query(), convert_ids=False)
+        return [product async for page in pages for product in page]
 
     async def fetch_all_products(self, test_mode=False):
         all_products: list = []
-        query = self.all_products_query()
-        query_params = {"after": None}
+        async with aclosing(self.iter_products()) as pages:
+            async for products in pages:
+                all_products.extend(products)
+                if test_mode:
+                    break
+        return all_products
+
+    async def iter_products(
+        self, query: Optional[str] = None, convert_ids: bool = True
+    ) -> AsyncIterator[list]:
+        """
+        Yields the catalog page by page (`all_products_query` by default) as pages
+        arrive. The next page is already requested while the caller works on the
+        current one, so callers that await between products overlap with the network.
 
-        hasNextPage = True
-        while hasNextPage:
+        convert_ids: keep the gid in `admin_graphql_api_id` and a numeric `id`,
+        as `fetch_all_products` always did.
+        """
+        query = query or self.all_products_query()
+        next_page = asyncio.create_task(self._fetch_products_page(query, None))
+        try:
+            while next_page is not None:
+                products, pageInfo = await next_page
+                # Pagination Control
+                next_page = None
+                if pageInfo["hasNextPage"]:
+                    next_page = asyncio.create_task(
+                        self._fetch_products_page(query, pageInfo["endCursor"])
+                    )
+                # Product Handling Logic
+                if convert_ids:
+                    for product in products:
+                        product["admin_graphql_api_id"] = product["id"]
+                        product["id"] = self.extract_id_from_gid(product["id"])
+                yield products
+        finally:
+            if next_page is not None:
+                next_page.cancel()  # caller stopped early
+
+    async def _fetch_products_page(self, query: str, after: Optional[str]) -> tuple[list, dict]:
+        failures = 0
+        while True:
             try:
                 result = await self.send_graphql_mutation(
-                    query, query_params, "GetProductsAndVariants"
+                    query, {"after": after}, "GetProductsAndVariants"
                 )
                 result = result["data"]["products"]
-            except Exception as e:  # noqa: F841
-                await asyncio.sleep(25)
-                continue
-            # Pagintion Control
-            pageInfo = result["pageInfo"]
-            hasNextPage = pageInfo["hasNextPage"]
-            if test_mode:
-                hasNextPage = False
-            query_params["after"] = pageInfo["endCursor"]
-            # Product Handling Logic
-            products: list = result["nodes"]
-            for product in products:
-                product["admin_graphql_api_id"] = product["id"]
-                product["id"] = self.extract_id_from_gid(product["id"])
-            all_products.extend(products)
-        return all_products
+                return result["nodes"], result["pageInfo"]
+            except Exception as e:
+                # the throttle already waited out rate limits; this is a failed page
+                failures += 1
+                if failures > shopify_fetch_retries:
+                    raise RuntimeError(
+                        f"Products page after cursor {after} failed {failures} times"
+                    ) from e
+                await asyncio.sleep(shopify_retry_backoff * 2 ** (failures - 1))
+
+    async def run_bulk_query(self, query: str) -> Optional[str]:
+        """
+        Starts a `bulkOperationRunQuery` and polls it until it finishes.
+        Returns the URL of the JSONL result (None when the query matched nothing).
+        """
+        result = await self.send_graphql_mutation(
+            self.bulk_operation_run_mutation(), {"query": query}, "bulkOperationRunQuery"
+        )
+        started = (result.get("data") or {}).get("bulkOperationRunQuery") or {}
+        if started.get("userErrors") or not started.get("bulkOperation"):
+            raise RuntimeError(f"Bulk operation not started: {started.get('userErrors') or result}")
+
+        operation_id = started["bulkOperation"]["id"]
+        deadline = time.monotonic() + shopify_bulk_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(shopify_bulk_poll_interval)
+            result = await self.send_graphql_mutation(
+                self.bulk_operation_query(), {"id": operation_id}, "node"
+            )
+            operation = (result.get("data") or {}).get("node") or {}  # {} -> failed poll, try again
+            status = operation.get("status")
+            if status == "COMPLETED":
+                self.logger.info(f"Bulk operation {operation_id} exported {operation.get('objectCount')} objects")
+                return operation.get("url")
+            if status in ("FAILED", "CANCELED", "EXPIRED"):
+                raise RuntimeError(f"Bulk operation {operation_id} {status}: {operation.get('errorCode')}")
+        raise TimeoutError(f"Bulk operation {operation_id} still running after {shopify_bulk_timeout}s")
+
+    async def stream_jsonl(self, url: str) -> AsyncIterator[dict]:
+        """Downloads a JSONL file chunk by chunk, yielding one parsed line at a time."""
+        # whole catalog download: no total deadline, only a stalled read fails it
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=shopify_timeout)
+        async with self.session.get(url, timeout=timeout) as resp:
+            resp.raise_for_status()
+            pending = b""
+            async for chunk in resp.content.iter_chunked(1 << 16):
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()  # partial last line, completed by the next chunk
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+            if pending.strip():
+                yield json.loads(pending)
+
+    async def iter_bulk_products(self) -> AsyncIterator[dict]:
+        """
+        Catalog export through a bulk operation, yielding products one by one in
+        the shape `fetch_all_products` returns, while the JSONL is still downloading.
+
+        Nested connections come back as separate lines pointing at their product
+        with `__parentId`, right after it, so only the current product is held.
+        """
+        url = await self.run_bulk_query(self.bulk_products_query())
+        if url is None:
+            return
+
+        product = None
+        async for node in self.stream_jsonl(url):
+            parent_id = node.pop("__parentId", None)
+            if parent_id is None:
+                if product is not None:
+                    yield self._finish_bulk_product(product)
+                product = {**node, "media": {"edges": []}, "variants": {"edges": []}}
+            elif product is not None and parent_id == product["id"]:
+                if str(node.get("id", "")).startswith("gid://shopify/ProductVariant/"):
+                    product["variants"]["edges"].append({"node": node})
+                elif node.get("image") and not product["media"]["edges"]:
+                    product["media"]["edges"].append({"node": node})  # first image, like media(first: 1)
+            else:
+                self.logger.warning(f"Bulk export line for {parent_id} outside its product, skipped")
+        if product is not None:
+            yield self._finish_bulk_product(product)
+
+    def _finish_bulk_product(self, product: dict) -> dict:
+        product["admin_graphql_api_id"] = product["id"]
+        product["id"] = self.extract_id_from_gid(product["id"])
+        return product
 
     async def fetch_product_by_id(self, product_id: int):
         product_gid = f"gid://shopify/Product/{product_id}"
@@ -879,7 +1139,9 @@ class Shopify:
         query_params = {"identifier": {"handle": f"{product_handle}"}}
         result = await self.send_graphql_mutation(query, query_params, "product")
         # print(f"get_product_by_handle :: {result}")
-        product = result.get("data", {}).get("product", {})
+        if "data" not in result:
+            return {}  # request failed, the product may well exist
+        product = result["data"].get("product", {})
         if product:
             id = product.get("id", None)
 
@@ -900,19 +1162,13 @@ class Shopify:
         self, mutation: str, variables: dict, receiver: str = "child"
     ):
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    self.URL,
-                    headers=self.__HEADER,
-                    json={"query": mutation, "variables": variables},
-                ) as resp:
-                    resp.raise_for_status()
-                    result = await resp.json()
-
-            # 3. Top-level GraphQL errors
+            result = await self.post_graphql(
+                self.URL, self.__HEADER, mutation, variables, self.throttle
+            )
+
+            # 3. Top-level GraphQL errors (THROTTLED already retried)
             if "errors" in result:
-                await asyncio.sleep(25)
-                return await self.send_graphql_mutation(mutation, variables, receiver)
+                raise RuntimeError(f"GraphQL errors: {result['errors']}")
 
             data = result.get("data")
             if not data:
@@ -1386,6 +1642,136 @@ class Shopify:
       }
       """
 
+    @staticmethod
+    def bulk_operation_run_mutation():
+        return """
+    mutation RunBulkQuery($query: String!) {
+      bulkOperationRunQuery(query: $query) {
+        bulkOperation {
+          id
+          status
+        }
+        userErrors {
+          field
+          message
+        }
+      }
+    }
+    """
+
+    @staticmethod
+    def bulk_operation_query():
+        return """
+    query BulkOperationStatus($id: ID!) {
+      node(id: $id) {
+        ... on BulkOperation {
+          id
+          status
+          errorCode
+          objectCount
+          url
+        }
+      }
+    }
+    """
+
+    @staticmethod
+    def bulk_products_query():
+        # all_products_query without paging: bulk operations walk every connection
+        return """
+      {
+        products {
+          edges {
+            node {
+              id
+              options {
+                name
+                values
+              }
+              title
+              handle
+              vendor
+              status
+              productType
+              description
+              category {
+                fullName
+              }
+              priceRangeV2 {
+                minVariantPrice {
+                  amount
+                  currencyCode
+                }
+                maxVariantPrice {
+                  amount
+                  currencyCode
+                }
+              }
+              totalInventory
+              media {
+                edges {
+                  node {
+                    ... on MediaImage {
+                      id
+                      image {
+                        id
+                        altText
+                        url
+                        width
+                        height
+                      }
+                    }
+                  }
+                }
+              }
+              variants {
+                edges {
+                  node {
+                    id
+                    title
+                    sku
+                    taxable
+                    price
+                    compareAtPrice
+                    inventoryQuantity
+                    availableForSale
+                    barcode
+                    createdAt
+                    updatedAt
+                    inventoryPolicy
+                    inventoryItem {
+                      id
+                      tracked
+                      measurement {
+                        weight {
+                          value
+                          unit
+                        }
+                      }
+                      unitCost {
+                        amount
+                        currencyCode
+                      }
+                      countryCodeOfOrigin
+                      harmonizedSystemCode
+                      requiresShipping
+                    }
+                    image {
+                      id
+                      altText
+                      url
+                      width
+                      height
+                    }
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+      """
+
     @staticmethod
     def mapping_products_query():
         return """
@@ -0,0 +1,46 @@
+import copy
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one: the first caller for a key
+    starts the call as a task, callers arriving while it runs await that same
+    task. The key is forgotten as soon as the call finishes, so nothing is cached.
+
+    The call runs detached from its first caller, so one caller being cancelled
+    (client disconnect) does not fail the others. Shared results are deep copied
+    per caller, because callers post-process responses in place.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, tuple[asyncio.Task, list[int]]] = {}
+        self.stats = {"calls": 0, "shared": 0}
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[Any]]) -> Any:
+        if key in self._calls:
+            task, waiters = self._calls[key]
+            self.stats["shared"] += 1
+        else:
+            task, waiters = asyncio.create_task(call()), [0]
+            self._calls[key] = (task, waiters)
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.stats["calls"] += 1
+        waiters[0] += 1
+
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result) if waiters[0] > 1 else result
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        self._calls.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved here, so a call nobody awaits anymore is not logged
+
+    def metrics(self) -> dict:
+        total = self.stats["calls"] + self.stats["shared"]
+        return {
+            **self.stats,
+            "in_flight": len(self._calls),
+            "shared_rate": round(self.stats["shared"] / total, 3) if total else 0.0,
+        }
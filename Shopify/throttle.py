@@ -0,0 +1,120 @@
+import re
+import time
+import asyncio
+from typing import Optional
+from config import (
+    shopify_bucket_size,
+    shopify_restore_rate,
+    shopify_mutation_cost,
+)
+
+# field(args) {  |  ... on Type {  |  }   — enough structure to walk selection sets
+_SELECTION = re.compile(r"(\.\.\.\s*on\s+)?(\w+)\s*(\([^)]*\))?\s*\{|\}")
+_PAGE_SIZE = re.compile(r"\b(?:first|last)\s*:\s*(\d+)")
+
+
+def estimate_query_cost(query: str) -> int:
+    """
+    Requested cost of an Admin GraphQL document, following Shopify's static
+    calculation: every object costs 1, a connection costs 2 plus `first`/`last`
+    times the cost of its selection, scalars are free and mutations cost 10.
+    """
+    body = query.strip()
+    if body.startswith("mutation"):
+        return shopify_mutation_cost
+
+    # stack of [multiplier, accumulated cost, is_connection]
+    stack: list[list] = [[1, 0, False]]
+    for match in _SELECTION.finditer(body[body.find("{") + 1 :]):
+        if match.group(0) == "}":
+            if len(stack) == 1:
+                break
+            multiplier, cost, connection = stack.pop()
+            stack[-1][1] += (2 + multiplier * cost) if connection else (1 + cost)
+            continue
+        page = _PAGE_SIZE.search(match.group(3) or "")
+        if page:
+            stack.append([int(page.group(1)), 0, True])
+        elif match.group(1) or match.group(2) == "edges":
+            stack.append([1, -1, False])  # fragments / edges add no object of their own
+        else:
+            stack.append([1, 0, False])
+    return max(1, stack[0][1])
+
+
+class CostThrottle:
+    """
+    Client side leaky bucket mirroring the Admin API's calculated query cost limit.
+
+    Each request waits until the bucket holds its requested cost, then debits it.
+    Every response's `extensions.cost.throttleStatus` resets the bucket to the
+    server's numbers, so other workers sharing the store's bucket are accounted
+    for as soon as one of our requests comes back.
+    """
+
+    def __init__(self, bucket_size: float = shopify_bucket_size, restore_rate: float = shopify_restore_rate):
+        self.maximum = float(bucket_size)
+        self.available = float(bucket_size)
+        self.restore_rate = float(restore_rate)
+        self.updated_at = time.monotonic()
+        self.query_costs: dict[int, int] = {}  # hash(query) -> last requestedQueryCost
+        self.waited = 0.0
+        self.throttled = 0
+        self._lock = asyncio.Lock()
+
+    def requested_cost(self, query: str) -> int:
+        key = hash(query)
+        if key not in self.query_costs:
+            self.query_costs[key] = estimate_query_cost(query)
+        return self.query_costs[key]
+
+    def _refill(self):
+        now = time.monotonic()
+        self.available = min(self.maximum, self.available + (now - self.updated_at) * self.restore_rate)
+        self.updated_at = now
+
+    async def acquire(self, cost: int):
+        """Waits exactly until `cost` points are available, then debits them."""
+        async with self._lock:  # FIFO: a large query is not starved by small ones
+            cost = min(cost, self.maximum)
+            self._refill()
+            if self.available < cost:
+                delay = (cost - self.available) / self.restore_rate
+                self.waited += delay
+                await asyncio.sleep(delay)
+                self._refill()
+            self.available -= cost
+
+    def update(self, query: str, cost: Optional[dict]):
+        """Syncs with `extensions.cost` of a response (absent on non Admin calls)."""
+        if not cost:
+            return
+        if cost.get("requestedQueryCost") is not None:
+            self.query_costs[hash(query)] = int(cost["requestedQueryCost"])
+        status = cost.get("throttleStatus") or {}
+        if status:
+            self.maximum = float(status.get("maximumAvailable", self.maximum))
+            self.restore_rate = float(status.get("restoreRate", self.restore_rate)) or self.restore_rate
+            self.available = float(status.get("currentlyAvailable", self.available))
+            self.updated_at = time.monotonic()
+
+    def record_throttled(self):
+        """Counts a THROTTLED response; `update()` already synced the bucket, so no extra wait."""
+        self.throttled += 1
+
+    @staticmethod
+    def is_throttled(result: dict) -> bool:
+        return any(
+            (error.get("extensions") or {}).get("code") == "THROTTLED"
+            for error in result.get("errors") or []
+            if isinstance(error, dict)
+        )
+
+    def metrics(self) -> dict:
+        return {
+            "available": round(self.available, 1),
+            "maximum": self.maximum,
+            "restore_rate": self.restore_rate,
+            "throttled": self.throttled,
+            "waited_seconds": round(self.waited, 2),
+        }
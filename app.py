@@ -14,6 +14,7 @@ from openai import OpenAI  # try to remove this after Setting App performance
 from utils.logger import get_logger
 from utils.PromptManager import PromptManager
 from utils.session_manager import SessionManager
+from utils.client_registry import clients
 from config import (
     settings,
     prompts_path,
@@ -21,6 +22,8 @@ from config import (
     product_prompt,
     redis_url,
     templates_path,
+    persistent_path,
+    vector_index_watch,
     ALLOWED_ORIGIN_REGEX,
 )
 
@@ -36,6 +39,8 @@ from MCP import Controller
 from routes.prompt import router as prompt_router
 from routes.chat import router as chat_router
 from routes.auth import router as auth_router
+from routes.vector_index import router as vector_index_router
+from routes.product_cache import router as product_cache_router
 from routes.auth import engine, init_models
 from knowledge_base.faqs import router as knowledge_base_router
 
@@ -64,7 +69,13 @@ async def lifespan(app: FastAPI):
     app.state.redis_client = redis.from_url(redis_url, decode_responses=True)
     app.state.session_manager = SessionManager(app.state.redis_client, session_ttl=3600)
     await init_models(engine)  # Setup Auth Table
+    app.state.clients = await clients.start()  # Pooled API clients shared by all requests
     app.state.mcp_controller = Controller()
+    await app.state.mcp_controller.store.init_handle_id_table()  # cart tools only re-check its mtime
+    if vector_index_watch:  # hot swap the index when the ETL publishes a new one
+        asyncio.create_task(
+            handle_realtime_changes(persistent_path, app.state.mcp_controller.reload_vector_store)
+        )
     app.state.client = OpenAI(
         api_key=settings.openai_api_key,
     )
@@ -77,6 +88,8 @@ async def lifespan(app: FastAPI):
     logger.info("Background task for persisting sessions started.")
     yield
     # Clean up and release the resources
+    await app.state.mcp_controller.aclose()
+    await app.state.clients.aclose()
     if background_task:
         background_task.cancel()
         try:
@@ -131,6 +144,8 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 app.include_router(chat_router)
 app.include_router(prompt_router)
 app.include_router(auth_router)
+app.include_router(vector_index_router)
+app.include_router(product_cache_router)
 app.include_router(knowledge_base_router)
 
 
@@ -90,6 +90,105 @@ embedding_dimentions: int = 1536  # depending on the model used
 
 vector_db_collection_name: str = "openai_embeddings"
 
+# Embedding Backend ( openai | onnx | stub ), queries and the FAISS index must use the same one
+embedding_backend: str = "openai"
+onnx_model_path: str = "./bucket/models/all-MiniLM-L6-v2/model.onnx"  # sentence-transformers ONNX export
+onnx_tokenizer_path: str = "./bucket/models/all-MiniLM-L6-v2/tokenizer.json"
+onnx_max_length: int = 256  # tokens per text, chunks are ~360 characters
+onnx_batch_size: int = 32  # texts per session run
+onnx_intra_op_threads: int = 0  # 0 = onnxruntime default
+onnx_workers: int = 1  # inference threads, each run already uses intra-op threads
+
+# OpenAI Connection Pool
+openai_timeout: int = 200  # seconds per request
+openai_pool_limit: int = 100  # total open connections per worker
+openai_pool_limit_per_host: int = 50
+openai_keepalive_timeout: int = 60  # seconds an idle connection is kept
+openai_dns_cache_ttl: int = 300  # seconds
+
+# Shopify Connection Pool
+shopify_timeout: int = 30  # seconds per request
+shopify_pool_limit: int = 20  # total open connections per worker
+shopify_pool_limit_per_host: int = 10  # Admin + Storefront share one host
+shopify_keepalive_timeout: int = 60  # seconds an idle connection is kept
+shopify_dns_cache_ttl: int = 300  # seconds
+
+# Shopify Admin API Throttle (calculated query cost, leaky bucket)
+shopify_bucket_size: int = 1000  # points, until the first throttleStatus arrives
+shopify_restore_rate: float = 50.0  # points per second, idem
+shopify_mutation_cost: int = 10  # static requested cost of any mutation
+shopify_throttle_retries: int = 5  # THROTTLED responses retried per request
+shopify_fetch_retries: int = 3  # failed catalog pages retried before a sync gives up
+shopify_retry_backoff: float = 1.0  # seconds, doubled per failed attempt
+shopify_single_flight: bool = True  # share identical in-flight read queries
+
+# Shopify Bulk Operations (catalog export for the ETL)
+shopify_bulk_poll_interval: float = 2.0  # seconds between status polls
+shopify_bulk_timeout: int = 60 * 60  # seconds a bulk export may run
+
+# Cart Handle / Variant Resolution (near misses from the LLM)
+fuzzy_resolution: bool = True  # auto-correct confident near miss handles / variant titles
+fuzzy_match_threshold: float = 0.75  # min trigram Dice similarity to accept a correction
+fuzzy_match_margin: float = 0.1  # min lead over the runner up, else it is ambiguous
+
+# Product Detail Cache (get_product_via_handle, shared by workers via Redis)
+product_cache_ttl: int = 5 * 60  # seconds a cached product is fresh
+product_cache_stale_ttl: int = 60 * 60  # seconds it may then be served while refetched
+product_cache_negative_ttl: int = 60  # seconds an unknown handle is remembered
+product_cache_key: str = "product_cache"  # Redis key prefix
+
+# Query Embedding Cache
+embedding_cache_size: int = 4096  # in-process LRU entries per worker
+embedding_cache_ttl: int = 7 * 24 * 3600  # seconds, applies to both tiers
+embedding_cache_key: str = "embedding_cache"  # Redis hash prefix (model name appended)
+
+# Semantic Result Cache (query vector similarity -> cached product list)
+semantic_cache_size: int = 1024  # cached queries per worker, 0 disables
+semantic_cache_threshold: float = 0.95  # min cosine similarity to reuse a result
+semantic_cache_ttl: int = 15 * 60  # seconds
+
+# Query Embedding Micro-Batching
+embedding_batch_max_size: int = 32  # max inputs per embeddings request
+embedding_batch_max_wait_ms: float = 5.0  # how long the first query waits for company
+
+# FAISS Index Type ( flat | hnsw | ivf_pq | sq8 ), see RAG/index_factory.py
+vector_index_type: str = "flat"
+hnsw_m: int = 32  # graph neighbours per node
+hnsw_ef_construction: int = 200
+hnsw_ef_search: int = 128  # query time, higher = better recall / slower
+ivf_pq_m: int = 64  # PQ sub-quantizers, must divide embedding_dimentions
+ivf_nprobe: int = 32  # query time, inverted lists visited per query
+
+# Retrieval Result Shape
+retrieval_mode: str = "product"  # "product" (k distinct products per call) | "chunk" (legacy top-k chunks, deduped)
+product_score_aggregation: str = "max"  # "max" | "sum" of chunk similarities per product
+retrieval_max_fetch: int = 512  # cap on chunks over-fetched per query in product mode
+
+# Tool Output Payloads
+payload_description_chars: int = 500  # product description kept per result
+payload_token_budget: int = 2500  # cl100k tokens per get_products_data output, lowest ranked results dropped first
+
+# Hybrid Retrieval (BM25 + vectors, product mode only)
+hybrid_retrieval: bool = True  # used when <index>_bm25.npz exists
+lexical_top_k: int = 100  # BM25 chunk hits considered per query
+rrf_k: int = 60  # reciprocal rank fusion constant
+bm25_k1: float = 1.2
+bm25_b: float = 0.75
+
+# FAISS Index Loading
+faiss_index_load_mode: str = "mmap"  # "mmap" (shared page cache across workers) | "memory"
+
+# Catalog Artifacts (data.pkl / products.pkl)
+catalog_store_mode: str = "packed"  # "packed" (mmap'd .pack sibling, shared by workers) | "pickle"
+
+# FAISS Index Hot Swap
+vector_index_watch: bool = True  # reload when the ETL rewrites persistent_path
+vector_index_drain_timeout: float = 30.0  # seconds a swapped out index may finish its queries
+
+# FAISS Search Scheduler
+faiss_omp_threads: int = 0  # OpenMP threads for index.search, 0 = all cores available to the process
+faiss_search_max_batch: int = 64  # max query vectors stacked into one index.search
+
 # Index Paths
 product_dict_file_location = "./bucket/index_storage/products.pkl"
 id_to_product_mapping = "./bucket/index_storage/data.pkl"
@@ -152,6 +152,7 @@ class ProductEntry:
     # "Large": {
     #    "vid": "gid://shopify/ProductVariant/40516000219222",
     # },
+    title: str = ""  # product title, "" in tables built before it was recorded
 
 
 class UsageInfo:
@@ -971,6 +972,8 @@ class ChatRequest(BaseModel):
 
             5. **No additional fields** — Only the 4 keys above.
             6. **All values must be single-line strings.**
+            7. If the tool output has `"resolved_from"`, the store matched a requested handle / variant to a
+            different one. Tell the customer in one sentence, outside the cart block, which product and variant were used.
 
             **Example of VALID input**:
 
@@ -1033,6 +1036,8 @@ class ChatRequest(BaseModel):
 
             5. **No additional fields** — Only the 4 keys above.
             6. **All values must be single-line strings.**
+            7. If the tool output has `"resolved_from"`, the store matched a requested handle / variant to a
+            different one. Tell the customer in one sentence, outside the cart block, which product and variant were used.
 
             **Example of VALID input**:
 
@@ -3,15 +3,13 @@ from fastapi import HTTPException, status, Request, Response, APIRouter
 from fastapi.responses import StreamingResponse
 
 # OpenAi
-from openai import AsyncOpenAI
-from openai import DefaultAioHttpClient
 from openai._exceptions import OpenAIError
 from openai.types.responses.response import Response
 
 # Data Models & App Config
 from models import ChatRequest, ChatResponse, UsageInfo
 from utils.guardrails import parse_query_into_json_prompt
-from config import settings, llm_model, reasoning_model
+from config import llm_model, reasoning_model
 from typing import AsyncIterator
 from rs_bpe.bpe import openai as token_counter
 
@@ -55,47 +53,44 @@ async def async_chat_endpoint(request: Request, chat_request: ChatRequest):
     try:
         # normal_query = await parse_into_json_prompt(chat_request)
         response = None
-        async with AsyncOpenAI(
-            api_key=settings.openai_api_key,
-            http_client=DefaultAioHttpClient(timeout=200),
-        ) as client:
-            messages = chat_request.openai_msgs()
-            response = await process_with_tools(
-                client, chat_request, tools_list, request.app.state.mcp_controller
-            )
-            reply = str(response.output_text.strip())
+        client = request.app.state.clients.openai
+        messages = chat_request.openai_msgs()
+        response = await process_with_tools(
+            client, chat_request, tools_list, request.app.state.mcp_controller
+        )
+        reply = str(response.output_text.strip())
 
-            chat_request.append_message({"role": "user", "content": user_message})
-            chat_request.append_message(
-                {
-                    "role": "assistant",
-                    "content": reply,
-                }
-            )
-            chat_request.added_total_tokens(response.usage)
+        chat_request.append_message({"role": "user", "content": user_message})
+        chat_request.append_message(
+            {
+                "role": "assistant",
+                "content": reply,
+            }
+        )
+        chat_request.added_total_tokens(response.usage)
 
-            # request.app.state.logger.extended_logging(chat_request)
+        # request.app.state.logger.extended_logging(chat_request)
 
-            # logger.info(f"\n\n History choices: {messages}")
+        # logger.info(f"\n\n History choices: {messages}")
 
-            request.app.state.logger.info(f"\n\nOpenAI response: {response}\n\n")
+        request.app.state.logger.info(f"\n\nOpenAI response: {response}\n\n")
 
-            stucture_output, reply = chat_request.extract_json_objects(reply)
+        stucture_output, reply = chat_request.extract_json_objects(reply)
 
-            messages = chat_request.history
+        messages = chat_request.history
 
-            latest_chat = chat_request.n_Serialize_chat_history(messages)
-            await request.app.state.session_manager.update_session(
-                session_id, latest_chat
-            )
+        latest_chat = chat_request.n_Serialize_chat_history(messages)
+        await request.app.state.session_manager.update_session(
+            session_id, latest_chat
+        )
 
-            print(f"\n Stuctural Data: {stucture_output}\n")
-            print(f"\n Final Data: {reply}\n")
-            print(f" Execution : {chat_request.activity_record}\n")
+        print(f"\n Stuctural Data: {stucture_output}\n")
+        print(f"\n Final Data: {reply}\n")
+        print(f" Execution : {chat_request.activity_record}\n")
 
-            return ChatResponse(
-                reply=reply, stuctural_data=stucture_output, session_id=session_id
-            )
+        return ChatResponse(
+            reply=reply, stuctural_data=stucture_output, session_id=session_id
+        )
 
     except OpenAIError as e:
         request.app.state.logger.error(f"OpenAI API error: {e}")
@@ -202,57 +197,54 @@ async def stream_chat_endpoint(
         model = llm_model
         if chat_request.is_deepThink:
             model = reasoning_model
-        async with AsyncOpenAI(
-            api_key=settings.openai_api_key,
-            http_client=DefaultAioHttpClient(timeout=200),
-        ) as client:
-            messages = chat_request.openai_msgs()
-            stream_response = await client.responses.create(
-                model=model,
-                tools=tools_list,
-                input=messages,
-                tool_choice="auto",
-                stream=True,
-            )
-
-            assistant_reply = ""  # build the streaming text
-            final_usage = None
-
-            chat_request.append_message({"role": "user", "content": user_message})
-
-            async for event in stream_response:
-                # ev_type = getattr(event, "type", "")
-
-                if event.type == "response.output_text.delta":
-                    delta = event.delta
-                    if delta:
-                        assistant_reply += delta
-                        yield f"data: {json.dumps({'type': 'chunk', 'chunk': delta})}\n\n"
-
-            chat_request.append_message(
-                {
-                    "role": "assistant",
-                    "content": assistant_reply,
-                }
-            )
-            user_query = chat_request.chat_history_to_text()
-
-            output_tokens_count = len(token_encoder.encode(assistant_reply))
-            input_tokens_count = len(token_encoder.encode(user_query))
-            # print("\n")
-            # print(rf"{assistant_reply}")
-            # print("\n")
-            final_usage = UsageInfo(output_tokens_count, input_tokens_count)
-
-            if final_usage:
-                chat_request.added_total_tokens(final_usage)
-
-            messages = chat_request.history
-
-            latest_chat = chat_request.n_Serialize_chat_history(messages)
-            await request.app.state.session_manager.update_session(
-                session_id, latest_chat
-            )
+        client = request.app.state.clients.openai
+        messages = chat_request.openai_msgs()
+        stream_response = await client.responses.create(
+            model=model,
+            tools=tools_list,
+            input=messages,
+            tool_choice="auto",
+            stream=True,
+        )
+
+        assistant_reply = ""  # build the streaming text
+        final_usage = None
+
+        chat_request.append_message({"role": "user", "content": user_message})
+
+        async for event in stream_response:
+            # ev_type = getattr(event, "type", "")
+
+            if event.type == "response.output_text.delta":
+                delta = event.delta
+                if delta:
+                    assistant_reply += delta
+                    yield f"data: {json.dumps({'type': 'chunk', 'chunk': delta})}\n\n"
+
+        chat_request.append_message(
+            {
+                "role": "assistant",
+                "content": assistant_reply,
+            }
+        )
+        user_query = chat_request.chat_history_to_text()
+
+        output_tokens_count = len(token_encoder.encode(assistant_reply))
+        input_tokens_count = len(token_encoder.encode(user_query))
+        # print("\n")
+        # print(rf"{assistant_reply}")
+        # print("\n")
+        final_usage = UsageInfo(output_tokens_count, input_tokens_count)
+
+        if final_usage:
+            chat_request.added_total_tokens(final_usage)
+
+        messages = chat_request.history
+
+        latest_chat = chat_request.n_Serialize_chat_history(messages)
+        await request.app.state.session_manager.update_session(
+            session_id, latest_chat
+        )
 
         yield f"data: {json.dumps({'type': 'id', 'conversation_id': session_id})}\n\n"
 
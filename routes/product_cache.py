@@ -0,0 +1,28 @@
+from typing import Optional
+from pydantic import BaseModel
+from fastapi import APIRouter, Request, Depends, HTTPException
+from .auth import auth_check
+
+router = APIRouter(
+    prefix="/product-cache", tags=["Product Cache"], dependencies=[Depends(auth_check)]
+)
+
+
+class InvalidateRequest(BaseModel):
+    handles: Optional[list[str]] = None  # None drops every cached product
+
+
+@router.get("/")
+async def product_cache_status(request: Request):
+    return request.app.state.mcp_controller.product_cache.metrics()
+
+
+@router.post("/invalidate")
+async def invalidate_products(request: Request, body: InvalidateRequest):
+    """Call on product updates (e.g. from a products/update webhook) so details are refetched."""
+    removed = await request.app.state.mcp_controller.product_cache.invalidate(body.handles)
+    if removed is None:
+        raise HTTPException(
+            status_code=503, detail="Product cache unavailable (Redis error), nothing was invalidated"
+        )
+    return {"removed": removed}
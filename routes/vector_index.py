@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Request, Depends
+from .auth import auth_check
+
+router = APIRouter(
+    prefix="/vector-index", tags=["Vector Index"], dependencies=[Depends(auth_check)]
+)
+
+
+@router.get("/")
+async def index_status(request: Request):
+    vector_store = request.app.state.mcp_controller.vector_store
+    return {
+        "version": vector_store.version,
+        "vectors": vector_store.db_client.ntotal,
+        "in_flight": vector_store.in_flight,
+        "hybrid": vector_store.lexical_index is not None,
+        "search": vector_store.search_scheduler.metrics(),
+        "embedding_cache": vector_store.embedding_cache.metrics(),
+        "result_cache": vector_store.result_cache.metrics(),
+    }
+
+
+@router.post("/reload")
+async def reload_index(request: Request, force: bool = False):
+    """Loads the artifacts the ETL published and swaps them in without downtime."""
+    return await request.app.state.mcp_controller.reload_vector_store(force=force)
@@ -0,0 +1,293 @@
+"""
+Offline retrieval benchmark for RAG/database.py.
+
+Every index configuration (index type x vector / hybrid) is loaded into a real
+`vectorDB` in a fresh process and measured on the same labelled queries:
+
+- search latency p50 / p95 / p99 (one caller)
+- throughput at 1 / 8 / 64 concurrent callers
+- recall@k of the labelled product handles
+- memory added by loading the index (private / shared pages)
+
+Queries are embedded once and replayed, so no run ever calls an embedding API,
+and `vectorDB.search` is timed directly so the embedding / result caches do not
+hide regressions.
+
+    python -m test.benchmark_retrieval --synthetic                # generated corpus + labels
+    python -m test.benchmark_retrieval --queries test/benchmark_queries.jsonl
+    python -m test.benchmark_retrieval --synthetic --output bench.json
+    python -m test.benchmark_retrieval --synthetic --baseline bench.json   # exit 1 on regression
+
+With --queries the corpus is the ETL output (embed_job_output/, embed_job_data/,
+the chunk id table and data.pkl); the file holds one {"query": ..., "handles": [...]}
+per line. Query embeddings are read from the same path with a .npy suffix; when
+missing they are computed once with the configured backend and saved there.
+"""
+
+import os
+import sys
+import json
+import time
+import pickle
+import asyncio
+import argparse
+import tempfile
+import multiprocessing as mp
+import numpy as np
+import faiss
+from config import vectorDb_index_path, id_to_product_mapping
+from RAG.index_factory import INDEX_TYPES, build_index
+from RAG.lexical_index import BM25Index, read_batch_chunk_texts
+from test.index_memory_report import memory_mb
+
+CONCURRENCY = (1, 8, 64)
+WORDS = [f"w{i}" for i in range(400)]
+
+
+def synthetic_corpus(
+    n_products: int = 2000,
+    chunks_per_product: int = 4,
+    dim: int = 384,
+    n_queries: int = 500,
+    seed: int = 7,
+) -> dict:
+    """
+    Products -> chunk vectors and texts, plus labelled queries. Products sit in
+    100 tight categories and queries are heavily perturbed product centers, so
+    near-miss siblings compete and vector-only recall@5 stays near 0.8.
+    Every other query carries the product's part number for BM25 to find.
+    """
+    rng = np.random.default_rng(seed)
+    categories = rng.standard_normal((100, dim)).astype("float32")
+    centers = categories[np.arange(n_products) % 100] + 0.1 * rng.standard_normal((n_products, dim)).astype("float32")
+    chunk_products = np.repeat(np.arange(n_products), chunks_per_product)
+    xb = centers[chunk_products] + 0.05 * rng.standard_normal((len(chunk_products), dim)).astype("float32")
+    faiss.normalize_L2(xb)
+
+    product_ids = 8000000000000 + np.arange(n_products, dtype=np.int64)
+    product_words = rng.choice(WORDS, size=(n_products, 6))
+    texts = [
+        f"{' '.join(product_words[p])} pn{p}x {' '.join(rng.choice(WORDS, 8))}" for p in chunk_products
+    ]
+    data_dict = {
+        str(product_ids[p]): {"title": f"Product {p}", "handle": f"product-{p}", "productType": "Bench"}
+        for p in range(n_products)
+    }
+
+    targets = rng.choice(n_products, size=n_queries, replace=False)
+    xq = centers[targets] + 1.2 * rng.standard_normal((n_queries, dim)).astype("float32")
+    faiss.normalize_L2(xq)
+    queries = [
+        {
+            "query": " ".join(rng.choice(product_words[p], 3)) + (f" pn{p}x" if i % 2 else ""),
+            "handles": [f"product-{p}"],
+        }
+        for i, p in enumerate(targets)
+    ]
+    return {
+        "embeddings": xb,
+        "chunk_product_ids": product_ids[chunk_products],
+        "texts": texts,
+        "data_dict": data_dict,
+        "queries": queries,
+        "query_embeddings": xq,
+    }
+
+
+def load_corpus(queries_path: str) -> dict:
+    """ETL artifacts + labelled queries; embeds the queries once if no .npy exists yet."""
+    from ETL_pipeline.modules.faiss_index_creation import load_batch_embeddings
+    from RAG.database import load_chunk_product_ids
+
+    xb, labels = load_batch_embeddings()
+    chunk_product_ids = load_chunk_product_ids(vectorDb_index_path)
+    embeddings = np.zeros((len(chunk_product_ids), xb.shape[1]), dtype="float32")
+    embeddings[labels - 1] = xb  # row == label - 1, like the chunk id table
+
+    with open(queries_path, "r", encoding="utf-8") as f:
+        queries = [json.loads(line) for line in f if line.strip()]
+
+    embeddings_path = os.path.splitext(queries_path)[0] + ".npy"
+    if os.path.exists(embeddings_path):
+        xq = np.load(embeddings_path)
+    else:
+        from RAG.embedding_backend import get_embedder
+
+        embedder = get_embedder()
+        xq = asyncio.run(embedder.aembed([q["query"] for q in queries]))
+        embedder.close()
+        np.save(embeddings_path, xq)
+
+    with open(id_to_product_mapping, "rb") as f:
+        data_dict = pickle.load(f)
+
+    return {
+        "embeddings": embeddings,
+        "chunk_product_ids": chunk_product_ids,
+        "texts": read_batch_chunk_texts("embed_job_data") if os.path.isdir("embed_job_data") else None,
+        "data_dict": data_dict,
+        "queries": queries,
+        "query_embeddings": xq,
+    }
+
+
+def write_artifacts(corpus: dict, folder: str, index_types=INDEX_TYPES):
+    """One index per type plus the chunk id table, BM25 index, product dict and replayed queries."""
+    np.save(os.path.join(folder, "queries.npy"), corpus["query_embeddings"])
+    with open(os.path.join(folder, "queries.json"), "w", encoding="utf-8") as f:
+        json.dump(corpus["queries"], f)
+    with open(os.path.join(folder, "data.pkl"), "wb") as f:
+        pickle.dump(corpus["data_dict"], f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    for index_type in index_types:
+        index_path = os.path.join(folder, index_type)
+        labels = np.arange(1, len(corpus["embeddings"]) + 1, dtype="int64")
+        faiss.write_index(build_index(corpus["embeddings"], labels, index_type), index_path + ".index")
+        np.save(index_path + "_ids.npy", corpus["chunk_product_ids"])
+        if corpus["texts"] is not None:
+            BM25Index.build(corpus["texts"]).save(index_path)
+
+
+def percentiles(millis: list[float]) -> dict:
+    return {f"p{p}_ms": round(float(np.percentile(millis, p)), 3) for p in (50, 95, 99)}
+
+
+async def benchmark(folder: str, index_type: str, hybrid: bool, k: int) -> dict:
+    from RAG.database import vectorDB
+
+    with open(os.path.join(folder, "queries.json"), "r", encoding="utf-8") as f:
+        queries = json.load(f)
+    xq = np.load(os.path.join(folder, "queries.npy"))
+
+    before = memory_mb()
+    store = vectorDB(os.path.join(folder, index_type), backend="stub", mapping_path=os.path.join(folder, "data.pkl"))
+    if not hybrid:
+        store.lexical_index = None
+    if hybrid and store.lexical_index is None:
+        await store.aclose()
+        return {}
+
+    async def run(i: int) -> list[dict]:
+        return await store.search(queries[i]["query"], xq[i : i + 1], k)
+
+    await run(0)  # warm up: page in the index, start the executor
+    loaded = memory_mb()
+
+    # Latency and recall, one caller at a time
+    millis, recalls = [], []
+    for i, query in enumerate(queries):
+        start = time.perf_counter()
+        results = await run(i)
+        millis.append((time.perf_counter() - start) * 1000)
+        found = {result["metadata"]["Handle"] for result in results}
+        recalls.append(len(found & set(query["handles"])) / len(query["handles"]))
+
+    # Throughput, `callers` coroutines draining the same query list
+    throughput = {}
+    for callers in CONCURRENCY:
+        pending = iter(range(len(queries)))
+
+        async def caller():
+            for i in pending:
+                await run(i)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(callers)))
+        throughput[f"qps@{callers}"] = round(len(queries) / (time.perf_counter() - start), 1)
+
+    await store.aclose()
+    return {
+        "index": index_type,
+        "mode": "hybrid" if hybrid else "vector",
+        f"recall@{k}": round(float(np.mean(recalls)), 4),
+        **percentiles(millis),
+        **throughput,
+        "private_mb": loaded["anon"] - before["anon"],
+        "shared_mb": loaded["file"] - before["file"],
+        "index_mb": round(os.path.getsize(os.path.join(folder, index_type + ".index")) / (1024 * 1024), 1),
+    }
+
+
+def measure(folder: str, index_type: str, hybrid: bool, k: int, queue):
+    queue.put(asyncio.run(benchmark(folder, index_type, hybrid, k)))
+
+
+def regressions(results: list[dict], baseline: list[dict], k: int, max_slowdown: float = 0.25) -> list[str]:
+    """
+    Recall drops of more than 0.01, or median latency growing by more than
+    `max_slowdown` (and 0.5 ms), per configuration. The median is compared
+    because tail latencies on shared CI machines are too noisy to gate on.
+    """
+    previous = {(r["index"], r["mode"]): r for r in baseline}
+    problems = []
+    for result in results:
+        old = previous.get((result["index"], result["mode"]))
+        if old is None:
+            continue
+        name = f"{result['index']}/{result['mode']}"
+        if result[f"recall@{k}"] < old[f"recall@{k}"] - 0.01:
+            problems.append(f"{name}: recall@{k} {old[f'recall@{k}']} -> {result[f'recall@{k}']}")
+        if result["p50_ms"] > max(old["p50_ms"] * (1 + max_slowdown), old["p50_ms"] + 0.5):
+            problems.append(f"{name}: p50 {old['p50_ms']} ms -> {result['p50_ms']} ms")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval benchmark for vectorDB")
+    parser.add_argument("--synthetic", action="store_true", help="Generated corpus and labelled queries")
+    parser.add_argument("--queries", help="JSONL of {query, handles} run against the ETL artifacts")
+    parser.add_argument("-k", type=int, default=5)
+    parser.add_argument("--index_types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="Compare against an earlier --output, exit 1 on regression")
+    parser.add_argument("--max_slowdown", type=float, default=0.25, help="Allowed p50 growth vs the baseline")
+    args = parser.parse_args()
+
+    if not args.synthetic and not args.queries:
+        parser.error("pass --synthetic or --queries")
+
+    corpus = synthetic_corpus() if args.synthetic else load_corpus(args.queries)
+    folder = tempfile.mkdtemp(prefix="retrieval-bench-")
+    write_artifacts(corpus, folder, args.index_types)
+    print(
+        f"{len(corpus['embeddings'])} chunks x {corpus['embeddings'].shape[1]} dims, "
+        f"{len(corpus['queries'])} labelled queries, k={args.k}\n"
+    )
+
+    header = f"{'index':<8} {'mode':<7} {'recall':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    header += "".join(f" {'qps@' + str(c):>8}" for c in CONCURRENCY)
+    print(header + f" {'priv MB':>8} {'shr MB':>7} {'idx MB':>7}")
+
+    results = []
+    ctx = mp.get_context("spawn")  # fresh process per configuration, clean memory numbers
+    for index_type in args.index_types:
+        for hybrid in (False, True):
+            queue = ctx.Queue()
+            worker = ctx.Process(target=measure, args=(folder, index_type, hybrid, args.k, queue))
+            worker.start()
+            result = queue.get()
+            worker.join()
+            if not result:
+                continue
+            results.append(result)
+            row = (
+                f"{result['index']:<8} {result['mode']:<7} {result[f'recall@{args.k}']:>7.3f} "
+                f"{result['p50_ms']:>8.3f} {result['p95_ms']:>8.3f} {result['p99_ms']:>8.3f}"
+            )
+            row += "".join(f" {result['qps@' + str(c)]:>8.1f}" for c in CONCURRENCY)
+            print(row + f" {result['private_mb']:>+8} {result['shared_mb']:>+7} {result['index_mb']:>7.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = regressions(results, json.load(f), args.k, args.max_slowdown)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
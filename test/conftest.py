@@ -0,0 +1,20 @@
+import os
+
+# config.Settings requires these; no test talks to the real services
+for name in (
+    "OPENAI_API_KEY",
+    "VECTOR_STORE_ID",
+    "SHOPIFY_API_KEY",
+    "SHOPIFY_API_SECRET",
+    "SHOPIFY_STOREFRONT_API_SECRET",
+    "SHOPIFY_STORE_NAME",
+    "SHOPIFY_API_VERSION",
+    "PINECONE_API_KEY",
+    "AUTH_ALGO",
+    "ALLOWED_ORIGIN_REGEX",
+    "ALLOWED_ORIGINS",
+    "ACCESS_TOKEN",
+    "ENV",
+):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("PORT", "8000")
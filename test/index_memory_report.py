@@ -0,0 +1,151 @@
+"""
+Per-worker memory report for the FAISS index load modes and the catalog
+store modes (`data.pkl` unpickled vs `data.pack` mapped).
+
+Every mode is measured in a fresh process, the same way each uvicorn worker
+loads the index in its lifespan.
+
+    python -m test.index_memory_report
+    python -m test.index_memory_report --index ./bucket/index_storage/faiss.index
+    python -m test.index_memory_report --catalog ./bucket/index_storage/data.pkl
+
+Without --index / --catalog synthetic artifacts with the production shape
+(18226 chunks x 1536 dims, 5957 products) are written to a temp folder first.
+"""
+
+import os
+import re
+import pickle
+import time
+import argparse
+import tempfile
+import multiprocessing as mp
+import numpy as np
+import faiss
+from config import embedding_dimentions
+from utils.packed_store import packed_path, write_packed
+
+PRODUCTION_CHUNKS = 18226
+PRODUCTION_PRODUCTS = 5957
+
+
+def memory_mb() -> dict[str, int]:
+    """VmRSS split into private (anon) and shared file backed pages, in MB (Linux only)."""
+    with open("/proc/self/status") as f:
+        status = f.read()
+
+    def field(name):
+        return int(re.search(rf"{name}:\s+(\d+)", status).group(1)) // 1024  # type: ignore
+
+    return {"rss": field("VmRSS"), "anon": field("RssAnon"), "file": field("RssFile")}
+
+
+def measure(index_path: str, load_mode: str, queue):
+    from RAG.database import read_faiss_index
+
+    before = memory_mb()
+    start = time.perf_counter()
+    index = read_faiss_index(index_path, load_mode)
+    load_ms = (time.perf_counter() - start) * 1000
+    loaded = memory_mb()
+
+    xq = np.random.rand(8, index.d).astype("float32")
+    faiss.normalize_L2(xq)
+    index.search(xq, 10)  # type: ignore
+    searched = memory_mb()
+
+    queue.put((load_mode, load_ms, before, loaded, searched))
+
+
+def measure_catalog(pickle_path: str, store_mode: str, queue):
+    from utils.packed_store import load_mapping
+
+    before = memory_mb()
+    start = time.perf_counter()
+    data_dict = load_mapping(pickle_path, store_mode)
+    load_ms = (time.perf_counter() - start) * 1000
+    loaded = memory_mb()
+
+    # what vectorDB does at startup (ProductAttributes / ProductPayloads) and per result
+    for key in data_dict:
+        data_dict[key].get("priceRange")
+    searched = memory_mb()
+
+    queue.put((store_mode, load_ms, before, loaded, searched))
+
+
+def build_synthetic_index(path: str, n: int = PRODUCTION_CHUNKS, d: int = embedding_dimentions):
+    xb = np.random.rand(n, d).astype("float32")
+    faiss.normalize_L2(xb)
+    index = faiss.IndexIDMap(faiss.IndexFlatIP(d))
+    index.add_with_ids(xb, np.arange(1, n + 1, dtype="int64"))  # type: ignore
+    faiss.write_index(index, path)
+
+
+def build_synthetic_catalog(path: str, n: int = PRODUCTION_PRODUCTS):
+    """`id_to_product_mapping` shaped dict (format_product output) pickled to `path`."""
+    rng = np.random.default_rng(0)
+    data = {}
+    for i in range(n):
+        price = float(rng.integers(50, 50000))
+        data[str(8000000000000 + i)] = {
+            "title": f"Product {i}",
+            "handle": f"product-{i}",
+            "description": " ".join(f"word{j}" for j in rng.integers(0, 5000, 250)),
+            "vendor": "Digilog",
+            "productType": f"Category {i % 100}",
+            "priceRange": {"CurrencyCode": "PKR", "max_price": str(price), "min_price": str(price)},
+            "totalInventory": int(rng.integers(0, 100)),
+            "image_url": f"https://cdn.shopify.com/s/files/1/product-{i}.jpg",
+            "variants_options": [f"Variant {v}" for v in range(int(rng.integers(1, 6)))],
+        }
+    with open(path, "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def report(target, path: str, modes: tuple[str, ...]):
+    ctx = mp.get_context("spawn")
+    for load_mode in modes:
+        queue = ctx.Queue()
+        worker = ctx.Process(target=target, args=(path, load_mode, queue))
+        worker.start()
+        mode, load_ms, before, loaded, searched = queue.get()
+        worker.join()
+        private = searched["anon"] - before["anon"]
+        shared = searched["file"] - before["file"]
+        print(f"{mode:<8} {load_ms:>8.1f} | {searched['rss']:>6} {private:>+8} {shared:>+7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FAISS / catalog per-worker memory report")
+    parser.add_argument("--index", help="Path to a .index file (default: synthetic)")
+    parser.add_argument("--catalog", help="Path to data.pkl (default: synthetic)")
+    args = parser.parse_args()
+    folder = tempfile.mkdtemp()
+
+    index_path = args.index
+    if not index_path:
+        index_path = os.path.join(folder, "synthetic.index")
+        build_synthetic_index(index_path)
+
+    catalog_path = args.catalog
+    if not catalog_path:
+        catalog_path = os.path.join(folder, "data.pkl")
+        build_synthetic_catalog(catalog_path)
+    if not os.path.exists(packed_path(catalog_path)):
+        with open(catalog_path, "rb") as f:
+            write_packed(pickle.load(f), packed_path(catalog_path))
+
+    size_mb = os.path.getsize(index_path) / (1024 * 1024)
+    print(f"Index: {index_path} ({size_mb:.1f} MB on disk)\n")
+    print(f"{'mode':<8} {'load ms':>8} | {'RSS':>6} {'private':>8} {'shared':>7}  (MB, after first search)")
+    report(measure, index_path, ("memory", "mmap"))
+
+    pickle_mb = os.path.getsize(catalog_path) / (1024 * 1024)
+    pack_mb = os.path.getsize(packed_path(catalog_path)) / (1024 * 1024)
+    print(f"\nCatalog: {catalog_path} ({pickle_mb:.1f} MB pickle, {pack_mb:.1f} MB pack)\n")
+    print(f"{'mode':<8} {'load ms':>8} | {'RSS':>6} {'private':>8} {'shared':>7}  (MB, after reading every product)")
+    report(measure_catalog, catalog_path, ("pickle", "packed"))
+
+if __name__ == "__main__":
+    main()
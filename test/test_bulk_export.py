@@ -0,0 +1,122 @@
+"""
+Bulk Operations catalog export (`Shopify.iter_bulk_products`) against a local
+stand-in for the Admin GraphQL endpoint and the JSONL download.
+
+    python -m pytest -q test/test_bulk_export.py
+"""
+
+import json
+import asyncio
+import pytest
+from aiohttp import web
+import Shopify.shopify as shopify_module
+from Shopify import Shopify
+from config import settings
+
+JSONL_LINES = [
+    {"id": "gid://shopify/Product/1", "title": "Arduino Uno", "handle": "arduino-uno", "options": []},
+    {"id": "gid://shopify/ProductVariant/11", "title": "Default Title", "inventoryPolicy": "DENY", "__parentId": "gid://shopify/Product/1"},
+    {"__parentId": "gid://shopify/Product/1"},  # a Video: not a MediaImage, no fields selected
+    {"id": "gid://shopify/MediaImage/21", "image": {"url": "https://cdn/uno.jpg"}, "__parentId": "gid://shopify/Product/1"},
+    {"id": "gid://shopify/MediaImage/22", "image": {"url": "https://cdn/uno-2.jpg"}, "__parentId": "gid://shopify/Product/1"},
+    {"id": "gid://shopify/Product/2", "title": "Jumper Wires", "handle": "jumper-wires", "options": []},
+    {"id": "gid://shopify/Product/3", "title": "LM2596", "handle": "lm2596", "options": []},
+    {"id": "gid://shopify/ProductVariant/31", "title": "Blue", "inventoryPolicy": "DENY", "__parentId": "gid://shopify/Product/3"},
+    {"id": "gid://shopify/ProductVariant/32", "title": "Red", "inventoryPolicy": "CONTINUE", "__parentId": "gid://shopify/Product/3"},
+]
+
+
+class StandIn:
+    """Admin API + storage bucket stand-in: RUNNING for `polls - 1` polls, then `final`."""
+
+    def __init__(self, final: str = "COMPLETED", polls: int = 2, lines=JSONL_LINES, with_url: bool = True):
+        self.final = final
+        self.polls = polls
+        self.lines = lines
+        self.with_url = with_url
+        self.status_requests = 0
+        self.bulk_query = None
+
+    async def graphql(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        if "bulkOperationRunQuery" in body["query"]:
+            self.bulk_query = body["variables"]["query"]
+            return web.json_response(
+                {"data": {"bulkOperationRunQuery": {"bulkOperation": {"id": "gid://shopify/BulkOperation/7", "status": "CREATED"}, "userErrors": []}}}
+            )
+
+        self.status_requests += 1
+        status = self.final if self.status_requests >= self.polls else "RUNNING"
+        url = str(request.url.with_path("/bulk.jsonl")) if status == "COMPLETED" and self.with_url else None
+        node = {"id": "gid://shopify/BulkOperation/7", "status": status, "errorCode": None, "objectCount": str(len(self.lines)), "url": url}
+        if status == "FAILED":
+            node["errorCode"] = "INTERNAL_SERVER_ERROR"
+        return web.json_response({"data": {"node": node}})
+
+    async def jsonl(self, request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        await response.prepare(request)
+        payload = "".join(json.dumps(line) + "\n" for line in self.lines).encode()
+        for start in range(0, len(payload), 13):  # lines split across network chunks
+            await response.write(payload[start : start + 13])
+        await response.write_eof()
+        return response
+
+
+async def export(stand_in: StandIn) -> list[dict]:
+    app = web.Application()
+    app.router.add_post("/graphql.json", stand_in.graphql)
+    app.router.add_get("/bulk.jsonl", stand_in.jsonl)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore
+
+    store = Shopify(settings.store, "BulkExportTest")
+    store.URL = f"http://127.0.0.1:{port}/graphql.json"
+    try:
+        return [product async for product in store.iter_bulk_products()]
+    finally:
+        await store.aclose()
+        await runner.cleanup()
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(shopify_module, "shopify_bulk_poll_interval", 0.01)
+
+
+def test_bulk_export_streams_products_in_fetch_all_products_shape():
+    stand_in = StandIn(polls=3)
+    products = asyncio.run(export(stand_in))
+
+    assert stand_in.status_requests == 3
+    assert "first:" not in stand_in.bulk_query  # bulk queries page by themselves
+    assert [p["id"] for p in products] == ["1", "2", "3"]
+    assert products[0]["admin_graphql_api_id"] == "gid://shopify/Product/1"
+
+    uno, wires, lm2596 = products
+    assert [e["node"]["title"] for e in uno["variants"]["edges"]] == ["Default Title"]
+    assert [e["node"]["image"]["url"] for e in uno["media"]["edges"]] == ["https://cdn/uno.jpg"]
+    assert wires["variants"]["edges"] == [] and wires["media"]["edges"] == []
+    assert [e["node"]["title"] for e in lm2596["variants"]["edges"]] == ["Blue", "Red"]
+    assert all("__parentId" not in e["node"] for e in lm2596["variants"]["edges"])
+
+
+def test_bulk_export_formats_like_paged_products():
+    products = asyncio.run(export(StandIn()))
+    store = Shopify(settings.store, "BulkExportTest")
+
+    formatted = store.format_product({**products[0], "status": "ACTIVE", "totalInventory": 3}, True)
+    assert formatted["image_url"] == "https://cdn/uno.jpg"
+    assert formatted["variants_options"] == ["Default Title"]
+
+
+def test_bulk_export_of_empty_catalog_yields_nothing():
+    assert asyncio.run(export(StandIn(with_url=False))) == []
+
+
+def test_failed_bulk_operation_raises():
+    with pytest.raises(RuntimeError, match="FAILED"):
+        asyncio.run(export(StandIn(final="FAILED")))
@@ -0,0 +1,95 @@
+"""
+ETL chunking stage (`process_and_save_products_into_batches`): batch files are
+written while the catalog streams in, and the staged id table / BM25 index
+line up with the request numbers.
+
+    python -m pytest -q test/test_etl_batches.py
+"""
+
+import os
+import json
+import asyncio
+import numpy as np
+import pytest
+from langchain.schema import Document
+import ETL_pipeline.pipeline as pipeline
+from RAG.database import ids_digest, read_manifest, staged_path
+from RAG.lexical_index import BM25Index, read_batch_chunk_texts
+
+PRODUCTS = [{"id": str(n), "title": f"Product {n}", "chunks": n % 3 + 1} for n in range(1, 8)]
+
+
+def chunk_product_description(product):
+    """Stand-in for the tiktoken based splitter: `chunks` documents per product."""
+    return [
+        Document(page_content=f"{product['title']} part {i} esp32", metadata={"id": product["id"]})
+        for i in range(product["chunks"])
+    ]
+
+
+@pytest.fixture
+def folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "chunk_product_description", chunk_product_description)
+    monkeypatch.setattr(pipeline, "persistent_path", str(tmp_path) + "/")
+    data_folder = tmp_path / "embed_job_data"
+    data_folder.mkdir()
+    (data_folder / "file_batch_9.jsonl").write_text("stale\n")
+    return str(tmp_path / "faiss_index"), str(data_folder)
+
+
+def test_batches_are_written_while_products_stream_in(folders):
+    index_path, data_folder = folders
+    seen_files = []
+
+    async def products():
+        for product in PRODUCTS:
+            seen_files.append(sorted(os.listdir(data_folder)))
+            yield product
+
+    asyncio.run(
+        pipeline.process_and_save_products_into_batches(
+            products(), chunk_per_file=4, index_path="faiss_index", data_folder=data_folder
+        )
+    )
+
+    # products 1..3 make 2 + 3 + 1 chunks: the first file exists before product 4 arrives
+    assert seen_files[3] == ["file_batch_0.jsonl"]
+    assert sorted(os.listdir(data_folder)) == [f"file_batch_{i}.jsonl" for i in range(4)]
+
+    requests = []
+    for i in range(4):
+        with open(os.path.join(data_folder, f"file_batch_{i}.jsonl"), encoding="utf-8") as f:
+            requests.extend(json.loads(line) for line in f)
+    n_chunks = sum(product["chunks"] for product in PRODUCTS)
+    assert [r["custom_id"] for r in requests] == [f"request-{n}" for n in range(1, n_chunks + 1)]
+
+
+def test_staged_tables_match_the_request_numbers(folders):
+    index_path, data_folder = folders
+
+    async def products():
+        for product in PRODUCTS:
+            yield product
+
+    asyncio.run(
+        pipeline.process_and_save_products_into_batches(
+            products(), chunk_per_file=4, index_path="faiss_index", data_folder=data_folder
+        )
+    )
+
+    staged = staged_path(index_path)
+    product_ids = np.load(staged + "_ids.npy")
+    expected = [int(product["id"]) for product in PRODUCTS for _ in range(product["chunks"])]
+    assert product_ids.dtype == np.int64 and product_ids.tolist() == expected
+
+    manifest = read_manifest(staged)
+    assert manifest["chunks"] == len(expected)
+    assert manifest["ids_digest"] == ids_digest(product_ids)
+
+    lexical = BM25Index.load(staged)
+    reference = BM25Index.build(read_batch_chunk_texts(data_folder))
+    assert lexical.build_id == manifest["build_id"]
+    assert lexical.vocabulary == reference.vocabulary
+    np.testing.assert_array_equal(lexical.doc_ids, reference.doc_ids)
+    np.testing.assert_allclose(lexical.weights, reference.weights)
+    assert read_manifest(index_path) is None  # nothing is published by chunking
@@ -0,0 +1,109 @@
+"""
+Compact handle -> variant index (`Shopify.handle_index`) against the
+`products.pkl` entries it is built from.
+
+    python -m pytest -q test/test_handle_index.py
+"""
+
+import pickle
+import numpy as np
+import pytest
+from models import ProductEntry
+from Shopify.handle_index import HandleIndex, handle_index_path, load_handle_index, write_handle_index
+
+
+def entry(title: str, single: bool, **variants: int) -> ProductEntry:
+    return ProductEntry(
+        have_single_variant=single,
+        variants={name: {"vid": f"gid://shopify/ProductVariant/{vid}"} for name, vid in variants.items()},
+        title=title,
+    )
+
+
+ENTRIES = {
+    "arduino-uno-r3": entry("Arduino Uno R3", True, **{"Default Title": 40516000219222}),
+    "lm2596-buck-converter": entry("LM2596 Buck Converter", False, Blue=31, Red=32, **{"Large / Red": 33}),
+    "jumper-wires": entry("Jumper Wires", False, Red=41, Blue=42),  # titles shared with another product
+    "ماڈیول-wifi": entry("وائی فائی ماڈیول", True, **{"سرخ": 51}),  # non ascii handle and titles
+}
+
+
+def assert_same(index: HandleIndex, entries: dict):
+    assert len(index) == len(entries)
+    assert sorted(index) == sorted(entries)
+    for handle, product in entries.items():
+        decoded = index[handle]
+        assert decoded.have_single_variant == product.have_single_variant
+        assert decoded.title == product.title
+        assert decoded.titles == list(product.variants)
+        for title, variant in product.variants.items():
+            assert decoded.variant_gid(title) == variant["vid"]
+
+
+def test_round_trip_in_memory():
+    assert_same(HandleIndex.from_entries(ENTRIES), ENTRIES)
+
+
+def test_round_trip_through_the_mapped_file(tmp_path):
+    pickle_path = str(tmp_path / "products.pkl")
+    write_handle_index(ENTRIES, handle_index_path(pickle_path))
+
+    index = load_handle_index(pickle_path)
+
+    assert isinstance(index._handles, np.memmap)
+    assert_same(index, ENTRIES)
+
+
+def test_falls_back_to_the_pickle_without_an_index(tmp_path):
+    pickle_path = str(tmp_path / "products.pkl")
+    with open(pickle_path, "wb") as f:
+        pickle.dump(ENTRIES, f)
+
+    assert_same(load_handle_index(pickle_path), ENTRIES)
+
+
+def test_single_variant_default_gid():
+    index = HandleIndex.from_entries(ENTRIES)
+    assert index["arduino-uno-r3"].default_gid() == "gid://shopify/ProductVariant/40516000219222"
+    assert index["lm2596-buck-converter"].variant_gid("Green") is None
+
+
+def test_missing_handles():
+    index = HandleIndex.from_entries(ENTRIES)
+    for handle in ("arduino-uno", "arduino-uno-r3-extra", "", "x" * 200):
+        assert handle not in index
+        with pytest.raises(KeyError):
+            index[handle]
+    assert index.get("arduino-uno") is None
+
+
+def test_shared_titles_are_stored_once():
+    index = HandleIndex.from_entries(ENTRIES)
+    assert len(index._title_offsets) - 1 == 4 + 5  # product titles, then Default Title, Blue, Red, Large / Red, سرخ
+    assert index["jumper-wires"].titles[0] is index["lm2596-buck-converter"].titles[1]
+
+
+def test_tables_without_product_titles():
+    legacy = ProductEntry(have_single_variant=True, variants={"Default Title": {"vid": "gid://shopify/ProductVariant/1"}})
+    assert HandleIndex.from_entries({"relay": legacy})["relay"].title == ""
+
+
+def test_older_index_files_are_rebuilt_from_the_pickle(tmp_path):
+    pickle_path = str(tmp_path / "products.pkl")
+    with open(pickle_path, "wb") as f:
+        pickle.dump(ENTRIES, f)
+    with open(handle_index_path(pickle_path), "wb") as f:
+        f.write(b"HDLIDX01" + bytes(40))
+
+    assert_same(load_handle_index(pickle_path), ENTRIES)
+
+
+def test_empty_index():
+    index = HandleIndex.from_entries({})
+    assert len(index) == 0 and list(index) == []
+    assert "arduino-uno" not in index
+
+
+def test_rejects_other_files():
+    with pytest.raises(ValueError):
+        HandleIndex(np.frombuffer(b"NOTANIDX" + bytes(40), dtype=np.uint8))
@@ -0,0 +1,139 @@
+"""
+Fuzzy handle / variant resolution for cart tools (`Shopify.handle_resolver`
+and `Shopify.handle_to_id`).
+
+    python -m pytest -q test/test_handle_resolver.py
+"""
+
+import pytest
+from models import ProductEntry
+from Shopify import Shopify
+from Shopify.handle_index import HandleIndex
+from Shopify.handle_resolver import HandleResolver, normalize_handle, normalize_title
+from config import settings, base_url
+
+HANDLES = [
+    "arduino-uno-r3",
+    "lm2596-buck-converter",
+    "resistor-10k",
+    "resistor-10r",
+    "esp32-devkit-v1",
+]
+TITLES = ["Small / Red", "Large / Red", "Large / Blue"]
+
+
+@pytest.fixture
+def resolver():
+    return HandleResolver(HANDLES, threshold=0.75, margin=0.1)
+
+
+def test_normalization():
+    assert normalize_handle(f"{base_url}Arduino_Uno R3/?variant=1") == "arduino-uno-r3"
+    assert normalize_title("Large / Red") == "large red"
+
+
+@pytest.mark.parametrize(
+    "handle, resolved",
+    [
+        ("Arduino Uno R3", "arduino-uno-r3"),  # same handle once normalized
+        (f"{base_url}lm2596-buck-converter", "lm2596-buck-converter"),
+        ("arduino-uno-r", "arduino-uno-r3"),  # near miss, clearly ahead
+        ("lm2596-buck-convertor", "lm2596-buck-converter"),
+        ("esp32-devkit", "esp32-devkit-v1"),
+    ],
+)
+def test_resolves_handles(resolver, handle, resolved):
+    assert resolver.resolve_handle(handle) == resolved
+
+
+@pytest.mark.parametrize(
+    "handle",
+    [
+        "resistor-10",  # equally close to 10k and 10r: ambiguous
+        "raspberry-pi-4",  # nothing close
+        "zz",
+    ],
+)
+def test_unsure_handles_are_not_guessed(resolver, handle):
+    assert resolver.resolve_handle(handle) is None
+
+
+def test_handles_that_normalize_alike_are_ambiguous():
+    resolver = HandleResolver(["led-5mm", "LED_5mm", "arduino-uno-r3"])
+    assert resolver.resolve_handle("led 5mm") is None
+    assert resolver.resolve_handle("arduino uno r3") == "arduino-uno-r3"
+
+
+@pytest.mark.parametrize(
+    "title, resolved",
+    [
+        ("Large / Red", "Large / Red"),
+        ("large red", "Large / Red"),
+        ("Red Large", "Large / Red"),  # same words, other order
+        ("Large / Blu", "Large / Blue"),
+        ("Red", None),  # Small / Red and Large / Red: ambiguous
+        ("Green", None),
+    ],
+)
+def test_resolves_variants(resolver, title, resolved):
+    assert resolver.resolve_variant(title, TITLES) == resolved
+
+
+def test_duplicate_word_sets_are_not_guessed(resolver):
+    assert resolver.resolve_variant("Red Large", ["Large / Red", "Large-Red"]) is None
+
+
+def test_titles_that_normalize_alike_are_ambiguous(resolver):
+    assert resolver.resolve_variant("red large", ["Red/Large", "red - large", "Small / Blue"]) is None
+    assert resolver.resolve_variant("small blue", ["Red/Large", "red - large", "Small / Blue"]) == "Small / Blue"
+
+
+def product(title: str, *variants: str) -> ProductEntry:
+    return ProductEntry(
+        have_single_variant=len(variants) == 1,
+        variants={name: {"vid": f"gid://shopify/ProductVariant/{i}"} for i, name in enumerate(variants, 1)},
+        title=title,
+    )
+
+
+@pytest.fixture
+def store():
+    entries = {
+        "arduino-uno-r3": product("Arduino Uno R3", "Default Title"),
+        "t-shirt": product("Maker T-Shirt", *TITLES),
+    }
+    store = Shopify(settings.store, "HandleResolverTest")
+    store._Shopify__id_table = HandleIndex.from_entries(entries)
+    store._resolver = HandleResolver(entries)
+    return store
+
+
+def test_exact_lines_report_no_resolution(store):
+    assert store.handle_to_id("t-shirt", "Large / Red") == ("gid://shopify/ProductVariant/2", "", None)
+    assert store.handle_to_id("arduino-uno-r3", "anything") == ("gid://shopify/ProductVariant/1", "", None)
+
+
+def test_corrected_lines_report_what_was_picked(store):
+    vid, _, resolution = store.handle_to_id("arduino-uno", "Default Title")
+    assert vid == "gid://shopify/ProductVariant/1"
+    assert resolution == {"handle": "arduino-uno-r3", "variant": "Default Title", "product_title": "Arduino Uno R3"}
+
+    vid, _, resolution = store.handle_to_id("t-shirt", "red large")
+    assert vid == "gid://shopify/ProductVariant/2"
+    assert resolution == {"handle": "t-shirt", "variant": "Large / Red", "product_title": "Maker T-Shirt"}
+
+
+def test_unresolved_lines_offer_the_variants(store):
+    assert store.handle_to_id("t-shirt", "Green") == (None, TITLES, None)
+    assert store.handle_to_id("raspberry-pi-4", "Default Title") == (None, [], None)
+
+
+def test_cart_replies_carry_the_resolutions(store):
+    note = Shopify.resolution_note("arduino-uno", "Default Title", {"handle": "arduino-uno-r3"})
+    assert Shopify.with_resolutions({"id": "cart"}, [note]) == {"id": "cart", "resolved_from": [note]}
+    assert Shopify.with_resolutions({"id": "cart"}, []) == {"id": "cart"}
+
+
+def test_unknown_handles_before_the_table_is_loaded():
+    store = Shopify(settings.store, "HandleResolverTest")
+    assert store.handle_to_id("state", "Default Title") == (None, [], None)
@@ -0,0 +1,118 @@
+"""
+Retrieval building blocks: chunk -> product aggregation, reciprocal rank fusion
+and the BM25 CSR index.
+
+    python -m pytest -q test/test_hybrid_retrieval.py
+"""
+
+import numpy as np
+import pytest
+from RAG.database import aggregate_by_product, reciprocal_rank_fusion
+from RAG.lexical_index import BM25Index, tokenize
+
+# chunk label (1 based) -> product id
+CHUNK_PRODUCT_IDS = np.array([10, 10, 20, 30, 20, 40], dtype=np.int64)
+
+TEXTS = [
+    "WT32-ETH01 ethernet module for ESP32",
+    "ESP32 development board with wifi and bluetooth",
+    "LM2596 buck converter, adjustable step down",
+    "18650 battery holder, 3.7v lithium cell",
+    "Arduino Uno R3 compatible board",
+]
+
+
+def test_aggregate_max_keeps_each_products_best_chunk():
+    similarities = np.array([0.9, 0.8, 0.7, 0.6, 0.5, 0.0], dtype=np.float32)
+    labels = np.array([3, 1, 5, 2, 6, -1])  # -1: FAISS padding
+
+    ids, scores = aggregate_by_product(similarities, labels, CHUNK_PRODUCT_IDS, k=5)
+
+    assert ids.tolist() == [20, 10, 40]
+    assert scores.tolist() == pytest.approx([0.9, 0.8, 0.5])
+
+
+def test_aggregate_sum_rewards_products_matching_on_many_chunks():
+    similarities = np.array([0.9, 0.8, 0.7, 0.6], dtype=np.float32)
+    labels = np.array([4, 1, 2, 3])
+
+    ids, scores = aggregate_by_product(similarities, labels, CHUNK_PRODUCT_IDS, k=2, method="sum")
+
+    assert ids.tolist() == [10, 30]
+    assert scores.tolist() == pytest.approx([1.5, 0.9])
+
+
+def test_aggregate_of_no_hits_is_empty():
+    ids, scores = aggregate_by_product(np.zeros(3, dtype=np.float32), np.full(3, -1), CHUNK_PRODUCT_IDS, k=5)
+    assert len(ids) == len(scores) == 0
+
+
+def test_rrf_favours_ids_ranked_by_both_lists():
+    vector = np.array([1, 2, 3])
+    lexical = np.array([3, 4, 1])
+
+    ids, scores = reciprocal_rank_fusion([vector, lexical], k=4, constant=60)
+
+    assert ids.tolist() == [1, 3, 2, 4]
+    assert scores[0] == pytest.approx(1 / 61 + 1 / 63)
+    assert scores[2] == pytest.approx(1 / 62)
+
+
+def test_rrf_truncates_to_k():
+    ids, _ = reciprocal_rank_fusion([np.array([5, 6, 7]), np.array([8])], k=2)
+    assert len(ids) == 2
+
+
+def test_tokenize_keeps_part_numbers_whole_and_split():
+    tokens = tokenize("WT32-ETH01 at 3.3V")
+    assert {"wt32-eth01", "wt32", "eth01", "wt32eth01", "3.3v"} <= set(tokens)
+
+
+@pytest.fixture
+def index():
+    return BM25Index.build(TEXTS)
+
+
+def test_bm25_ranks_exact_part_numbers_first(index):
+    labels, scores = index.search("wt32eth01", k=3)
+    assert labels.tolist() == [1, -1, -1]  # labels are 1 based, -1 padded
+    assert scores[0] > 0
+
+    labels, _ = index.search("esp32 board", k=3)
+    assert labels[0] == 2
+    assert set(labels.tolist()) == {1, 2, 5}
+
+
+def test_bm25_unknown_terms_match_nothing(index):
+    labels, scores = index.search("raspberry", k=2)
+    assert labels.tolist() == [-1, -1] and not scores.any()
+
+
+def test_bm25_mask_restricts_hits(index):
+    mask = np.ones(len(TEXTS), dtype=bool)
+    mask[1] = False  # drop chunk 2
+
+    labels, _ = index.search("esp32 board", k=3, mask=mask)
+
+    assert 2 not in labels.tolist()
+    assert labels[0] in (1, 5)
+
+
+def test_bm25_save_load_round_trip(index, tmp_path):
+    index_path = str(tmp_path / "faiss")
+    index.save(index_path)
+    loaded = BM25Index.load(index_path)
+
+    assert loaded.n_docs == index.n_docs
+    assert loaded.vocabulary == index.vocabulary
+    for query in ("esp32 board", "lm2596", "18650 3.7v"):
+        expected, loaded_result = index.search(query, k=4), loaded.search(query, k=4)
+        assert expected[0].tolist() == loaded_result[0].tolist()
+        np.testing.assert_allclose(expected[1], loaded_result[1])
+
+
+def test_bm25_of_no_documents_is_searchable(tmp_path):
+    empty = BM25Index.build([])
+    empty.save(str(tmp_path / "faiss"))
+    labels, _ = BM25Index.load(str(tmp_path / "faiss")).search("esp32", k=2)
+    assert labels.tolist() == [-1, -1]
@@ -0,0 +1,101 @@
+"""
+Index build consistency: the ETL stages the chunk tables of a build, publishes
+them with the FAISS index under one manifest, and `vectorDB.validate` rejects
+artifacts from different builds.
+
+    python -m pytest -q test/test_index_build.py
+"""
+
+import faiss
+import numpy as np
+import pytest
+from RAG.database import (
+    vectorDB,
+    artifact_version,
+    ids_digest,
+    read_manifest,
+    staged_path,
+    write_manifest,
+)
+from RAG.lexical_index import BM25Index
+from ETL_pipeline.modules.faiss_index_creation import publish
+
+TEXTS = ["esp32 board", "lm2596 buck converter", "18650 battery holder"]
+PRODUCT_IDS = np.array([10, 20, 30], dtype=np.int64)
+
+
+def stage(index_path: str, build_id: str, product_ids: np.ndarray = PRODUCT_IDS) -> dict:
+    """What chunking leaves behind under the staging prefix."""
+    staged = staged_path(index_path)
+    np.save(staged + "_ids.npy", product_ids)
+    BM25Index.build(TEXTS[: len(product_ids)], build_id=build_id).save(staged)
+    manifest = {"build_id": build_id, "chunks": len(product_ids), "ids_digest": ids_digest(product_ids)}
+    write_manifest(staged, manifest)
+    return manifest
+
+
+def index_for(n: int):
+    index = faiss.IndexIDMap(faiss.IndexFlatIP(4))
+    index.add_with_ids(np.random.rand(n, 4).astype(np.float32), np.arange(1, n + 1, dtype=np.int64))
+    return index
+
+
+def loaded(index_path: str) -> vectorDB:
+    """The artifacts `vectorDB` loads, without an embedding backend or product dict."""
+    db = object.__new__(vectorDB)
+    db.db_client = faiss.read_index(index_path + ".index")
+    db.chunk_product_ids = np.load(index_path + "_ids.npy")
+    db.lexical_index = BM25Index.load(index_path)
+    db.manifest = read_manifest(index_path)
+    db.data_dict = {str(pid): {} for pid in db.chunk_product_ids.tolist()}
+    return db
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "faiss_index")
+
+
+def test_publish_moves_the_staged_build_and_writes_the_manifest(index_path):
+    manifest = stage(index_path, "build-1")
+    publish(index_for(3), index_path, staged_path(index_path), manifest)
+
+    assert read_manifest(index_path) == {**manifest, "vectors": 3}
+    assert read_manifest(staged_path(index_path)) is None
+    assert BM25Index.load(index_path).build_id == "build-1"
+    loaded(index_path).validate()
+
+
+def test_version_only_changes_when_a_build_is_published(index_path):
+    publish(index_for(3), index_path, staged_path(index_path), stage(index_path, "build-1"))
+    published = artifact_version(index_path, index_path + "_data.pkl")
+
+    stage(index_path, "build-2")  # staged, not published yet
+    assert artifact_version(index_path, index_path + "_data.pkl") == published
+
+    publish(index_for(3), index_path, staged_path(index_path), read_manifest(staged_path(index_path)))
+    assert artifact_version(index_path, index_path + "_data.pkl") != published
+
+
+def test_validate_rejects_an_index_that_misses_chunks(index_path):
+    manifest = stage(index_path, "build-1")
+    publish(index_for(2), index_path, staged_path(index_path), manifest)
+
+    with pytest.raises(ValueError, match="2 vectors for 3 chunks"):
+        loaded(index_path).validate()
+
+
+def test_validate_rejects_chunk_tables_of_another_build(index_path):
+    publish(index_for(3), index_path, staged_path(index_path), stage(index_path, "build-1"))
+    np.save(index_path + "_ids.npy", np.array([10, 20, 31], dtype=np.int64))  # same size, other build
+
+    with pytest.raises(ValueError, match="Chunk id table does not belong to build build-1"):
+        loaded(index_path).validate()
+
+
+def test_validate_rejects_a_bm25_index_of_another_build(index_path):
+    publish(index_for(3), index_path, staged_path(index_path), stage(index_path, "build-1"))
+    BM25Index.build(TEXTS, build_id="build-0").save(index_path)
+
+    with pytest.raises(ValueError, match="BM25 index is from build build-0"):
+        loaded(index_path).validate()
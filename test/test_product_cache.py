@@ -0,0 +1,122 @@
+"""
+Product detail cache (`Shopify.product_cache.ProductCache`) on an in-memory
+stand-in for the few `redis.asyncio` calls it makes.
+
+    python -m pytest -q test/test_product_cache.py
+"""
+
+import asyncio
+import fnmatch
+from Shopify.product_cache import ProductCache
+from config import product_cache_key
+
+
+class Loader:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.calls = 0
+
+    async def __call__(self, handle: str):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError("Admin API down")
+        return {"handle": handle, "version": self.calls}
+
+
+class StandInRedis:
+    """get / set (nx) / delete / scan_iter over a dict; expiry is not needed here."""
+
+    def __init__(self):
+        self.data: dict[str, str] = {}
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def set(self, key: str, value, nx: bool = False, ex: int | None = None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def scan_iter(self, match: str = "*"):
+        for key in list(self.data):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def aclose(self):
+        pass
+
+
+class BrokenRedis(StandInRedis):
+    async def delete(self, *keys):
+        raise ConnectionError("Redis went away")
+
+
+def cache(loader: Loader, redis_client=None, ttl: int = 300) -> ProductCache:
+    return ProductCache(loader, ttl=ttl, redis_client=redis_client or StandInRedis())
+
+
+async def refresh_stale(product_cache: ProductCache) -> dict:
+    await product_cache.get("arduino-uno")
+    stale = await product_cache.get("arduino-uno")  # ttl=0: stale at once, refreshed in background
+    await asyncio.gather(*product_cache._refreshing.values())
+    return stale
+
+
+def test_refresh_releases_its_lock():
+    async def main():
+        loader = Loader()
+        product_cache = cache(loader, ttl=0)
+        await refresh_stale(product_cache)
+        lock = await product_cache.redis_client.get(f"{product_cache_key}-refresh:arduino-uno")
+        await refresh_stale(product_cache)  # not blocked by the previous refresh's lock
+        await product_cache.aclose()
+        return loader.calls, lock, product_cache.stats["refreshes"]
+
+    calls, lock, refreshes = asyncio.run(main())
+    assert lock is None
+    assert (calls, refreshes) == (3, 2)  # one miss, then one refresh per round
+
+
+def test_failed_refresh_keeps_serving_stale_and_releases_its_lock():
+    async def main():
+        loader = Loader()
+        product_cache = cache(loader, ttl=0)
+        await product_cache.get("arduino-uno")
+        loader.fail = True
+        stale = await refresh_stale(product_cache)
+        lock = await product_cache.redis_client.get(f"{product_cache_key}-refresh:arduino-uno")
+        await product_cache.aclose()
+        return stale, lock
+
+    stale, lock = asyncio.run(main())
+    assert stale == {"handle": "arduino-uno", "version": 1}
+    assert lock is None
+
+
+def test_invalidate_drops_handles():
+    async def main():
+        loader = Loader()
+        product_cache = cache(loader)
+        await product_cache.get("arduino-uno")
+        await product_cache.get("lm2596")
+        removed = await product_cache.invalidate([" Arduino-Uno "])
+        await product_cache.get("arduino-uno")
+        removed_all = await product_cache.invalidate()
+        await product_cache.aclose()
+        return removed, removed_all, loader.calls
+
+    assert asyncio.run(main()) == (1, 2, 3)
+
+
+def test_invalidate_reports_redis_failures():
+    async def main():
+        product_cache = cache(Loader(), redis_client=BrokenRedis())
+        removed = await product_cache.invalidate(["arduino-uno"])
+        await product_cache.aclose()
+        return removed, product_cache.stats["redis_errors"]
+
+    assert asyncio.run(main()) == (None, 1)
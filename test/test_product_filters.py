@@ -0,0 +1,111 @@
+"""
+Structured retrieval filters: tool argument parsing (`ProductFilter.from_arguments`)
+and the per-chunk masks / FAISS selector built from them.
+
+    python -m pytest -q test/test_product_filters.py
+"""
+
+import faiss
+import numpy as np
+import pytest
+from RAG.product_filters import ProductFilter, ProductAttributes, ChunkSelector
+
+DATA_DICT = {
+    "1": {"productType": "Sensors", "priceRange": {"min_price": "100.0", "max_price": "300.0"}},
+    "2": {"productType": "Motors", "priceRange": {"min_price": "1500.0", "max_price": "1500.0"}},
+    "3": {"handle": "old-relay", "Note": "Out of stock"},  # format_product stub
+    "4": {"productType": "Sensor Modules", "priceRange": {}},  # no price
+}
+# chunk row -> product id; product 5 is not in the mapping at all
+CHUNK_PRODUCT_IDS = np.array([1, 1, 2, 3, 4, 5, 2], dtype=np.int64)
+
+
+@pytest.fixture
+def attributes():
+    return ProductAttributes(DATA_DICT, CHUNK_PRODUCT_IDS)
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (500, 500.0),
+        (99.5, 99.5),
+        ("1200", 1200.0),
+        ("Rs. 1,000", 1000.0),
+        ("PKR 2500", 2500.0),
+        ("1000 rupees", 1000.0),
+        ("$20", 20.0),
+        ("under 500", None),
+        ("cheap", None),
+        ("nan", None),
+        (-5, None),
+        (True, None),
+        (None, None),
+        ("", None),
+    ],
+)
+def test_price_bounds_are_coerced_or_dropped(value, expected):
+    assert ProductFilter.from_arguments({"min_price": value, "max_price": value}) == ProductFilter(
+        min_price=expected, max_price=expected
+    )
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (True, True),
+        (False, False),
+        ("true", True),
+        ("Yes", True),
+        ("1", True),
+        (1, True),
+        ("false", False),
+        ("no", False),
+        (0, False),
+        ("maybe", None),
+        (None, None),
+    ],
+)
+def test_in_stock_is_coerced_or_dropped(value, expected):
+    assert ProductFilter.from_arguments({"in_stock": value}).in_stock is expected
+
+
+def test_unparseable_bounds_are_logged(caplog):
+    ProductFilter.from_arguments({"max_price": "under 500"})
+    assert "max_price='under 500'" in caplog.text
+
+
+def test_empty_arguments_give_an_empty_filter():
+    product_filter = ProductFilter.from_arguments({"category": "  ", "min_price": None})
+    assert product_filter.is_empty
+    assert ProductFilter.from_arguments({"category": " Sensors "}).category == "sensors"
+
+
+def test_unknown_products_never_match(attributes):
+    assert attributes.mask(ProductFilter()).tolist() == [True, True, True, True, True, False, True]
+
+
+def test_price_bounds_overlap_the_variant_price_range(attributes):
+    assert attributes.mask(ProductFilter(min_price=200)).tolist() == [True, True, True, False, False, False, True]
+    assert attributes.mask(ProductFilter(max_price=200)).tolist() == [True, True, False, False, False, False, False]
+    assert attributes.mask(ProductFilter(min_price=400, max_price=1000)).tolist() == [False] * 7
+
+
+def test_stock_and_category_filters(attributes):
+    assert attributes.mask(ProductFilter(in_stock=False)).tolist() == [False, False, False, True, False, False, False]
+    assert attributes.mask(ProductFilter(category="sensor")).tolist() == [True, True, False, False, True, False, False]
+    assert attributes.mask(ProductFilter(category="sensor", in_stock=True, max_price=500)).tolist() == [
+        True, True, False, False, False, False, False
+    ]
+
+
+def test_chunk_selector_allows_only_masked_labels(attributes):
+    vectors = np.eye(len(CHUNK_PRODUCT_IDS), dtype=np.float32)
+    index = faiss.IndexIDMap(faiss.IndexFlatIP(vectors.shape[1]))
+    index.add_with_ids(vectors, np.arange(1, len(vectors) + 1, dtype=np.int64))  # labels are row + 1
+
+    selector = ChunkSelector(attributes.mask(ProductFilter(category="motors")))
+    _, labels = index.search(vectors[:1], 5, params=faiss.SearchParameters(sel=selector.selector))
+
+    assert selector.count == 2
+    assert sorted(label for label in labels[0].tolist() if label != -1) == [3, 7]
@@ -0,0 +1,121 @@
+"""
+Request coalescing (`Shopify.single_flight.SingleFlight`) and how
+`Shopify.post_graphql` uses it.
+
+    python -m pytest -q test/test_single_flight.py
+"""
+
+import asyncio
+import pytest
+from Shopify import Shopify
+from Shopify.single_flight import SingleFlight
+from config import settings
+
+
+class Call:
+    """A slow upstream call that counts how often it really ran."""
+
+    def __init__(self, result=None, error: Exception | None = None, delay: float = 0.02):
+        self.result = result if result is not None else {"data": {"products": [{"id": 1}]}}
+        self.error = error
+        self.delay = delay
+        self.count = 0
+
+    async def __call__(self):
+        self.count += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_identical_calls_share_one_request():
+    async def main():
+        flight, call = SingleFlight(), Call()
+        results = await asyncio.gather(*(flight.do("products", call) for _ in range(5)))
+        return flight, call, results
+
+    flight, call, results = asyncio.run(main())
+    assert call.count == 1
+    assert all(result == call.result for result in results)
+    assert flight.metrics() == {"calls": 1, "shared": 4, "in_flight": 0, "shared_rate": 0.8}
+
+
+def test_shared_results_are_copied_per_caller():
+    async def main():
+        flight, call = SingleFlight(), Call()
+        first, second = await asyncio.gather(flight.do("products", call), flight.do("products", call))
+        first["data"]["products"].clear()  # callers post-process responses in place
+        return second
+
+    assert asyncio.run(main())["data"]["products"] == [{"id": 1}]
+
+
+def test_different_keys_and_later_calls_are_not_shared():
+    async def main():
+        flight, call = SingleFlight(), Call()
+        await asyncio.gather(flight.do("a", call), flight.do("b", call))
+        await flight.do("a", call)  # nothing is cached once a call finished
+        return call.count
+
+    assert asyncio.run(main()) == 3
+
+
+def test_errors_reach_every_caller():
+    async def main():
+        flight, call = SingleFlight(), Call(error=RuntimeError("502"))
+        return await asyncio.gather(*(flight.do("products", call) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+def test_cancelled_leader_does_not_fail_the_others():
+    async def main():
+        flight, call = SingleFlight(), Call(delay=0.05)
+        leader = asyncio.create_task(flight.do("products", call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("products", call))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # client disconnected
+        return leader, await follower, call
+
+    leader, result, call = asyncio.run(main())
+    assert leader.cancelled()
+    assert result == call.result and call.count == 1
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = Shopify(settings.store, "SingleFlightTest")
+    store.posted = []
+
+    async def _post_graphql(url, headers, query, variables, throttle=None):
+        store.posted.append(query)
+        await asyncio.sleep(0.02)
+        return {"data": {"ok": True}}
+
+    monkeypatch.setattr(store, "_post_graphql", _post_graphql)
+    return store
+
+
+def test_post_graphql_joins_identical_reads(store):
+    async def main():
+        reads = [store.post_graphql("url", {}, "query { shop { name } }", {"a": 1, "b": 2}) for _ in range(3)]
+        # same variables in another order are the same request
+        reads.append(store.post_graphql("url", {}, "query { shop { name } }", {"b": 2, "a": 1}))
+        reads.append(store.post_graphql("url", {}, "query { shop { name } }", {"a": 2, "b": 2}))
+        return await asyncio.gather(*reads)
+
+    asyncio.run(main())
+    assert len(store.posted) == 2
+
+
+def test_post_graphql_never_joins_mutations(store):
+    mutation = "mutation cartLinesAdd($cartId: ID!) { cartLinesAdd(cartId: $cartId) { cart { id } } }"
+
+    async def main():
+        await asyncio.gather(*(store.post_graphql("url", {}, mutation, {"cartId": "1"}) for _ in range(3)))
+
+    asyncio.run(main())
+    assert store.posted == [mutation] * 3
@@ -0,0 +1,112 @@
+"""
+Admin API cost throttling: the static query cost estimate and the client side
+leaky bucket (`Shopify.throttle`).
+
+    python -m pytest -q test/test_throttle.py
+"""
+
+import time
+import asyncio
+import pytest
+from Shopify.throttle import CostThrottle, estimate_query_cost
+from config import shopify_mutation_cost
+
+PRODUCTS = "query { products(first: 10) { edges { node { id title } } } }"
+NESTED = """
+query Products($cursor: String) {
+  products(first: 10, after: $cursor) {
+    edges {
+      node {
+        id
+        variants(first: 5) { edges { node { id title } } }
+      }
+    }
+  }
+}
+"""
+
+
+@pytest.mark.parametrize(
+    "query, cost",
+    [
+        ("query { shop { name } }", 1),
+        ("{ shop { name } }", 1),
+        ("query { product(id: $id) { id title } }", 1),
+        (PRODUCTS, 2 + 10 * 1),
+        (NESTED, 2 + 10 * (1 + 2 + 5 * 1)),  # every node pays for its variants connection
+        ("query { node(id: $id) { ... on Product { id } } }", 1),
+        ("mutation { cartCreate(input: {}) { cart { id } } }", shopify_mutation_cost),
+    ],
+)
+def test_estimate_query_cost(query, cost):
+    assert estimate_query_cost(query) == cost
+
+
+def test_requested_cost_prefers_what_the_server_reported():
+    throttle = CostThrottle()
+    assert throttle.requested_cost(PRODUCTS) == 12
+
+    throttle.update(PRODUCTS, {"requestedQueryCost": 7})
+    assert throttle.requested_cost(PRODUCTS) == 7
+
+
+def test_update_syncs_the_bucket_with_throttle_status():
+    throttle = CostThrottle(bucket_size=1000, restore_rate=50)
+    throttle.update(
+        PRODUCTS,
+        {"throttleStatus": {"maximumAvailable": 2000.0, "currentlyAvailable": 120.0, "restoreRate": 100.0}},
+    )
+    assert (throttle.maximum, throttle.available, throttle.restore_rate) == (2000.0, 120.0, 100.0)
+
+    throttle.update(PRODUCTS, None)  # Storefront / REST responses carry no cost
+    assert throttle.available == 120.0
+
+
+def test_acquire_debits_without_waiting_while_points_are_left():
+    throttle = CostThrottle(bucket_size=100, restore_rate=10)
+
+    asyncio.run(throttle.acquire(60))
+
+    assert throttle.waited == 0
+    assert throttle.available == pytest.approx(40, abs=0.5)
+
+
+def test_acquire_waits_exactly_for_the_missing_points():
+    throttle = CostThrottle(bucket_size=10, restore_rate=100)
+
+    async def drain_then_acquire():
+        await throttle.acquire(10)
+        started = time.monotonic()
+        await throttle.acquire(5)  # 5 points at 100/s
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(drain_then_acquire())
+
+    assert throttle.waited == pytest.approx(0.05, abs=0.01)
+    assert elapsed >= 0.04
+
+
+def test_acquire_caps_costs_above_the_bucket_size():
+    throttle = CostThrottle(bucket_size=10, restore_rate=1000)
+    asyncio.run(asyncio.wait_for(throttle.acquire(50), 1))
+    assert throttle.waited == 0
+
+
+def test_record_throttled_shows_in_metrics():
+    throttle = CostThrottle()
+    throttle.record_throttled()
+    throttle.record_throttled()
+    assert throttle.metrics()["throttled"] == 2
+
+
+@pytest.mark.parametrize(
+    "result, throttled",
+    [
+        ({"errors": [{"message": "Throttled", "extensions": {"code": "THROTTLED"}}]}, True),
+        ({"errors": [{"message": "boom", "extensions": {"code": "INTERNAL_SERVER_ERROR"}}]}, False),
+        ({"errors": ["not a dict"]}, False),
+        ({"data": {"shop": {"name": "x"}}}, False),
+    ],
+)
+def test_is_throttled(result, throttled):
+    assert CostThrottle.is_throttled(result) is throttled
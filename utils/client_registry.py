@@ -0,0 +1,72 @@
+import aiohttp
+from typing import Optional
+from httpx_aiohttp import AiohttpTransport
+from openai import AsyncOpenAI, DefaultAioHttpClient
+from utils.logger import get_logger
+from config import (
+    settings,
+    openai_timeout,
+    openai_pool_limit,
+    openai_pool_limit_per_host,
+    openai_keepalive_timeout,
+    openai_dns_cache_ttl,
+)
+
+
+class ClientRegistry:
+    """
+    Process-wide registry of long lived API clients.
+
+    Built once in `app.py`'s lifespan and closed on shutdown, so every
+    request reuses the same keep-alive connection pool (no TLS handshake
+    per call, no sockets leaked during traffic spikes).
+    Scripts that never run the lifespan get a lazily built client instead.
+    """
+
+    def __init__(self):
+        self._openai: Optional[AsyncOpenAI] = None
+        self.logger = get_logger("ClientRegistry")
+
+    async def start(self) -> "ClientRegistry":
+        if self._openai is None:
+            self._openai = self._build_openai()
+            self.logger.info(
+                f"OpenAI pool ready (limit={openai_pool_limit}, per_host={openai_pool_limit_per_host})"
+            )
+        return self
+
+    @property
+    def openai(self) -> AsyncOpenAI:
+        if self._openai is None:
+            self._openai = self._build_openai()
+        return self._openai
+
+    @staticmethod
+    def _build_openai() -> AsyncOpenAI:
+        def session_factory() -> aiohttp.ClientSession:
+            # Created on first request, inside the running event loop
+            connector = aiohttp.TCPConnector(
+                limit=openai_pool_limit,
+                limit_per_host=openai_pool_limit_per_host,
+                keepalive_timeout=openai_keepalive_timeout,
+                ttl_dns_cache=openai_dns_cache_ttl,
+                use_dns_cache=True,
+            )
+            return aiohttp.ClientSession(connector=connector)
+
+        return AsyncOpenAI(
+            api_key=settings.openai_api_key,
+            http_client=DefaultAioHttpClient(
+                timeout=openai_timeout,
+                transport=AiohttpTransport(client=session_factory),
+            ),
+        )
+
+    async def aclose(self):
+        if self._openai is not None:
+            await self._openai.close()
+            self._openai = None
+
+
+# instantiate once, and import `clients` everywhere
+clients = ClientRegistry()
@@ -1,5 +1,4 @@
-from config import settings
-from openai import AsyncOpenAI
+from utils.client_registry import clients
 import asyncio
 import json
 
@@ -7,15 +6,13 @@ import json
 async def parse_query_into_json_prompt(
     message="what was the 1st selling products here",
 ) -> dict:
-    async with AsyncOpenAI(
-        api_key=settings.openai_api_key,
-    ) as client:
-        response = await client.chat.completions.create(
-            model="gpt-5-mini-2025-08-07",
-            messages=[
-                {
-                  "role": "system",
-                  "content": """
+    client = clients.openai
+    response = await client.chat.completions.create(
+        model="gpt-5-mini-2025-08-07",
+        messages=[
+            {
+              "role": "system",
+              "content": """
                     You are a query reformatter for an online store system. 
                     Your ONLY task is to take the user's natural language query and rewrite it into a JSON object with the following schema:
                     You can neglect strict response to some queries which you think are dangerous if they are in the domain of electronics like some customer directly order or give best product for this so a bit more relax when user is query about some electronics or its project because later on project clarity lead user to buy from us.
@@ -64,21 +61,21 @@ async def parse_query_into_json_prompt(
                     6. In any wrong or irrelevant talk outside electronics and project-building scope, always enforce complete JSON response with refusal schema.
                     7. Be strict: never generate marketing language, opinions, or natural language responses — JSON only.
                     """.strip(),
-                },
-                {
-                    "role": "user",
-                    "content": str(message),
-                },
-            ],
-            response_format={"type": "json_object"},
-        )
-        # print(response)
-        # print(response.choices[0].message.content)  # type: ignore
-        data = response.choices[0].message.content
-        if data:
-            parsed = json.loads(data)
-            return parsed
-        return {}
+            },
+            {
+                "role": "user",
+                "content": str(message),
+            },
+        ],
+        response_format={"type": "json_object"},
+    )
+    # print(response)
+    # print(response.choices[0].message.content)  # type: ignore
+    data = response.choices[0].message.content
+    if data:
+        parsed = json.loads(data)
+        return parsed
+    return {}
 
 
 if __name__ == "__main__":
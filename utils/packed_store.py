@@ -0,0 +1,116 @@
+"""
+Read-only, memory-mapped key -> value store for the catalog artifacts
+(`data.pkl`, `products.pkl`).
+
+Unpickling a whole catalog gives every uvicorn worker its own copy of every
+nested dict. A `.pack` file is mapped instead: pages live once in the OS page
+cache for all workers, and a value is only unpickled when it is looked up.
+
+File layout (little endian):
+
+    b"PKSTORE1" | n: int64 | key_width: int64
+    keys:    n * key_width bytes, sorted, NUL padded (binary searched in place)
+    offsets: (n + 1) int64, 8 byte aligned
+    values:  one pickle per key, value i == blob[offsets[i]:offsets[i + 1]]
+
+    # publish .pack files next to existing pickles
+    python -m utils.packed_store ./bucket/index_storage/data.pkl ./bucket/index_storage/products.pkl
+"""
+
+import os
+import sys
+import pickle
+import numpy as np
+from typing import Any, Iterator
+from collections.abc import Mapping
+from config import catalog_store_mode
+
+MAGIC = b"PKSTORE1"
+HEADER = 24
+
+
+def packed_path(pickle_path: str) -> str:
+    return os.path.splitext(pickle_path)[0] + ".pack"
+
+
+def write_packed(mapping: dict, path: str):
+    """Writes aside and renames, so mapped readers never see a partial file."""
+    keys = sorted(mapping, key=str)
+    encoded = [str(key).encode("utf-8") for key in keys]
+    width = max((len(key) for key in encoded), default=1)
+    values = [pickle.dumps(mapping[key], protocol=pickle.HIGHEST_PROTOCOL) for key in keys]
+
+    offsets = np.zeros(len(values) + 1, dtype="<i8")
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    keys_end = HEADER + len(keys) * width
+    padding = -keys_end % 8
+
+    with open(path + ".tmp", "wb") as f:
+        f.write(MAGIC)
+        f.write(np.array([len(keys), width], dtype="<i8").tobytes())
+        f.write(np.array(encoded, dtype=f"S{width}").tobytes() if keys else b"")
+        f.write(b"\0" * padding)
+        f.write(offsets.tobytes())
+        for value in values:
+            f.write(value)
+    os.replace(path + ".tmp", path)
+
+
+class PackedStore(Mapping):
+    """Read-only `Mapping[str, Any]` over a memory-mapped `.pack` file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        raw = np.memmap(path, dtype=np.uint8, mode="r")
+        if raw[:8].tobytes() != MAGIC:
+            raise ValueError(f"{path} is not a packed store")
+
+        n, width = (int(v) for v in raw[8:HEADER].view("<i8"))
+        keys_end = HEADER + n * width
+        offsets_start = keys_end + (-keys_end % 8)
+        values_start = offsets_start + (n + 1) * 8
+
+        self._width = width
+        self._keys = raw[HEADER:keys_end].view(f"S{width}")
+        self._offsets = raw[offsets_start:values_start].view("<i8")
+        self._values = raw[values_start:]
+
+    def _position(self, key: str) -> int:
+        encoded = str(key).encode("utf-8")
+        if len(encoded) > self._width:
+            return -1
+        i = int(np.searchsorted(self._keys, encoded))
+        return i if i < len(self._keys) and self._keys[i] == encoded else -1
+
+    def __getitem__(self, key: str) -> Any:
+        i = self._position(key)
+        if i < 0:
+            raise KeyError(key)
+        return pickle.loads(self._values[self._offsets[i] : self._offsets[i + 1]])
+
+    def __contains__(self, key: object) -> bool:
+        return self._position(str(key)) >= 0
+
+    def __iter__(self) -> Iterator[str]:
+        return (key.decode("utf-8") for key in self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def load_mapping(pickle_path: str, mode: str = catalog_store_mode) -> Mapping:
+    """
+    The catalog artifact at `pickle_path`: mapped from its `.pack` sibling in
+    "packed" mode (when published), otherwise unpickled into this process.
+    """
+    if mode == "packed" and os.path.exists(packed_path(pickle_path)):
+        return PackedStore(packed_path(pickle_path))
+    with open(pickle_path, "rb") as f:
+        return pickle.load(f)
+
+
+if __name__ == "__main__":
+    for pickle_path in sys.argv[1:]:
+        with open(pickle_path, "rb") as f:
+            write_packed(pickle.load(f), packed_path(pickle_path))
+        print(f"{pickle_path} -> {packed_path(pickle_path)}")